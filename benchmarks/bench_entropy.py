@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Микробенчмарк пакетного подсчета энтропии строк в ObfuscationDetector.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_entropy.py --strings 50000
+"""
+import argparse
+import ast
+import random
+import string
+import sys
+import time
+from math import log2
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from taiga import entropy  # noqa: E402
+from taiga.detectors.obfuscation import ObfuscationDetector  # noqa: E402
+
+
+def make_literal_heavy_source(count: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    alphabet = string.ascii_letters + string.digits + '!#$%&()*+,-./:;<=>?@[]^_{|}~'
+    latin = alphabet + ''.join(chr(c) for c in range(0xC0, 0x100))
+    lines = []
+    for i in range(count):
+        kind = i % 8
+        if kind == 0:
+            value = ''.join(rng.choice(latin) for _ in range(rng.randint(120, 300)))
+        elif kind in (1, 2):
+            value = ''.join(rng.choice(alphabet) for _ in range(rng.randint(31, 50)))
+        elif kind in (3, 4):
+            value = ''.join(rng.choice(string.ascii_letters + '+/=') for _ in range(rng.randint(60, 200)))
+        elif kind == 5:
+            value = ' '.join(rng.choice(['alpha', 'beta', 'gamma', 'delta']) for _ in range(12))
+        else:
+            value = ''.join(rng.choice('абвгдежзиклмнопрстуфхцчшщэюя ') for _ in range(80))
+        lines.append(f'v{i} = {value!r}')
+    return '\n'.join(lines) + '\n'
+
+
+def legacy_entropy_pass(strings):
+    # Прежняя реализация: словарь частот и цикл по каждой строке отдельно
+    flagged = 0
+    for s in strings:
+        if len(s) < 20:
+            continue
+        freq = {}
+        for char in s:
+            freq[char] = freq.get(char, 0) + 1
+        value = 0
+        for count in freq.values():
+            p = count / len(s)
+            value -= p * log2(p)
+        max_entropy = log2(256) if len(s) > 50 else log2(94)
+        if value / max_entropy > 0.85 and len(s) > 30:
+            flagged += 1
+    return flagged
+
+
+def best_of(repeat, func, *args):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--strings', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    detector = ObfuscationDetector()
+    for node in ast.walk(ast.parse(make_literal_heavy_source(args.strings))):
+        if isinstance(node, ast.Constant):
+            detector.visit_Constant(node)
+    collected = list(detector.strings)
+    all_strings = [value for value, _, _ in collected]
+
+    def run_finalize():
+        detector.findings = []
+        detector.strings = collected
+        detector.finalize()
+        return len(detector.findings)
+
+    legacy_time, legacy_flagged = best_of(args.repeat, legacy_entropy_pass, all_strings)
+
+    numpy_module = entropy.np
+    entropy.np = None
+    python_time, python_flagged = best_of(args.repeat, run_finalize)
+    entropy.np = numpy_module
+
+    print(f'Строк-кандидатов: {len(collected)}')
+    print(f'Прежний цикл:            {legacy_time * 1000:8.1f} мс ({legacy_flagged} находок)')
+    print(f'Пакетный, чистый Python: {python_time * 1000:8.1f} мс ({python_flagged} находок)')
+    assert python_flagged == legacy_flagged
+
+    if numpy_module is None:
+        print('NumPy не установлен, векторный путь пропущен')
+        return
+
+    numpy_time, numpy_flagged = best_of(args.repeat, run_finalize)
+    print(f'Пакетный, NumPy:         {numpy_time * 1000:8.1f} мс ({numpy_flagged} находок)')
+    print(f'Ускорение NumPy:         {legacy_time / numpy_time:8.1f}x')
+    assert numpy_flagged == legacy_flagged
+
+
+if __name__ == '__main__':
+    main()
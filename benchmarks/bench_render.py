@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Время вывода отчета с большим числом находок.
+
+Сравнивает рендереры taiga.renderers (буфер и одна запись на блок) с прежним
+способом: print() на каждую строку через обертку потока colorama.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_render.py --findings 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from taiga.renderers import (ANSI_RESET, CompactRenderer, Console, OutputBuffer, Painter,  # noqa: E402
+                             ReportRenderer, TextRenderer)
+from taiga.report import NDJSONReportWriter, REPORT_WRITERS, ScanSummary  # noqa: E402
+
+DESCRIPTIONS = [
+    ('HIGH', 'DangerousCallsDetector', 'Вызов опасной функции: eval', 'eval'),
+    ('MEDIUM', 'DangerousCallsDetector', 'Вызов опасной функции: subprocess.run', 'subprocess.run'),
+    ('MEDIUM', 'ObfuscationDetector', 'Высокая энтропия строки (0.91) - возможна обфускация', 'Энтропия: 5.72'),
+    ('HIGH', 'ObfuscationDetector', 'Использование base64 с eval/exec - явная обфускация', 'b64decode -> exec'),
+]
+
+
+def make_results(findings: int, per_file: int, seed: int = 0):
+    rng = random.Random(seed)
+    results = []
+    for i in range(0, findings, per_file):
+        file_findings = []
+        for line in sorted(rng.sample(range(1, per_file * 20), min(per_file, findings - i))):
+            severity, detector, description, pattern = rng.choice(DESCRIPTIONS)
+            file_findings.append({'detector': detector, 'severity': severity, 'description': description,
+                                  'line': line, 'col': rng.randint(0, 40), 'pattern': pattern})
+        results.append({'filename': f'pkg{i // 1000}/module_{i}.py', 'findings': file_findings,
+                        'risk_score': 10.0, 'status': 'success'})
+    return results
+
+
+class PrintConsole(Console):
+    # Прежний вывод: print_colored -> print() на каждую строку через colorama.init(autoreset=True)
+
+    def __init__(self, stream, color):
+        import colorama
+        super().__init__(OutputBuffer(stream, interactive=False), Painter(color))
+        self.stream = colorama.AnsiToWin32(stream, autoreset=True).stream
+
+    def line(self, text='', color='', style='', bg_color='', end='\n'):
+        print(self.painter.paint(text, color, style, bg_color) + ANSI_RESET, end=end, file=self.stream)
+
+
+def run(label, make_renderer, results, sink):
+    summary = ScanSummary()
+    started = time.perf_counter()
+    renderer = make_renderer(sink)
+    for i, result in enumerate(results, 1):
+        summary.add(result)
+        renderer.result(i, result)
+    renderer.summary(summary)
+    renderer.close()
+    sink.flush()
+    elapsed = time.perf_counter() - started
+    return label, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--findings', type=int, default=100000)
+    parser.add_argument('--per-file', type=int, default=50)
+    parser.add_argument('--no-legacy', action='store_true', help='Не замерять прежний вывод через print()')
+    args = parser.parse_args()
+
+    results = make_results(args.findings, args.per_file)
+
+    def console(sink, color=False):
+        return Console(OutputBuffer(sink, interactive=False), Painter(color))
+
+    def report(fmt):
+        def make(sink):
+            out = OutputBuffer(sink, interactive=False)
+            writer_class = REPORT_WRITERS[fmt]
+            writer = NDJSONReportWriter(out, line_buffered=False) if fmt == 'ndjson' else writer_class(out)
+            return ReportRenderer(Console(out, Painter()), writer)
+        return make
+
+    runs = [
+        ('text', lambda sink: TextRenderer(console(sink), verbose=True, multiple=True)),
+        ('text, цвет', lambda sink: TextRenderer(console(sink, True), verbose=True, multiple=True)),
+        ('compact', lambda sink: CompactRenderer(console(sink), multiple=True)),
+        ('json', report('json')),
+        ('ndjson', report('ndjson')),
+        ('sarif', report('sarif')),
+    ]
+    if not args.no_legacy:
+        runs += [
+            ('text, print()', lambda sink: TextRenderer(PrintConsole(sink, False), verbose=True, multiple=True)),
+            ('text, print(), цвет', lambda sink: TextRenderer(PrintConsole(sink, True), verbose=True, multiple=True)),
+        ]
+
+    print(f'Находок: {args.findings}, файлов: {len(results)}')
+    with open(os.devnull, 'w', encoding='utf-8') as sink:
+        for label, make_renderer in runs:
+            label, elapsed = run(label, make_renderer, results, sink)
+            print(f'{label + ":":<22} {elapsed:7.3f} с {args.findings / elapsed:12.0f} находок/с')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Запись большого числа находок в базу результатов и время запросов taiga query.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_store.py --findings 1000000 --runs 2
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_render import make_results  # noqa: E402
+from taiga.store import ResultStore, StoreReportWriter  # noqa: E402
+
+QUERIES = [
+    ('pattern=pickle.loads', dict(patterns=['pickle.loads'])),
+    ('pattern=eval, >= HIGH', dict(patterns=['eval'], min_severity='HIGH')),
+    ('detector=Obfuscation', dict(detectors=['ObfuscationDetector'])),
+    ('path=pkg7/*', dict(paths=['pkg7/*'])),
+]
+
+
+def timed(function):
+    started = time.perf_counter()
+    value = function()
+    return value, (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--findings', type=int, default=1000000)
+    parser.add_argument('--per-file', type=int, default=50)
+    parser.add_argument('--runs', type=int, default=2)
+    parser.add_argument('--db', help='Путь к базе (по умолчанию временный файл)')
+    args = parser.parse_args()
+
+    results = make_results(args.findings, args.per_file)
+    # Паттерн pickle.loads встречается редко, как в настоящих репозиториях
+    for result in results[::97]:
+        result['findings'][0].update(pattern='pickle.loads', description='Вызов опасной функции: pickle.loads')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.db or os.path.join(tmp, 'results.db')
+        for run in range(args.runs):
+            started = time.perf_counter()
+            with StoreReportWriter(path, label=f'run-{run}') as writer:
+                for result in results:
+                    writer.write(result)
+            elapsed = time.perf_counter() - started
+            print(f'Запись запуска {run + 1}: {elapsed:7.2f} с {args.findings / elapsed:12.0f} находок/с')
+
+        store = ResultStore(path)
+        runs = store.resolve_runs('last')
+        for label, filters in QUERIES:
+            (count,), count_ms = timed(lambda: store.count(runs=runs, **filters))
+            rows, first_ms = timed(lambda: list(store.query(runs=runs, limit=100, **filters)))
+            print(f'{label + ":":<26} {count[1]:>9} находок, count {count_ms:8.1f} мс, '
+                  f'первые {len(rows)} {first_ms:8.1f} мс')
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Генератор воспроизводимых синтетических корпусов для бенчмарков Taiga.
+
+    python benchmarks/corpus.py /tmp/taiga-corpus --scale small
+"""
+import argparse
+import random
+import string
+from pathlib import Path
+from typing import Callable, Dict
+
+SCALES = {'small': 1, 'medium': 5, 'large': 25}
+
+IDENTIFIERS = ['data', 'items', 'result', 'value', 'config', 'path', 'payload', 'buffer', 'index', 'name']
+DANGEROUS = ['eval(code)', 'exec(code)', 'os.system(cmd)', 'subprocess.run(cmd)', 'pickle.loads(blob)',
+             'eval(base64.b64decode(blob))']
+
+
+def _small_module(rng: random.Random, lines: int) -> str:
+    out = ['import os', 'import base64', 'import subprocess', 'import pickle', '']
+    for i in range(lines // 8):
+        name = rng.choice(IDENTIFIERS)
+        out.append(f'def {name}_{i}(code, cmd, blob):')
+        out.append(f'    """Обработка {name} номер {i}."""')
+        out.append(f'    {name} = [x * {i} for x in range({rng.randint(2, 50)}) if x % 3]')
+        out.append(f'    total = sum({name}) + len(str(cmd))')
+        if rng.random() < 0.15:
+            out.append(f'    {rng.choice(DANGEROUS)}')
+        out.append(f'    label = "{name}-{i}"')
+        out.append('    return total, label')
+        out.append('')
+    return '\n'.join(out) + '\n'
+
+
+def gen_many_small(root: Path, scale: int, rng: random.Random) -> None:
+    for i in range(400 * scale):
+        package = root / f'pkg{i % 20}'
+        package.mkdir(parents=True, exist_ok=True)
+        (package / f'module_{i}.py').write_text(_small_module(rng, rng.randint(24, 80)), encoding='utf-8')
+
+
+def gen_huge(root: Path, scale: int, rng: random.Random) -> None:
+    root.mkdir(parents=True, exist_ok=True)
+    for i in range(2 * scale):
+        (root / f'huge_{i}.py').write_text(_small_module(rng, 20000), encoding='utf-8')
+
+
+def gen_deep_nesting(root: Path, scale: int, rng: random.Random) -> None:
+    # Цепочки BinOp глубиной в сотни уровней: ast.parse еще справляется, рекурсивный обход - нет
+    root.mkdir(parents=True, exist_ok=True)
+    for i in range(50 * scale):
+        depth = rng.randint(300, 800)
+        terms = ' + '.join(f'x{j % 7}' for j in range(depth))
+        calls = 'f(' * 60 + 'eval(code)' + ')' * 60
+        (root / f'deep_{i}.py').write_text(f'value = {terms}\nresult = {calls}\n', encoding='utf-8')
+
+
+def gen_literal_heavy(root: Path, scale: int, rng: random.Random) -> None:
+    alphabet = string.ascii_letters + string.digits + '+/=!#$%&*-_.:;<>?@^~|'
+    high = alphabet + ''.join(chr(c) for c in range(0xC0, 0x100))
+    root.mkdir(parents=True, exist_ok=True)
+    for i in range(20 * scale):
+        parts = []
+        for j in range(2000):
+            source = high if j % 10 == 0 else alphabet
+            value = ''.join(rng.choice(source) for _ in range(rng.randint(31, 160)))
+            parts.append(f'_{j}={value!r}')
+        # Минифицированный код: длинные строки, много присваиваний через ';'
+        lines = [';'.join(parts[k:k + 25]) for k in range(0, len(parts), 25)]
+        (root / f'minified_{i}.py').write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+
+def gen_syntax_errors(root: Path, scale: int, rng: random.Random) -> None:
+    root.mkdir(parents=True, exist_ok=True)
+    for i in range(100 * scale):
+        body = _small_module(rng, rng.randint(24, 80))
+        lines = body.splitlines()
+        lines.insert(rng.randint(5, len(lines) - 1), 'def broken(:  # синтаксическая ошибка')
+        lines.append('exec(payload)')
+        (root / f'broken_{i}.py').write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+
+SCENARIOS: Dict[str, Callable[[Path, int, random.Random], None]] = {
+    'many_small': gen_many_small,
+    'huge_files': gen_huge,
+    'deep_nesting': gen_deep_nesting,
+    'literal_heavy': gen_literal_heavy,
+    'syntax_errors': gen_syntax_errors,
+}
+
+
+def generate(root: str, scale: str = 'small', seed: int = 42, scenarios=None) -> Dict[str, Path]:
+    root = Path(root)
+    paths = {}
+    for name in scenarios or SCENARIOS:
+        target = root / f'{name}-{scale}-{seed}'
+        marker = target / '.complete'
+        if not marker.exists():
+            SCENARIOS[name](target, SCALES[scale], random.Random(f'{seed}:{name}'))
+            marker.touch()
+        paths[name] = target
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('root')
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    for name, path in generate(args.root, args.scale, args.seed).items():
+        count = sum(1 for _ in path.rglob('*.py'))
+        print(f'{name:<15} {count:>6} файлов  {path}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""Бенчмарки Taiga на синтетических корпусах с базовыми результатами в JSON.
+
+    python benchmarks/run_benchmarks.py run --scale small -o current.json
+    python benchmarks/run_benchmarks.py run --baseline baseline.json --threshold 10
+    python benchmarks/run_benchmarks.py compare baseline.json current.json
+
+Каждый сценарий запускается в отдельном процессе, поэтому пиковый RSS
+относится только к нему. Время - лучшее из --repeat повторов.
+"""
+import argparse
+import ast
+import json
+import multiprocessing
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import corpus  # noqa: E402
+import taiga  # noqa: E402
+from taiga.core import TaigaAnalyzer  # noqa: E402
+
+TARGETS = ('analyze_file', 'analyze_source', 'cli')
+# Метрики, где больше - лучше, и где больше - хуже
+HIGHER_IS_BETTER = ('files_per_sec', 'nodes_per_sec')
+LOWER_IS_BETTER = ('peak_rss_kb',)
+
+
+def _count_nodes(sources):
+    total = 0
+    for source in sources:
+        try:
+            total += sum(1 for _ in ast.walk(ast.parse(source)))
+        except (SyntaxError, RecursionError):
+            pass
+    return total
+
+
+def _peak_rss_kb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS отдает байты, Linux - килобайты
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def _measure(target, directory, repeat, queue):
+    paths = sorted(str(p) for p in Path(directory).rglob('*.py'))
+    sources = [Path(p).read_text(encoding='utf-8') for p in paths]
+    nodes = _count_nodes(sources)
+
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        if target == 'analyze_file':
+            analyzer = TaigaAnalyzer()
+            for path in paths:
+                analyzer.analyze_file(path)
+        elif target == 'analyze_source':
+            analyzer = TaigaAnalyzer()
+            for path, source in zip(paths, sources):
+                analyzer.analyze_source(source, path)
+        else:
+            subprocess.run(
+                [sys.executable, '-m', 'taiga.cli', directory, '--no-cache', '--jobs', '1', '--format', 'json'],
+                cwd=str(ROOT), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    metrics = {
+        'files': len(paths),
+        'nodes': nodes,
+        'seconds': round(best, 4),
+        'files_per_sec': round(len(paths) / best, 1),
+        'nodes_per_sec': round(nodes / best, 1),
+    }
+
+    if target == 'cli':
+        metrics['peak_rss_kb'] = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    else:
+        metrics['peak_rss_kb'] = _peak_rss_kb()
+        profiled = TaigaAnalyzer(profile=True)
+        for path in paths:
+            profiled.analyze_file(path)
+        metrics['detectors_ms'] = {
+            key: round(ns / 1e6, 2) for key, ns in sorted(profiled.profiler.detector_ns.items())
+        }
+
+    queue.put(metrics)
+
+
+def run_scenario(target, directory, repeat):
+    # После fork пиковый RSS включал бы память родителя, spawn дает чистый процесс
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_measure, args=(target, str(directory), repeat, queue))
+    process.start()
+    metrics = queue.get()
+    process.join()
+    return metrics
+
+
+def command_run(args):
+    corpus_root = args.corpus_dir or Path(tempfile.gettempdir()) / 'taiga-bench-corpus'
+    scenarios = corpus.generate(corpus_root, args.scale, args.seed, args.scenarios)
+
+    results = {}
+    for name, directory in scenarios.items():
+        for target in args.targets:
+            key = f'{name}/{target}'
+            metrics = run_scenario(target, directory, args.repeat)
+            results[key] = metrics
+            print(f"{key:<34} {metrics['files_per_sec']:>10.1f} файл/с {metrics['nodes_per_sec']:>12.0f} узл/с"
+                  f" {metrics['peak_rss_kb'] / 1024:>8.1f} МБ")
+
+    report = {
+        'meta': {
+            'taiga': taiga.__version__,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'scale': args.scale,
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f'Результаты сохранены в {args.output}')
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        return 1 if compare(baseline, report, args.threshold) else 0
+    return 0
+
+
+def compare(baseline, current, threshold):
+    regressions = []
+    for key, metrics in sorted(current['results'].items()):
+        base = baseline['results'].get(key)
+        if base is None:
+            print(f'{key:<34} нет в базовой линии')
+            continue
+
+        for metric in HIGHER_IS_BETTER + LOWER_IS_BETTER:
+            if metric not in base or metric not in metrics or not base[metric]:
+                continue
+            change = (metrics[metric] - base[metric]) / base[metric] * 100
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            flag = 'РЕГРЕССИЯ' if worse > threshold else ''
+            print(f'{key:<34} {metric:<14} {base[metric]:>14.1f} -> {metrics[metric]:>14.1f} {change:>+7.1f}% {flag}')
+            if flag:
+                regressions.append((key, metric, change))
+
+    if regressions:
+        print(f'\nРегрессий больше {threshold}%: {len(regressions)}')
+    else:
+        print(f'\nРегрессий больше {threshold}% нет')
+    return regressions
+
+
+def command_compare(args):
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(args.current, 'r', encoding='utf-8') as f:
+        current = json.load(f)
+    return 1 if compare(baseline, current, args.threshold) else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run = subparsers.add_parser('run', help='Сгенерировать корпус и измерить')
+    run.add_argument('--scale', choices=sorted(corpus.SCALES), default='small')
+    run.add_argument('--seed', type=int, default=42)
+    run.add_argument('--repeat', type=int, default=3)
+    run.add_argument('--scenarios', nargs='+', choices=sorted(corpus.SCENARIOS))
+    run.add_argument('--targets', nargs='+', choices=TARGETS, default=list(TARGETS))
+    run.add_argument('--corpus-dir', type=Path)
+    run.add_argument('-o', '--output', help='Сохранить результаты в JSON')
+    run.add_argument('--baseline', help='Сравнить с базовыми результатами')
+    run.add_argument('--threshold', type=float, default=10.0, help='Допустимое ухудшение, %% (по умолчанию 10)')
+    run.set_defaults(func=command_run)
+
+    cmp = subparsers.add_parser('compare', help='Сравнить два файла результатов')
+    cmp.add_argument('baseline')
+    cmp.add_argument('current')
+    cmp.add_argument('--threshold', type=float, default=10.0)
+    cmp.set_defaults(func=command_compare)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
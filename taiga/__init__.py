@@ -1,9 +1,15 @@
-
-
 __version__ = "0.1.0"
 __author__ = "Fderious"
 
-from .core import TaigaAnalyzer
-from .cli import main
+__all__ = ['TaigaAnalyzer', 'main']
+
 
-__all__ = ['TaigaAnalyzer', 'main']
\ No newline at end of file
+def __getattr__(name):
+    # Ядро импортируется по требованию: клиенту демона оно не нужно
+    if name == 'TaigaAnalyzer':
+        from .core import TaigaAnalyzer
+        return TaigaAnalyzer
+    if name == 'main':
+        from .cli import main
+        return main
+    raise AttributeError(f"module 'taiga' has no attribute {name!r}")
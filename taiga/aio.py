@@ -0,0 +1,200 @@
+import asyncio
+import multiprocessing
+import os
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
+
+from .core import _init_worker, _analyze_data_item, _finish_worker_chunk
+from .supervisor import _Worker
+
+# Отличает "таймаут по умолчанию" от явного timeout=None (без ограничения)
+_DEFAULT = object()
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _error_result(filename: str, error_msg: str, status: str = 'error') -> Dict[str, Any]:
+    return {
+        'filename': filename,
+        'findings': [],
+        'risk_score': 0.0,
+        'status': status,
+        'error': error_msg
+    }
+
+
+async def _aiter(items: Union[Iterable, AsyncIterable]) -> AsyncIterator:
+    if hasattr(items, '__aiter__'):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+class AsyncAnalyzer:
+    DEFAULT_CONCURRENCY = 64
+    READ_THREADS = 4
+
+    def __init__(self, jobs: Optional[int] = None, concurrency: int = DEFAULT_CONCURRENCY,
+                 timeout: Optional[float] = None, read_threads: int = READ_THREADS, **options):
+        self.jobs = jobs or os.cpu_count() or 1
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.stats = Counter()
+        # Семафор ограничивает число файлов в работе, а значит и память под их содержимое
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._threads = ThreadPoolExecutor(read_threads, thread_name_prefix='taiga-read')
+        # Воркеры те же, что у SupervisedPool: зависший разбор убивается вместе с процессом,
+        # а ProcessPoolExecutor после гибели процесса непригоден целиком.
+        # Обмен с воркером блокирующий, поэтому идет в отдельных потоках, по одному на воркер
+        self._args = (_init_worker, (options,), _analyze_data_item, _finish_worker_chunk, None)
+        self._context = multiprocessing.get_context()
+        self._workers = asyncio.Semaphore(self.jobs)
+        self._idle: List[_Worker] = []
+        self._busy = set()
+        self._pipes = ThreadPoolExecutor(self.jobs, thread_name_prefix='taiga-pipe')
+
+    async def analyze_file_async(self, file_path, timeout=_DEFAULT) -> Dict[str, Any]:
+        filename = str(file_path)
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            try:
+                data = await loop.run_in_executor(self._threads, _read_file, filename)
+            except OSError as e:
+                return _error_result(filename, f'Не удалось прочитать файл: {e}')
+            return await self._analyze_data(data, filename, timeout)
+
+    async def analyze_data_async(self, data: bytes, filename: str = '<string>',
+                                 timeout=_DEFAULT) -> Dict[str, Any]:
+        async with self._semaphore:
+            return await self._analyze_data(data, filename, timeout)
+
+    async def analyze_many_async(self, paths: Union[Iterable, AsyncIterable],
+                                 timeout=_DEFAULT) -> AsyncIterator[Dict[str, Any]]:
+        # Результаты отдаются по мере готовности; новые пути берутся, только когда освободилось место
+        results = self._as_completed(paths, lambda path: self.analyze_file_async(path, timeout))
+        try:
+            async for result in results:
+                yield result
+        finally:
+            # Вложенный асинхронный генератор сам не закрывается: задачи в работе отменяются здесь
+            await results.aclose()
+
+    async def analyze_sources_async(self, sources: Union[Iterable[Tuple[str, Any]], AsyncIterable],
+                                    timeout=_DEFAULT) -> AsyncIterator[Dict[str, Any]]:
+        # Пары (имя, код) как у TaigaAnalyzer.analyze_sources; результаты по мере готовности
+        def analyze(item):
+            name, source = item
+            data = source.encode('utf-8', 'surrogatepass') if isinstance(source, str) else bytes(source)
+            return self.analyze_data_async(data, name, timeout)
+
+        results = self._as_completed(sources, analyze)
+        try:
+            async for result in results:
+                yield result
+        finally:
+            await results.aclose()
+
+    async def _as_completed(self, items: Union[Iterable, AsyncIterable], start) -> AsyncIterator[Dict[str, Any]]:
+        items = _aiter(items)
+        pending = set()
+        exhausted = False
+
+        try:
+            while True:
+                while not exhausted and len(pending) < self.concurrency:
+                    try:
+                        item = await items.__anext__()
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    pending.add(asyncio.ensure_future(start(item)))
+
+                if not pending:
+                    return
+
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _analyze_data(self, data: bytes, filename: str, timeout) -> Dict[str, Any]:
+        if timeout is _DEFAULT:
+            timeout = self.timeout
+        async with self._workers:
+            worker = self._idle.pop() if self._idle else _Worker(self._context, self._args)
+            self._busy.add(worker)
+            return await self._exchange(worker, filename, data, timeout)
+
+    async def _exchange(self, worker: _Worker, filename: str, data: bytes, timeout) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        pending = loop.run_in_executor(self._pipes, worker.start, None, [(filename, data)], None)
+        results = None
+        try:
+            await asyncio.shield(pending)
+            while True:
+                # Время считается с сообщения ready: запуск воркера в таймаут файла не входит
+                wait = timeout if worker.ready and results is None else None
+                pending = loop.run_in_executor(self._pipes, worker.conn.recv)
+                try:
+                    kind, payload = await asyncio.wait_for(asyncio.shield(pending), wait)
+                except asyncio.TimeoutError:
+                    await self._retire(worker, pending)
+                    self.stats['timeouts'] += 1
+                    return _error_result(filename, f'Превышено время анализа ({timeout:g} с)', 'timeout')
+
+                if kind == 'ready':
+                    worker.ready = True
+                elif kind == 'result':
+                    results = payload
+                else:
+                    stats, _ = payload
+                    self.stats.update(stats)
+                    self._busy.discard(worker)
+                    self._idle.append(worker)
+                    return results[0]
+        except (EOFError, OSError):
+            # Процесс умер сам: нехватка памяти вне Python или падение интерпретатора
+            await self._retire(worker)
+            return _error_result(filename, f'Процесс анализа завершился с кодом {worker.process.exitcode}')
+        except asyncio.CancelledError:
+            # Воркер остался посреди файла, повторно его не используем
+            await self._retire(worker, pending)
+            raise
+
+    async def _retire(self, worker: _Worker, received: Optional[asyncio.Future] = None) -> None:
+        self._busy.discard(worker)
+        worker.process.kill()
+        if received is not None:
+            # Канал закрывается только после того, как поток чтения получил EOF
+            await asyncio.gather(received, return_exceptions=True)
+        worker.kill()
+        self.stats['worker_restarts'] += 1
+
+    def close(self) -> None:
+        for worker in self._idle:
+            worker.stop()
+        for worker in list(self._busy):
+            worker.kill()
+        self._idle = []
+        self._busy = set()
+        self._pipes.shutdown(cancel_futures=True)
+        self._threads.shutdown(cancel_futures=True)
+
+    async def aclose(self) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
@@ -0,0 +1,157 @@
+import os
+import tarfile
+import zipfile
+import zlib
+from io import BytesIO
+from typing import BinaryIO, Iterator, NamedTuple, Optional, Tuple
+
+try:
+    import lzma
+    _LZMA_ERRORS = (lzma.LZMAError,)
+except ImportError:
+    _LZMA_ERRORS = ()
+
+ZIP_SUFFIXES = ('.zip', '.whl', '.egg', '.pyz')
+TAR_SUFFIXES = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+ARCHIVE_SUFFIXES = ZIP_SUFFIXES + TAR_SUFFIXES
+# Разделитель пути архива и пути внутри него: pkg.whl!pkg/module.py
+MEMBER_SEPARATOR = '!'
+
+ARCHIVE_ERRORS = (zipfile.BadZipFile, tarfile.TarError, OSError, EOFError, ValueError,
+                  NotImplementedError, RuntimeError, zlib.error) + _LZMA_ERRORS
+
+
+class ArchiveMember(NamedTuple):
+    name: str
+    data: Optional[bytes]
+    error: Optional[str]
+
+
+class _Budget:
+    __slots__ = ('remaining',)
+
+    def __init__(self, remaining: int):
+        self.remaining = remaining
+
+
+class ArchiveReader:
+    MAX_DEPTH = 3
+    MAX_MEMBER_SIZE = 16 * 1024 * 1024
+    MAX_TOTAL_SIZE = 1024 * 1024 * 1024
+    MAX_RATIO = 100
+    # Маленький файл с высоким сжатием (отступы, повторы) бомбой не считается
+    RATIO_MIN_SIZE = 1024 * 1024
+
+    def __init__(self, max_depth: int = MAX_DEPTH, max_member_size: int = MAX_MEMBER_SIZE,
+                 max_total_size: int = MAX_TOTAL_SIZE, max_ratio: float = MAX_RATIO,
+                 suffixes: Tuple[str, ...] = ('.py',)):
+        self.max_depth = max_depth
+        self.max_member_size = max_member_size
+        self.max_total_size = max_total_size
+        self.max_ratio = max_ratio
+        self.suffixes = suffixes
+
+    @staticmethod
+    def is_archive(path) -> bool:
+        return str(path).lower().endswith(ARCHIVE_SUFFIXES)
+
+    def iter_members(self, path) -> Iterator[ArchiveMember]:
+        name = str(path)
+        budget = _Budget(self.max_total_size)
+        try:
+            with open(path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                yield from self._iter_archive(name, f, size, 0, budget)
+        except OSError as e:
+            yield ArchiveMember(name, None, f'Не удалось прочитать архив: {e}')
+
+    def _iter_archive(self, name: str, fileobj: BinaryIO, size: int, depth: int,
+                      budget: _Budget) -> Iterator[ArchiveMember]:
+        if name.lower().endswith(ZIP_SUFFIXES):
+            members = self._iter_zip(name, fileobj, depth, budget)
+        else:
+            members = self._iter_tar(name, fileobj, size, depth, budget)
+
+        try:
+            yield from members
+        except ARCHIVE_ERRORS as e:
+            yield ArchiveMember(name, None, f'Поврежденный архив: {e}')
+
+    def _check_member(self, member: str, member_size: int, depth: int, budget: _Budget) -> Optional[str]:
+        if self.is_archive(member) and depth + 1 > self.max_depth:
+            return f'Превышена глубина вложенности архивов ({self.max_depth})'
+        if member_size > self.max_member_size:
+            return f'Файл в архиве слишком большой: {member_size} байт'
+        if member_size > budget.remaining:
+            return 'Превышен общий объем распаковки архива'
+        return None
+
+    def _wanted(self, member_name: str) -> bool:
+        return member_name.endswith(self.suffixes) or self.is_archive(member_name)
+
+    def _emit(self, member: str, data: bytes, depth: int, budget: _Budget) -> Iterator[ArchiveMember]:
+        if len(data) > self.max_member_size:
+            yield ArchiveMember(member, None, f'Файл в архиве больше заявленного размера: {member}')
+            return
+
+        budget.remaining -= len(data)
+        if self.is_archive(member):
+            yield from self._iter_archive(member, BytesIO(data), len(data), depth + 1, budget)
+        else:
+            yield ArchiveMember(member, data, None)
+
+    def _iter_zip(self, name: str, fileobj: BinaryIO, depth: int, budget: _Budget) -> Iterator[ArchiveMember]:
+        with zipfile.ZipFile(fileobj) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or not self._wanted(info.filename):
+                    continue
+
+                member = f'{name}{MEMBER_SEPARATOR}{info.filename}'
+                error = self._check_member(member, info.file_size, depth, budget)
+                if error is None and info.file_size >= self.RATIO_MIN_SIZE:
+                    ratio = info.file_size / max(info.compress_size, 1)
+                    if ratio > self.max_ratio:
+                        error = f'Подозрительная степень сжатия ({ratio:.0f}:1), возможна zip-бомба'
+                if error is not None:
+                    yield ArchiveMember(member, None, error)
+                    continue
+
+                try:
+                    # Размер в заголовке может лгать, поэтому читаем не больше лимита
+                    with archive.open(info) as f:
+                        data = f.read(self.max_member_size + 1)
+                except ARCHIVE_ERRORS as e:
+                    yield ArchiveMember(member, None, f'Не удалось распаковать: {e}')
+                    continue
+
+                yield from self._emit(member, data, depth, budget)
+
+    def _iter_tar(self, name: str, fileobj: BinaryIO, size: int, depth: int,
+                  budget: _Budget) -> Iterator[ArchiveMember]:
+        declared = 0
+        # Потоковый режим: архив читается один раз по порядку, без поиска по файлу
+        with tarfile.open(fileobj=fileobj, mode='r|*') as archive:
+            for info in archive:
+                if not info.isfile():
+                    continue
+
+                # Пропуск ненужного файла тоже распаковывает его, поэтому считаем все заявленные размеры
+                declared += info.size
+                if declared >= self.RATIO_MIN_SIZE and declared / max(size, 1) > self.max_ratio:
+                    yield ArchiveMember(name, None, 'Подозрительная степень сжатия, возможна tar-бомба')
+                    return
+
+                if not self._wanted(info.name):
+                    continue
+
+                member = f'{name}{MEMBER_SEPARATOR}{info.name}'
+                error = self._check_member(member, info.size, depth, budget)
+                if error is not None:
+                    yield ArchiveMember(member, None, error)
+                    continue
+
+                f = archive.extractfile(info)
+                if f is None:
+                    continue
+                data = f.read(self.max_member_size + 1)
+                yield from self._emit(member, data, depth, budget)
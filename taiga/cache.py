@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def default_cache_dir() -> Path:
+    base = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(base) / 'taiga'
+
+
+class ResultCache:
+    DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+    DB_NAME = 'results.sqlite3'
+    # Записи и обновления времени доступа копятся и пишутся одной транзакцией
+    FLUSH_EVERY = 256
+
+    def __init__(self, cache_dir: Optional[str] = None, max_size: int = DEFAULT_MAX_SIZE):
+        self.cache_dir = Path(cache_dir) if cache_dir else default_cache_dir()
+        self.max_size = max_size
+        self._conn = None
+        self._pending_puts: List[Tuple[str, bytes, int, float]] = []
+        self._pending_touches: Dict[str, float] = {}
+
+    def __getstate__(self):
+        return {'cache_dir': self.cache_dir, 'max_size': self.max_size}
+
+    def __setstate__(self, state):
+        self.__init__(state['cache_dir'], state['max_size'])
+
+    @staticmethod
+    def make_key(data: bytes, fingerprint: str) -> str:
+        digest = hashlib.sha256(fingerprint.encode('utf-8'))
+        digest.update(data)
+        return digest.hexdigest()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # Демон обращается к кэшу из разных потоков, но всегда под своим замком
+            conn = sqlite3.connect(str(self.cache_dir / self.DB_NAME), timeout=30, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS results ('
+                'key TEXT PRIMARY KEY, payload BLOB NOT NULL, '
+                'size INTEGER NOT NULL, accessed REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)')
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            row = self._connect().execute('SELECT payload FROM results WHERE key = ?', (key,)).fetchone()
+        except sqlite3.Error:
+            return None
+
+        if row is None:
+            return None
+
+        self._pending_touches[key] = time.time()
+        if len(self._pending_touches) >= self.FLUSH_EVERY:
+            self.flush()
+
+        return json.loads(row[0])
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        payload = json.dumps(result, ensure_ascii=False).encode('utf-8')
+        self._pending_puts.append((key, payload, len(payload), time.time()))
+        if len(self._pending_puts) >= self.FLUSH_EVERY:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending_puts and not self._pending_touches:
+            return
+
+        try:
+            conn = self._connect()
+            with conn:
+                conn.execute('BEGIN IMMEDIATE')
+                conn.executemany(
+                    'INSERT OR REPLACE INTO results (key, payload, size, accessed) VALUES (?, ?, ?, ?)',
+                    self._pending_puts
+                )
+                conn.executemany(
+                    'UPDATE results SET accessed = ? WHERE key = ?',
+                    [(accessed, key) for key, accessed in self._pending_touches.items()]
+                )
+                if self._pending_puts:
+                    self._evict(conn)
+        except sqlite3.Error:
+            pass
+
+        self._pending_puts = []
+        self._pending_touches = {}
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total_size = conn.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+        if total_size <= self.max_size:
+            return
+
+        # Вытесняем давно не использованные записи с запасом, чтобы не чистить на каждой записи
+        excess = total_size - int(self.max_size * 0.9)
+        freed = 0
+        stale = []
+        for key, size in conn.execute('SELECT key, size FROM results ORDER BY accessed'):
+            stale.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        conn.executemany('DELETE FROM results WHERE key = ?', stale)
+
+    def clear(self) -> None:
+        self._pending_puts = []
+        self._pending_touches = {}
+        self._connect().execute('DELETE FROM results')
+
+    def close(self) -> None:
+        self.flush()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class MemoryCache:
+    DEFAULT_MAX_ENTRIES = 100_000
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+            return result
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def flush(self) -> None:
+        pass
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def close(self) -> None:
+        pass
@@ -1,13 +1,25 @@
 import argparse
 import json
+import os
+import sqlite3
 import sys
+import time
+from collections import Counter
 from pathlib import Path
-from typing import List
-
-from colorama import init, Fore, Back, Style
-from .core import TaigaAnalyzer
-
-init(autoreset=True)
+from typing import List, Optional
+
+from .archives import ARCHIVE_SUFFIXES, ArchiveReader
+from .cache import MemoryCache, ResultCache
+from .client import DaemonError, config_fingerprint, connect as connect_daemon
+from .git import GitChanges, GitError
+from .limits import ResourceLimits
+from .walker import DEFAULT_PRUNE_DIRS, FileWalker
+from .renderers import (OTHER_SEVERITY_STYLE, SEVERITY_STYLES, Console, CompactRenderer, OutputBuffer, Painter,
+                        ReportRenderer, SummaryRenderer, TextRenderer, color_supported, enable_ansi_console)
+from .report import REPORT_WRITERS, ScanSummary, NDJSONReportWriter, iter_report, open_report_writer
+from .rules import SEVERITIES
+from .shard import ShardFilter, load_manifest, parse_shard, write_manifest
+from .store import ResultStore, StoreError, open_store
 
 TAIGA_ASCII_ART = r"""
 ████████╗ █████╗ ██╗ ██████╗  █████╗ 
@@ -24,23 +36,24 @@ TAIGA_ASCII_ART = r"""
 """
 
 
-def print_colored(text: str, color: str = '', bg_color: str = '',
-                  style: str = '', end: str = '\n') -> None:
-    output = ''
+console: Optional[Console] = None
 
-    if style == 'bright':
-        output += Style.BRIGHT
-    elif style == 'dim':
-        output += Style.DIM
 
+def setup_console(no_color: bool = False) -> Console:
+    global console
+    color = color_supported(sys.stdout, no_color)
     if color:
-        output += getattr(Fore, color.upper(), '')
+        enable_ansi_console()
+    console = Console(OutputBuffer(sys.stdout), Painter(color))
+    return console
 
-    if bg_color:
-        output += getattr(Back, bg_color.upper(), '')
 
-    output += text + Style.RESET_ALL
-    print(output, end=end)
+def print_colored(text: str, color: str = '', bg_color: str = '',
+                  style: str = '', end: str = '\n') -> None:
+    if console is None:
+        setup_console()
+    console.line(text, color, style, bg_color, end)
+    console.out.checkpoint()
 
 
 def print_taiga_header():
@@ -52,115 +65,490 @@ def print_taiga_header():
     for line in lines[3:]:
         print_colored(line, 'blue', style='dim')
 
-    print()
+    print_colored("")
 
 
-def print_report(result: dict, verbose: bool = False) -> None:
+def parse_size(value: str) -> int:
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    value = value.strip().upper().rstrip('B')
+    try:
+        if value and value[-1] in units:
+            return int(float(value[:-1]) * units[value[-1]])
+        return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'некорректный размер: {value}')
 
-    filename = result['filename']
-    findings = result['findings']
-    risk_score = result['risk_score']
 
-    print_colored(f"\n{'=' * 70}", 'blue', style='bright')
-    print_colored(f" Анализ файла: {filename}", 'blue', style='bright')
-    print_colored(f"{'=' * 70}", 'blue', style='bright')
+def shard_type(value: str):
+    try:
+        return parse_shard(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
 
-    if result.get('status') == 'error':
-        print_colored(f" Ошибка синтаксиса: {result.get('error', 'неизвестно')}", 'red', style='bright')
-        return
 
-    if risk_score == 0:
-        risk_color = 'green'
-        risk_icon = '✅'
-        risk_text = "НИЗКИЙ"
-        risk_emoji = "🟢"
-    elif risk_score < 5:
-        risk_color = 'yellow'
-        risk_icon = '⚠️'
-        risk_text = "СРЕДНИЙ"
-        risk_emoji = "🟡"
-    else:
-        risk_color = 'red'
-        risk_icon = '🚨'
-        risk_text = "ВЫСОКИЙ"
-        risk_emoji = "🔴"
-
-    print_colored(f"\n{risk_emoji} Общая оценка риска", risk_color, style='bright')
-    print_colored(f"   Балл: {risk_score}/10", risk_color)
-    print_colored(f"   Уровень: {risk_text} {risk_icon}", risk_color)
-
-    print_colored(f"\n Статистика", 'blue', style='bright')
-    print_colored(f"   Найдено паттернов: {len(findings)}", 'blue')
-
-    severity_counts = {}
-    for finding in findings:
-        sev = finding['severity']
-        severity_counts[sev] = severity_counts.get(sev, 0) + 1
-
-    if severity_counts:
-        print_colored("   Распределение:", 'blue')
-        for severity, count in severity_counts.items():
-            if severity == 'HIGH':
-                color = 'red'
-                icon = '🔴'
-            elif severity == 'MEDIUM':
-                color = 'yellow'
-                icon = '🟡'
-            elif severity == 'LOW':
-                color = 'green'
-                icon = '🟢'
-            else:
-                color = 'white'
-                icon = '⚪'
-
-            print_colored(f"     {icon} {severity}: {count}", color)
-
-    if findings:
-        print_colored(f"\n Обнаруженные паттерны:", 'blue', style='bright')
-
-        for i, finding in enumerate(findings, 1):
-            severity = finding['severity']
-            line = finding['line']
-
-            if severity == 'HIGH':
-                severity_color = 'red'
-                severity_icon = '🚨'
-                box_color = Back.RED + Fore.WHITE + Style.BRIGHT
-            elif severity == 'MEDIUM':
-                severity_color = 'yellow'
-                severity_icon = '⚠️'
-                box_color = Back.YELLOW + Fore.BLACK + Style.BRIGHT
+def load_rules(paths: List[str], cache: Optional[ResultCache]):
+    # Ядро и детекторы тянут numpy, поэтому импортируются только там, где нужен анализ
+    from .detectors.dangerous_calls import DangerousCallsDetector
+    from .rules import RuleIndex
+
+    if not paths:
+        return None
+    return RuleIndex.load(paths, DangerousCallsDetector.default_rules(),
+                          cache_dir=cache.cache_dir if cache else None)
+
+
+def daemon_matches(client, args) -> bool:
+    # Демон анализирует со своими правилами, порогом и кэшем, лимитов на файл у него нет:
+    # при других настройках клиента его результаты не подходят
+    if args.no_cache or args.cache_dir or args.timeout is not None or args.max_bytes is not None \
+            or args.max_nodes is not None or args.max_memory is not None:
+        return False
+    try:
+        config = config_fingerprint(args.rules, args.min_severity, args.prefilter)
+        return client.ping().get('config') == config
+    except (OSError, DaemonError):
+        return False
+
+
+def create_analyzer(args, cache: Optional[ResultCache], archives: Optional[ArchiveReader]):
+    from .core import TaigaAnalyzer
+
+    rules = load_rules(args.rules, cache)
+    profile = bool(args.profile or args.profile_json or args.profile_trace)
+    limits = ResourceLimits(timeout=args.timeout, max_bytes=args.max_bytes, max_nodes=args.max_nodes,
+                            max_memory=args.max_memory)
+    return TaigaAnalyzer(cache=cache, prefilter=args.prefilter, rules=rules, profile=profile,
+                         archives=archives, min_severity=args.min_severity, limits=limits,
+                         project=bool(args.project_index))
+
+
+def serve_main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog='taiga serve',
+        description='Демон анализа: держит детекторы и кэш результатов в памяти и отвечает через Unix-сокет',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Примеры использования:
+  taiga serve -j 4 &                # Запустить демон
+  taiga --connect changed.py        # Анализ через демон
+  taiga serve --status              # Статистика демона
+  taiga serve --stop                # Остановить демон
+        """
+    )
+
+    parser.add_argument('--socket', metavar='PATH', help='Путь к Unix-сокету демона')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='Количество процессов для больших пакетов файлов (по умолчанию: число ядер CPU)')
+    parser.add_argument('--memory-entries', type=int, default=MemoryCache.DEFAULT_MAX_ENTRIES, metavar='N',
+                        help=f'Размер кэша результатов в памяти (по умолчанию: {MemoryCache.DEFAULT_MAX_ENTRIES})')
+    parser.add_argument('--no-cache', action='store_true', help='Не использовать кэш результатов на диске')
+    parser.add_argument('--cache-dir', help='Директория кэша результатов (по умолчанию: ~/.cache/taiga)')
+    parser.add_argument('--prefilter', action='store_true',
+                        help='Пропускать без разбора AST файлы без опасных имен и длинных строк')
+    parser.add_argument('--rules', action='append', default=[], metavar='PACK',
+                        help='Дополнительный пакет правил опасных вызовов, можно указать несколько раз')
+    parser.add_argument('--min-severity', choices=list(SEVERITIES), default='LOW',
+                        help='Минимальный уровень серьезности находок (по умолчанию: LOW)')
+    parser.add_argument('--status', action='store_true', help='Показать статистику запущенного демона')
+    parser.add_argument('--stop', action='store_true', help='Остановить запущенный демон')
+
+    args = parser.parse_args(argv)
+
+    if args.status or args.stop:
+        client = connect_daemon(args.socket)
+        if client is None:
+            print_colored(" Демон не запущен", 'red')
+            return 1
+        with client:
+            if args.stop:
+                client.request({'command': 'shutdown'})
+                print_colored(" Демон остановлен", 'green')
             else:
-                severity_color = 'green'
-                severity_icon = 'ℹ️'
-                box_color = Back.GREEN + Fore.BLACK + Style.BRIGHT
+                status = client.request({'command': 'stats'})
+                print_colored(f" Время работы: {status['uptime']} с", 'cyan')
+                print_colored(f" Записей в кэше: {status['memory_entries']}", 'cyan')
+                for key, value in sorted(status['stats'].items()):
+                    print_colored(f" {key}: {value}", 'cyan')
+        return 0
+
+    # Импорт здесь, чтобы не тянуть ядро в клиентские вызовы
+    from .server import serve
+
+    cache = None if args.no_cache else ResultCache(args.cache_dir)
+    try:
+        rules = load_rules(args.rules, cache)
+        config = config_fingerprint(args.rules, args.min_severity, args.prefilter)
+    except (OSError, ValueError) as e:
+        print_colored(f" Ошибка загрузки правил: {e}", 'red')
+        return 1
 
-            print_colored(f"\n{i:>3}. ", end='')
-            print(box_color + f" {severity} " + Style.RESET_ALL + " ", end='')
-            print_colored(f"{severity_icon} {finding['description']}", severity_color)
+    console.flush()
+    try:
+        serve(args.socket, jobs=args.jobs, memory_entries=args.memory_entries, config=config,
+              cache=cache, prefilter=args.prefilter, rules=rules, min_severity=args.min_severity)
+    except (OSError, RuntimeError) as e:
+        print_colored(f" Не удалось запустить демон: {e}", 'red')
+        return 1
+    return 0
 
-            location_info = f"    Строка {line}"
-            if finding.get('col'):
-                location_info += f", столбец {finding['col']}"
-            print_colored(location_info, 'white', style='dim')
 
-            if finding.get('detector'):
-                print_colored(f"    Детектор: {finding['detector']}", 'cyan', style='dim')
+def watch_main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog='taiga watch',
+        description='Наблюдение за директорией: повторный анализ только измененных файлов',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Примеры использования:
+  taiga watch .                            # inotify, без него - опрос
+  taiga watch uploads/ --index idx.json    # Сохранять индекс между запусками
+  taiga watch . --poll --interval 5        # Только опрос раз в 5 секунд
+        """
+    )
+
+    parser.add_argument('target', help='Директория для наблюдения')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Полный отчет по измененным файлам с находками')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='Количество процессов для первичного анализа (по умолчанию: число ядер CPU)')
+    parser.add_argument('--index', metavar='PATH', help='Файл индекса (mtime, размер, хэш, результат) между запусками')
+    parser.add_argument('--poll', action='store_true', help='Не использовать inotify, искать изменения опросом')
+    parser.add_argument('--interval', type=float, default=1.0, metavar='SEC',
+                        help='Интервал опроса в секундах (по умолчанию: 1)')
+    parser.add_argument('--debounce', type=float, default=0.2, metavar='SEC',
+                        help='Пауза, после которой серия изменений анализируется (по умолчанию: 0.2)')
+    parser.add_argument('--no-cache', action='store_true', help='Не использовать кэш результатов анализа')
+    parser.add_argument('--cache-dir', help='Директория кэша результатов (по умолчанию: ~/.cache/taiga)')
+    parser.add_argument('--prefilter', action='store_true',
+                        help='Пропускать без разбора AST файлы без опасных имен и длинных строк')
+    parser.add_argument('--rules', action='append', default=[], metavar='PACK',
+                        help='Дополнительный пакет правил опасных вызовов, можно указать несколько раз')
+    parser.add_argument('--exclude', action='append', default=[], metavar='GLOB',
+                        help='Исключить пути по шаблону в синтаксисе .gitignore, можно указать несколько раз')
+    parser.add_argument('--no-ignore', action='store_true',
+                        help='Не учитывать .gitignore/.taigaignore и анализировать venv, .git, node_modules и т.п.')
+    parser.add_argument('--max-file-size', type=parse_size, metavar='SIZE',
+                        help='Пропускать файлы больше указанного размера (например, 512K или 2M)')
+
+    args = parser.parse_args(argv)
+
+    from .core import TaigaAnalyzer
+    from .watch import FileIndex, PollingWatcher, WatchSession, create_watcher
+
+    target_path = Path(args.target)
+    if not target_path.is_dir():
+        print_colored(f" Ошибка: {args.target} не является директорией", 'red')
+        return 1
+
+    cache = None if args.no_cache else ResultCache(args.cache_dir)
+    try:
+        rules = load_rules(args.rules, cache)
+    except (OSError, ValueError) as e:
+        print_colored(f" Ошибка загрузки правил: {e}", 'red')
+        return 1
 
-            if verbose and finding.get('pattern'):
-                print_colored(f"    Паттерн: {finding['pattern']}", 'white', style='dim')
+    analyzer = TaigaAnalyzer(cache=cache, prefilter=args.prefilter, rules=rules)
+    walker = FileWalker(
+        target_path,
+        exclude=args.exclude,
+        use_ignore_files=not args.no_ignore,
+        prune_dirs=() if args.no_ignore else DEFAULT_PRUNE_DIRS,
+        max_file_size=args.max_file_size
+    )
 
+    if args.index:
+        index = FileIndex.load(args.index, analyzer.fingerprint())
     else:
-        print_colored(f"\n Отличные новости!", 'green', style='bright')
-        print_colored("    Вредоносных паттернов не обнаружено", 'green')
-        print_colored("    Файл выглядит безопасно", 'green')
+        index = FileIndex(analyzer.fingerprint())
+    session = WatchSession(analyzer, walker, index, jobs=args.jobs)
 
-    print_colored(f"\n{'=' * 70}", 'blue', style='bright')
+    renderer = TextRenderer(console, verbose=args.verbose)
+    print_taiga_header()
+    print_colored(f" Индексация {target_path}...", 'blue')
+
+    # Наблюдение включается до первичного обхода, чтобы не потерять правки во время него
+    watcher = create_watcher(walker, args.interval, args.debounce, polling=args.poll)
+    started = time.perf_counter()
+    try:
+        changes = session.rescan()
+    except OSError as e:
+        print_colored(f" inotify недоступен ({e}), переход на опрос", 'yellow', style='dim')
+        watcher.close()
+        walker.on_directory = None
+        watcher = PollingWatcher(walker, args.interval)
+        changes = session.rescan()
+
+    print_colored(
+        f" Проиндексировано файлов: {len(index)}, проанализировано: {len(changes)} "
+        f"за {time.perf_counter() - started:.2f} с ({watcher.name})", 'blue')
+    renderer.summary(session.summary)
+    console.flush()
+
+    saved = time.monotonic()
+    try:
+        while True:
+            batch = watcher.poll(timeout=args.interval)
+            if batch is None:
+                continue
+
+            started = time.perf_counter()
+            changes = session.apply(batch)
+            if not changes:
+                continue
+
+            print_colored(f"\n[{time.strftime('%H:%M:%S')}] Изменено файлов: {len(changes)} "
+                          f"({time.perf_counter() - started:.2f} с)", 'cyan', style='bright')
+            for change in changes:
+                renderer.change(change)
+            renderer.summary(session.summary)
+            console.flush()
+
+            if args.index and time.monotonic() - saved > 30:
+                index.save(args.index)
+                saved = time.monotonic()
+    except KeyboardInterrupt:
+        print_colored("\nНаблюдение остановлено", 'blue')
+    finally:
+        watcher.close()
+        if args.index:
+            index.save(args.index)
+        if cache is not None:
+            cache.close()
+
+    return 0
+
+
+def merge_main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog='taiga merge',
+        description='Объединение отчетов шардов (--shard K/N) в один отчет и общую сводку',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Примеры использования:
+  taiga merge shard-*.json                    # Общая сводка
+  taiga merge shard-*.ndjson -o report.json   # Объединенный отчет
+        """
+    )
 
+    parser.add_argument('reports', nargs='+', help='Отчеты JSON или NDJSON')
+    parser.add_argument('-o', '--output', help='Сохранить объединенный отчет (.ndjson/.jsonl - построчный NDJSON)')
+    parser.add_argument('--format', choices=['text', 'compact'], default='text',
+                        help='text - сводка, compact - еще и строка на каждый файл (по умолчанию: text)')
+
+    args = parser.parse_args(argv)
 
-def main():
     print_taiga_header()
 
+    summary = ScanSummary()
+    exit_code = 0
+    # Хранятся только имена файлов: один и тот же файл из двух шардов считается один раз
+    seen = set()
+    try:
+        writer = open_report_writer(args.output) if args.output else None
+    except (OSError, StoreError, sqlite3.Error) as e:
+        print_colored(f" Ошибка записи отчета: {e}", 'red')
+        return 1
+
+    try:
+        for report in args.reports:
+            count = 0
+            for result in iter_report(report):
+                count += 1
+                filename = result.get('filename', '')
+                if filename in seen:
+                    summary.counters['duplicates'] += 1
+                    continue
+                seen.add(filename)
+
+                summary.add(result)
+                if writer:
+                    writer.write(result)
+
+                findings = result.get('findings', [])
+                if any(f.get('severity') in ['HIGH', 'CRITICAL'] for f in findings):
+                    exit_code = 1
+
+                if args.format == 'compact':
+                    risk_score = result.get('risk_score', 0.0)
+                    icon = "✅" if not findings else "⚠️" if risk_score < 5 else "🚨"
+                    print_colored(
+                        f"   {icon} {filename}: {len(findings)} паттернов, риск: {risk_score}/10",
+                        'green' if not findings else 'yellow' if risk_score < 5 else 'red')
+
+            print_colored(f" {report}: {count} результатов", 'blue')
+    except (OSError, ValueError) as e:
+        print_colored(f" Ошибка чтения отчета: {e}", 'red')
+        return 1
+    finally:
+        if writer:
+            writer.close()
+
+    TextRenderer(console).summary(summary)
+
+    if args.output:
+        print_colored(f"\nОтчет сохранен в {args.output}", 'green', style='bright')
+
+    if exit_code == 0:
+        print_colored("Анализ завершен успешно!", 'green', style='bright')
+    else:
+        print_colored("Обнаружены критические угрозы!", 'red', style='bright')
+
+    return exit_code
+
+
+def manifest_main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog='taiga manifest',
+        description='Манифест размеров файлов для балансировки --shard K/N по объему, а не по числу файлов',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Примеры использования:
+  taiga manifest . -o sizes.json
+  taiga . --shard 2/8 --shard-manifest sizes.json
+        """
+    )
+
+    parser.add_argument('target', help='Директория, которая будет разбиваться на шарды')
+    parser.add_argument('-o', '--output', required=True, help='Файл манифеста (JSON: путь -> размер)')
+    parser.add_argument('--exclude', action='append', default=[], metavar='GLOB',
+                        help='Исключить пути по шаблону в синтаксисе .gitignore, можно указать несколько раз')
+    parser.add_argument('--no-ignore', action='store_true',
+                        help='Не учитывать .gitignore/.taigaignore и анализировать venv, .git, node_modules и т.п.')
+    parser.add_argument('--max-file-size', type=parse_size, metavar='SIZE',
+                        help='Пропускать файлы больше указанного размера (например, 512K или 2M)')
+
+    args = parser.parse_args(argv)
+
+    target_path = Path(args.target)
+    if not target_path.is_dir():
+        print_colored(f" Ошибка: {args.target} не является директорией", 'red')
+        return 1
+
+    walker = FileWalker(
+        target_path,
+        exclude=args.exclude,
+        use_ignore_files=not args.no_ignore,
+        prune_dirs=() if args.no_ignore else DEFAULT_PRUNE_DIRS,
+        max_file_size=args.max_file_size
+    )
+    try:
+        count = write_manifest(walker, walker.root, args.output)
+    except OSError as e:
+        print_colored(f" Не удалось сохранить манифест: {e}", 'red')
+        return 1
+
+    print_colored(f" Манифест: {count} файлов, сохранен в {args.output}", 'green')
+    return 0
+
+
+def query_main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog='taiga query',
+        description='Поиск находок в базе результатов (taiga . -o results.db) без загрузки отчета',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Примеры использования:
+  taiga query results.db --pattern pickle.loads --min-severity HIGH
+  taiga query results.db --detector ObfuscationDetector --path 'src/*'
+  taiga query results.db --run all --count --group-by run   # Тренд по запускам
+  taiga query results.db --runs                             # Список запусков
+        """
+    )
+
+    parser.add_argument('database', help='База результатов (.db/.sqlite)')
+    parser.add_argument('--run', default='last',
+                        help='Номер запуска, метка (--run-label), last или all (по умолчанию: last)')
+    parser.add_argument('--runs', action='store_true', help='Показать запуски в базе и выйти')
+    parser.add_argument('--detector', action='append', default=[], help='Детектор, можно указать несколько раз')
+    parser.add_argument('--severity', action='append', default=[], choices=list(SEVERITIES),
+                        help='Точный уровень серьезности, можно указать несколько раз')
+    parser.add_argument('--min-severity', choices=list(SEVERITIES), help='Минимальный уровень серьезности')
+    parser.add_argument('--pattern', action='append', default=[], metavar='PATTERN',
+                        help='Паттерн находки (например, pickle.loads), допускаются * ? [...]')
+    parser.add_argument('--path', action='append', default=[], metavar='GLOB',
+                        help='Шаблон пути файла (* совпадает и с /), можно указать несколько раз')
+    parser.add_argument('--count', action='store_true', help='Вывести только число находок')
+    parser.add_argument('--group-by', choices=list(ResultStore.GROUPS), help='С --count: число находок по группам')
+    parser.add_argument('--limit', type=int, help='Не больше указанного числа строк')
+    parser.add_argument('--format', choices=['text', 'ndjson'], default='text',
+                        help='ndjson - по строке JSON на находку (по умолчанию: text)')
+
+    args = parser.parse_args(argv)
+
+    try:
+        store = open_store(args.database)
+    except StoreError as e:
+        print_colored(f" Ошибка: {e}", 'red')
+        return 1
+
+    try:
+        if args.runs:
+            for run in store.runs():
+                started = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(run['started']))
+                label = f" [{run['label']}]" if run['label'] else ''
+                state = '' if run['finished'] else ', не завершен'
+                print_colored(f" #{run['id']}{label} {started}: {run['files']} файлов, "
+                              f"{run['findings']} находок{state}", 'blue')
+            return 0
+
+        runs = store.resolve_runs(args.run)
+        if runs == []:
+            print_colored(f" Ошибка: запуск {args.run} не найден", 'red')
+            return 1
+
+        filters = dict(runs=runs, detectors=args.detector, severities=args.severity,
+                       min_severity=args.min_severity, patterns=args.pattern, paths=args.path)
+
+        if args.count or args.group_by:
+            for key, count in store.count(args.group_by, limit=args.limit, **filters):
+                if args.format == 'ndjson':
+                    row = {args.group_by: key, 'findings': count} if args.group_by else {'findings': count}
+                    console.out.write(json.dumps(row, ensure_ascii=False) + '\n')
+                else:
+                    print_colored(f"{key}: {count}" if args.group_by else str(count))
+            return 0
+
+        for finding in store.query(limit=args.limit, **filters):
+            if args.format == 'ndjson':
+                console.out.write(json.dumps(finding, ensure_ascii=False) + '\n')
+                continue
+            color = SEVERITY_STYLES.get(finding['severity'], OTHER_SEVERITY_STYLE)[0]
+            run_prefix = f"#{finding['run']} " if runs is None or len(runs) > 1 else ''
+            print_colored(f"{run_prefix}{finding['filename']}:{finding['line']}:{finding['col']} "
+                          f"{finding['severity']} {finding['detector']}: {finding['description']} "
+                          f"({finding['pattern']})", color)
+    except sqlite3.Error as e:
+        print_colored(f" Ошибка чтения базы: {e}", 'red')
+        return 1
+    finally:
+        store.close()
+
+    return 0
+
+
+SUBCOMMANDS = {
+    'serve': serve_main,
+    'watch': watch_main,
+    'merge': merge_main,
+    'manifest': manifest_main,
+    'query': query_main,
+}
+
+
+def main(argv: Optional[List[str]] = None):
+    argv = sys.argv[1:] if argv is None else argv
+    subcommand = SUBCOMMANDS.get(argv[0], scan_main) if argv else scan_main
+    if subcommand is not scan_main:
+        argv = argv[1:]
+        setup_console()
+
+    try:
+        return subcommand(argv)
+    finally:
+        if console is not None:
+            console.flush()
+
+
+def scan_main(argv: List[str]) -> int:
+
     parser = argparse.ArgumentParser(
         description='Тайга - статический анализатор Python-кода на вредоносные паттерны',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -169,6 +557,23 @@ def main():
   taiga suspicious.py          # Анализ одного файла
   taiga script.py -v           # Подробный вывод
   taiga . -o report.json       # Анализ всех .py файлов в директории
+  taiga . --jobs 8             # Анализ директории в 8 процессов
+  taiga . -o report.ndjson     # Потоковый отчет, по строке JSON на файл
+  taiga . --min-severity HIGH --fail-fast  # Гейт CI: остановиться на первой серьезной находке
+  taiga . --rules intel.json   # Дополнительные правила опасных вызовов
+  taiga . --exclude 'tests/'   # Исключить каталог tests
+  taiga . --profile            # Где тратится время анализа
+  taiga pkg-1.0-py3-none-any.whl  # Анализ wheel/sdist/zip/tar без распаковки на диск
+  taiga wheels/ --archives     # Анализировать и архивы внутри директории
+  taiga --git-range origin/main..HEAD  # Только файлы, измененные в ветке
+  taiga --staged               # Только проиндексированные изменения (pre-commit)
+  taiga serve &                # Демон анализа с кэшем в памяти
+  taiga --connect file.py      # Анализ через демон (без него - как обычно)
+  taiga watch .                # Повторный анализ только измененных файлов
+  taiga . --shard 2/4 -o s2.json  # Вторая четверть файлов (CI), затем taiga merge s*.json
+  taiga . --format sarif -o taiga.sarif  # SARIF для code scanning
+  taiga . -o results.db        # Запуск в базу результатов, затем taiga query results.db
+  taiga . --timeout 10 --max-nodes 500000  # Лимиты на файл для недоверенного кода
   taiga file.py --no-color     # Без цветного вывода
 
 Доступные цвета: BLACK, RED, GREEN, YELLOW, BLUE, MAGENTA, CYAN, WHITE
@@ -177,7 +582,8 @@ def main():
 
     parser.add_argument(
         'target',
-        help='Путь к файлу .py или директории для анализа'
+        nargs='?',
+        help='Путь к файлу .py, архиву или директории для анализа (с --git-range/--staged по умолчанию .)'
     )
 
     parser.add_argument(
@@ -188,7 +594,13 @@ def main():
 
     parser.add_argument(
         '-o', '--output',
-        help='Сохранить отчет в JSON файл'
+        help='Сохранить отчет в JSON файл (.ndjson/.jsonl - построчный NDJSON, .db - база для taiga query)'
+    )
+
+    parser.add_argument(
+        '--run-label',
+        metavar='LABEL',
+        help='Метка запуска в базе -o results.db (например, коммит) для выбора запуска в taiga query'
     )
 
     parser.add_argument(
@@ -204,104 +616,440 @@ def main():
         help='Минимальный уровень серьезности для отображения (по умолчанию: LOW)'
     )
 
+    parser.add_argument(
+        '--fail-fast',
+        action='store_true',
+        help='Остановить анализ и выйти с кодом 1 при первой находке HIGH/CRITICAL'
+    )
+
     parser.add_argument(
         '--format',
-        choices=['text', 'json', 'compact'],
+        choices=['text', 'json', 'compact', 'ndjson', 'sarif'],
         default='text',
-        help='Формат вывода (по умолчанию: text)'
+        help='Формат вывода; json, ndjson и sarif без -o пишутся в stdout (по умолчанию: text)'
     )
 
-    args = parser.parse_args()
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=os.cpu_count() or 1,
+        help='Количество процессов для анализа директории (по умолчанию: число ядер CPU)'
+    )
+
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Не использовать кэш результатов анализа'
+    )
 
-    if args.no_color:
-        global Fore, Back, Style
-        Fore = type('Fore', (), {k: '' for k in dir(Fore) if not k.startswith('_')})()
-        Back = type('Back', (), {k: '' for k in dir(Back) if not k.startswith('_')})()
-        Style = type('Style', (), {k: '' for k in dir(Style) if not k.startswith('_')})()
+    parser.add_argument(
+        '--cache-dir',
+        help='Директория кэша результатов (по умолчанию: ~/.cache/taiga)'
+    )
 
-    analyzer = TaigaAnalyzer()
-    target_path = Path(args.target)
+    parser.add_argument(
+        '--prefilter',
+        action='store_true',
+        help='Пропускать без разбора AST файлы без опасных имен и длинных строк'
+    )
 
-    all_results = []
+    parser.add_argument(
+        '--rules',
+        action='append',
+        default=[],
+        metavar='PACK',
+        help='Дополнительный пакет правил опасных вызовов (JSON или TOML), можно указать несколько раз'
+    )
+
+    parser.add_argument(
+        '--exclude',
+        action='append',
+        default=[],
+        metavar='GLOB',
+        help='Исключить пути по шаблону в синтаксисе .gitignore, можно указать несколько раз'
+    )
+
+    parser.add_argument(
+        '--no-ignore',
+        action='store_true',
+        help='Не учитывать .gitignore/.taigaignore и анализировать venv, .git, node_modules и т.п.'
+    )
 
-    if target_path.is_file() and target_path.suffix == '.py':
+    parser.add_argument(
+        '--max-file-size',
+        type=parse_size,
+        metavar='SIZE',
+        help='Пропускать файлы больше указанного размера (например, 512K или 2M)'
+    )
+
+    parser.add_argument(
+        '--timeout',
+        type=float,
+        metavar='SEC',
+        help='Лимит времени на файл; зависший процесс анализа убивается, файл получает статус timeout'
+    )
+
+    parser.add_argument(
+        '--max-bytes',
+        type=parse_size,
+        metavar='SIZE',
+        help='Не анализировать файлы больше указанного размера, в отчете - статус too_large'
+    )
+
+    parser.add_argument(
+        '--max-nodes',
+        type=int,
+        metavar='N',
+        help='Не анализировать файлы, в AST которых больше N узлов (статус too_large)'
+    )
+
+    parser.add_argument(
+        '--max-memory',
+        type=parse_size,
+        metavar='SIZE',
+        help='Лимит памяти процесса анализа сверх базовой (RLIMIT_AS), например 512M'
+    )
+
+    git_mode = parser.add_mutually_exclusive_group()
+
+    git_mode.add_argument(
+        '--git-range',
+        metavar='RANGE',
+        help='Анализировать только .py файлы, измененные в диапазоне коммитов (например, origin/main..HEAD)'
+    )
+
+    git_mode.add_argument(
+        '--staged',
+        action='store_true',
+        help='Анализировать только проиндексированные (git add) изменения'
+    )
+
+    parser.add_argument(
+        '--shard',
+        type=shard_type,
+        metavar='K/N',
+        help='Анализировать только K-ю из N частей файлов; разбиение одинаково на всех узлах CI'
+    )
+
+    parser.add_argument(
+        '--shard-manifest',
+        metavar='PATH',
+        help='Манифест размеров (taiga manifest) для балансировки шардов по объему'
+    )
+
+    parser.add_argument(
+        '--archives',
+        action='store_true',
+        help='Анализировать .py файлы внутри архивов (.whl, .zip, .tar.gz и т.п.) при обходе директории'
+    )
+
+    parser.add_argument(
+        '--archive-depth',
+        type=int,
+        default=ArchiveReader.MAX_DEPTH,
+        metavar='N',
+        help=f'Глубина вложенности архивов (по умолчанию: {ArchiveReader.MAX_DEPTH})'
+    )
+
+    parser.add_argument(
+        '--archive-max-size',
+        type=parse_size,
+        default=ArchiveReader.MAX_MEMBER_SIZE,
+        metavar='SIZE',
+        help='Максимальный размер распакованного файла в архиве (по умолчанию: 16M)'
+    )
+
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Показать профиль: время фаз и детекторов, самые медленные файлы'
+    )
+
+    parser.add_argument(
+        '--profile-json',
+        metavar='PATH',
+        help='Сохранить профиль в JSON'
+    )
+
+    parser.add_argument(
+        '--profile-trace',
+        metavar='PATH',
+        help='Сохранить трассировку в формате Chrome trace event (chrome://tracing, Perfetto)'
+    )
+
+    parser.add_argument(
+        '--project-index',
+        metavar='PATH',
+        help='Индекс импортов и вызовов проекта (SQLite): находит косвенные вызовы опасных функций '
+             'через функции других модулей; обновляется только по изменившимся файлам'
+    )
+
+    parser.add_argument(
+        '--connect',
+        action='store_true',
+        help='Отправить файлы демону taiga serve; если он не запущен, анализировать здесь'
+    )
+
+    parser.add_argument(
+        '--socket',
+        metavar='PATH',
+        help='Путь к Unix-сокету демона для --connect'
+    )
+
+    args = parser.parse_args(argv)
+
+    git_mode = bool(args.git_range or args.staged)
+    if args.target is None:
+        if not git_mode:
+            parser.error('не указан путь для анализа')
+        args.target = '.'
+
+    setup_console(args.no_color)
+
+    # Машиночитаемый формат без файла отчета пишется в stdout, поэтому остальной вывод отключаем
+    stream_stdout = args.format in REPORT_WRITERS and not args.output
+
+    client = connect_daemon(args.socket) if args.connect else None
+
+    target_path = Path(args.target)
+    archive_target = target_path.is_file() and ArchiveReader.is_archive(target_path)
+    archives = None
+    if args.archives or archive_target:
+        archives = ArchiveReader(max_depth=args.archive_depth, max_member_size=args.archive_max_size)
+    # Демон не распаковывает архивы, не читает git и не строит индекс проекта,
+    # такой анализ всегда идет в текущем процессе
+    if client is not None and (archives is not None or git_mode or args.project_index
+                               or not daemon_matches(client, args)):
+        client.close()
+        client = None
+
+    cache = None
+    analyzer = None
+    profiler = None
+    if client is None:
+        cache = None if args.no_cache else ResultCache(args.cache_dir)
+        try:
+            analyzer = create_analyzer(args, cache, archives)
+        except (OSError, ValueError) as e:
+            print_colored(f" Ошибка загрузки правил: {e}", 'red')
+            return 1
+        profiler = analyzer.profiler
+
+    # Клиент демона вызывается из хуков на каждый файл, заставка там только мешает
+    if not stream_stdout and client is None:
+        print_taiga_header()
+        if args.connect:
+            print_colored(" Демон не запущен или работает с другими настройками, анализ в текущем процессе",
+                          'yellow', style='dim')
+
+    shard = None
+    if args.shard:
+        try:
+            manifest = load_manifest(args.shard_manifest) if args.shard_manifest else None
+        except (OSError, ValueError) as e:
+            print_colored(f" Ошибка загрузки манифеста: {e}", 'red')
+            return 1
+        # Пути шардируются относительно цели, как их видят и обход, и git diff --relative
+        shard_root = args.target if target_path.is_dir() and not git_mode else '.'
+        shard = ShardFilter(*args.shard, root=shard_root, manifest=manifest)
+
+    walker = None
+    git_changes = None
+    if git_mode:
+        if not target_path.is_dir():
+            print_colored(f" Ошибка: {args.target} не является директорией", 'red')
+            return 1
+        git_changes = GitChanges(str(target_path), args.git_range, args.staged, exclude=args.exclude)
+        try:
+            changed_paths = git_changes.changed_paths()
+            tracked = git_changes.tracked_count()
+        except GitError as e:
+            print_colored(f" Ошибка git: {e}", 'red')
+            return 1
+        if shard is not None:
+            changed_paths = list(shard.filter(changed_paths))
+        files_to_analyze = git_changes.sources(changed_paths)
+    elif target_path.is_file() and (target_path.suffix == '.py' or archive_target):
         files_to_analyze = [target_path]
     elif target_path.is_dir():
-        files_to_analyze = list(target_path.rglob('*.py'))
-        if not files_to_analyze:
-            print_colored(" Не найдено .py файлов для анализа", 'red')
-            return 1
-        print_colored(f" Найдено {len(files_to_analyze)} Python файлов для анализа...", 'blue')
+        walker = FileWalker(
+            target_path,
+            exclude=args.exclude,
+            use_ignore_files=not args.no_ignore,
+            prune_dirs=() if args.no_ignore else DEFAULT_PRUNE_DIRS,
+            max_file_size=args.max_file_size,
+            suffixes=('.py',) + ARCHIVE_SUFFIXES if args.archives else ('.py',)
+        )
+        files_to_analyze = walker
+        if not stream_stdout and client is None:
+            print_colored(f" Поиск Python файлов в {target_path}...", 'blue')
     else:
-        print_colored(f" Ошибка: {args.target} не является .py файлом или директорией", 'red')
+        print_colored(f" Ошибка: {args.target} не является .py файлом, архивом или директорией", 'red')
         return 1
 
+    if shard is not None and not git_mode:
+        files_to_analyze = shard.filter(files_to_analyze)
+
     severity_order = {'LOW': 1, 'MEDIUM': 2, 'HIGH': 3, 'CRITICAL': 4}
     min_severity_level = severity_order.get(args.min_severity, 1)
 
-    for i, file_path in enumerate(files_to_analyze, 1):
-        if len(files_to_analyze) > 1:
-            print_colored(f"\n[{i}/{len(files_to_analyze)}] Анализ: {file_path}", 'cyan', style='bright')
-
-        result = analyzer.analyze_file(str(file_path))
-
-        if args.min_severity != 'LOW':
-            filtered_findings = [
-                f for f in result.get('findings', [])
-                if severity_order.get(f.get('severity', 'LOW'), 1) >= min_severity_level
-            ]
-            result['findings'] = filtered_findings
-
-        all_results.append(result)
-
-        if args.format == 'compact' and len(files_to_analyze) > 1:
-            icon = "✅" if not result['findings'] else "⚠️" if result['risk_score'] < 5 else "🚨"
-            print_colored(
-                f"   {icon} {file_path.name}: {len(result['findings'])} паттернов, риск: {result['risk_score']}/10",
-                'green' if not result['findings'] else 'yellow' if result['risk_score'] < 5 else 'red')
-        elif args.format == 'text':
-            if len(files_to_analyze) == 1 or (len(files_to_analyze) > 1 and result['findings']):
-                print_report(result, args.verbose)
-
-    if len(files_to_analyze) > 1 and args.format != 'compact':
-        print_colored(f"\n{'=' * 70}", 'magenta', style='bright')
-        print_colored(" СВОДКА ПО ВСЕМ ФАЙЛАМ", 'magenta', style='bright')
-        print_colored(f"{'=' * 70}", 'magenta', style='bright')
-
-        total_findings = sum(len(r['findings']) for r in all_results)
-        total_risk = sum(r['risk_score'] for r in all_results)
-        avg_risk = total_risk / len(all_results) if all_results else 0
-
-        files_with_findings = sum(1 for r in all_results if r['findings'])
-
-        print_colored(f" Проанализировано файлов: {len(all_results)}", 'cyan')
-        print_colored(f" Всего паттернов: {total_findings}", 'cyan')
-        print_colored(f" Файлов с находками: {files_with_findings}", 'cyan')
-        print_colored(f" Средний балл риска: {avg_risk:.1f}/10", 'cyan')
-
-        if files_with_findings > 0:
-            print_colored(f"\n Файлы с наибольшим риском:", 'red', style='bright')
-            risky_files = sorted(all_results, key=lambda x: x['risk_score'], reverse=True)[:3]
-            for r in risky_files:
-                if r['risk_score'] > 0:
-                    risk_color = 'red' if r['risk_score'] >= 5 else 'yellow'
-                    print_colored(
-                        f"   • {Path(r['filename']).name}: {r['risk_score']}/10 ({len(r['findings'])} паттернов)",
-                        risk_color)
+    summary = ScanSummary()
+    exit_code = 0
 
-    if args.output:
-        with open(args.output, 'w', encoding='utf-8') as f:
-            json.dump(all_results, f, ensure_ascii=False, indent=2)
-        print_colored(f"\nОтчет сохранен в {args.output}", 'green', style='bright')
+    multiple = walker is not None or archive_target or git_mode
 
-    exit_code = 0
-    for result in all_results:
-        for finding in result.get('findings', []):
-            if finding['severity'] in ['HIGH', 'CRITICAL']:
+    writer = None
+    if stream_stdout:
+        if args.format == 'ndjson':
+            stdout_writer = NDJSONReportWriter(console.out, line_buffered=console.out.interactive)
+        else:
+            stdout_writer = REPORT_WRITERS[args.format](console.out)
+        renderer = ReportRenderer(console, stdout_writer)
+    else:
+        if args.output:
+            try:
+                writer = open_report_writer(args.output, args.format, label=args.run_label)
+            except (OSError, StoreError, sqlite3.Error) as e:
+                print_colored(f" Ошибка записи отчета: {e}", 'red')
+                if client is not None:
+                    client.close()
+                if cache is not None:
+                    cache.close()
+                return 1
+        renderer_class = {'text': TextRenderer, 'compact': CompactRenderer}.get(args.format, SummaryRenderer)
+        renderer = renderer_class(console, verbose=args.verbose, multiple=multiple)
+    started = time.perf_counter()
+    stats = Counter()
+    stopped = False
+
+    try:
+        results = None
+        if client is not None:
+            # Список нужен, чтобы после ошибки демона проанализировать те же файлы здесь
+            files_to_analyze = list(files_to_analyze)
+            with client:
+                try:
+                    results, daemon_stats = client.analyze(files_to_analyze)
+                    stats.update(daemon_stats)
+                    stats['cache_hits'] += stats.pop('memory_hits', 0)
+                except DaemonError as e:
+                    if not stream_stdout:
+                        print_colored(f" Ошибка демона: {e}, анализ в текущем процессе", 'yellow')
+                    cache = None if args.no_cache else ResultCache(args.cache_dir)
+                    try:
+                        analyzer = create_analyzer(args, cache, archives)
+                    except (OSError, ValueError) as e:
+                        print_colored(f" Ошибка загрузки правил: {e}", 'red')
+                        return 1
+                    profiler = analyzer.profiler
+
+        if git_changes is not None:
+            results = analyzer.analyze_sources(files_to_analyze, jobs=args.jobs)
+        elif results is None:
+            results = analyzer.iter_analyze(files_to_analyze, jobs=args.jobs)
+
+        if args.project_index:
+            from .project import ProjectIndex
+
+            project = ProjectIndex(args.project_index, root=args.target if walker is not None else '.')
+            try:
+                project.load()
+            except (sqlite3.Error, ValueError) as e:
+                print_colored(f" Ошибка индекса проекта: {e}", 'red')
+                return 1
+            # Модули, которых нет на диске, удаляются только после обхода всей директории
+            results = analyzer.link_project(results, project, prune=walker is not None and shard is None)
+
+        for i, result in enumerate(results, 1):
+            # Локальный анализ уже не создает находок ниже порога, но демон работает без него
+            if args.min_severity != 'LOW':
+                filtered_findings = [
+                    f for f in result.get('findings', [])
+                    if severity_order.get(f.get('severity', 'LOW'), 1) >= min_severity_level
+                ]
+                result['findings'] = filtered_findings
+
+            summary.add(result)
+            if writer:
+                writer.write(result)
+
+            if any(f['severity'] in ['HIGH', 'CRITICAL'] for f in result['findings']):
                 exit_code = 1
+
+            render_started = time.perf_counter_ns() if profiler else 0
+            renderer.result(i, result)
+            if profiler:
+                profiler.add_phase('render', render_started, time.perf_counter_ns(), result['filename'])
+
+            if exit_code and args.fail_fast:
+                stopped = True
                 break
-        if exit_code == 1:
-            break
+        if stopped and hasattr(results, 'close'):
+            # Генератор закрывается сразу, а не при сборке мусора: пул отменяет задания из очереди
+            results.close()
+    except GitError as e:
+        print_colored(f" Ошибка git: {e}", 'red')
+        return 1
+    finally:
+        if writer:
+            writer.close()
+        renderer.close()
+        if cache is not None:
+            cache.close()
+
+    summary.counters.update(analyzer.stats if analyzer is not None else stats)
+    if shard is not None:
+        summary.counters['shard_skipped'] = shard.skipped
+    if walker is not None:
+        summary.counters.update(walker.skipped)
+        summary.timings['walk'] = walker.elapsed
+        summary.timings['analysis'] = time.perf_counter() - started - walker.elapsed
+    elif git_changes is not None:
+        summary.timings.update(git_changes.timings)
+        analysis = time.perf_counter() - started - git_changes.timings['git_read']
+        summary.timings['analysis'] = analysis
+        summary.counters['git_tracked'] = tracked
+        if summary.files:
+            per_file = (analysis + git_changes.timings['git_read']) / summary.files
+            summary.timings['full_scan_estimate'] = per_file * tracked
+
+    if shard is not None and summary.files == 0:
+        # При большом N шард может остаться пустым, для CI это не ошибка
+        if not stream_stdout:
+            print_colored(f" В шарде {args.shard[0]}/{args.shard[1]} нет файлов", 'green')
+        return 0
+
+    if git_mode and summary.files == 0:
+        if not stream_stdout:
+            print_colored(" Нет измененных .py файлов", 'green')
+        return 0
+
+    if multiple and summary.files == 0:
+        print_colored(" Не найдено .py файлов для анализа", 'red')
+        return 1
+
+    if stream_stdout:
+        return exit_code
+
+    if stopped:
+        print_colored(f"\n Анализ остановлен на первой находке HIGH/CRITICAL (--fail-fast), "
+                      f"проверено файлов: {summary.files}", 'red', style='bright')
+
+    if multiple:
+        renderer.summary(summary)
+
+    if args.output:
+        print_colored(f"\nОтчет сохранен в {args.output}", 'green', style='bright')
+
+    if profiler:
+        if args.profile:
+            TextRenderer(console).profile(profiler)
+        if args.profile_json:
+            profiler.write_json(args.profile_json)
+            print_colored(f"Профиль сохранен в {args.profile_json}", 'green')
+        if args.profile_trace:
+            profiler.write_trace(args.profile_trace)
+            print_colored(f"Трассировка сохранена в {args.profile_trace}", 'green')
 
     if exit_code == 0:
         print_colored("Анализ завершен успешно!", 'green', style='bright')
@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import socket
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from . import __version__
+
+# Модуль импортируется из cli до ядра анализа, поэтому здесь только стандартная библиотека
+
+
+def default_socket_path() -> Path:
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir:
+        return Path(runtime_dir) / 'taiga.sock'
+    uid = os.getuid() if hasattr(os, 'getuid') else 0
+    return Path(tempfile.gettempdir()) / f'taiga-{uid}.sock'
+
+
+class DaemonError(Exception):
+    pass
+
+
+def config_fingerprint(rule_packs: Sequence[str] = (), min_severity: str = 'LOW', prefilter: bool = False) -> str:
+    # Настройки, от которых зависят результаты демона. Считается без ядра и детекторов:
+    # версия определяет детекторы и встроенные правила, пакеты правил учитываются по содержимому
+    digest = hashlib.sha256(json.dumps({
+        'version': __version__,
+        'min_severity': min_severity,
+        'prefilter': bool(prefilter),
+        'packs': len(rule_packs)
+    }, sort_keys=True).encode('utf-8'))
+    for path in rule_packs:
+        with open(path, 'rb') as f:
+            digest.update(b'\0' + hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+
+class DaemonClient:
+    def __init__(self, socket_path: Optional[str] = None, timeout: Optional[float] = None):
+        self.socket_path = Path(socket_path) if socket_path else default_socket_path()
+        self.timeout = timeout
+        self._sock = None
+        self._reader = None
+
+    def connect(self) -> bool:
+        if not hasattr(socket, 'AF_UNIX'):
+            return False
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(str(self.socket_path))
+        except OSError:
+            sock.close()
+            return False
+        self._sock = sock
+        self._reader = sock.makefile('rb')
+        return True
+
+    def request(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        if self._sock is None:
+            raise DaemonError('нет соединения с демоном')
+
+        try:
+            self._sock.sendall(json.dumps(payload, ensure_ascii=False).encode('utf-8') + b'\n')
+            line = self._reader.readline()
+        except OSError as e:
+            raise DaemonError(f'ошибка обмена с демоном: {e}')
+
+        if not line:
+            raise DaemonError('демон закрыл соединение')
+        if not line.endswith(b'\n'):
+            raise DaemonError('неполный ответ демона')
+
+        try:
+            response = json.loads(line)
+        except ValueError as e:
+            raise DaemonError(f'некорректный ответ демона: {e}')
+        if not isinstance(response, dict):
+            raise DaemonError('некорректный ответ демона')
+        if 'error' in response:
+            raise DaemonError(response['error'])
+        return response
+
+    def ping(self) -> Dict[str, Any]:
+        return self.request({'command': 'ping'})
+
+    def analyze(self, paths: Iterable = (),
+                sources: Iterable[Tuple[str, str]] = ()) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+        sources = list(sources)
+        names = []
+        absolute = []
+        for path in paths:
+            names.append(str(path))
+            # У демона своя рабочая директория
+            absolute.append(os.path.abspath(path))
+
+        response = self.request({
+            'command': 'analyze',
+            'paths': absolute,
+            'sources': [{'name': name, 'source': source} for name, source in sources]
+        })
+
+        results = response.get('results')
+        if not isinstance(results, list) or len(results) != len(names) + len(sources) \
+                or not all(isinstance(result, dict) for result in results):
+            raise DaemonError('некорректный ответ демона')
+        for name, result in zip(names, results):
+            result['filename'] = name
+        return results, response.get('stats', {})
+
+    def close(self) -> None:
+        if self._sock is not None:
+            self._reader.close()
+            self._sock.close()
+            self._sock = None
+            self._reader = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def connect(socket_path: Optional[str] = None, timeout: Optional[float] = None) -> Optional[DaemonClient]:
+    client = DaemonClient(socket_path, timeout)
+    if client.connect():
+        return client
+    return None
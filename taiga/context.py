@@ -0,0 +1,42 @@
+import ast
+from typing import Any, Dict, NamedTuple, Optional
+
+from .facts import FileFacts
+
+
+class Finding(NamedTuple):
+    detector: str
+    severity: str
+    description: str
+    line: int
+    col: int
+    pattern: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self._asdict()
+
+
+class AnalysisContext:
+    __slots__ = ('filename', 'parents', 'tree', '_facts')
+
+    def __init__(self, filename: str = '<string>'):
+        self.filename = filename
+        # Родители хранятся отдельно от узлов, чтобы дерево не образовывало циклов ссылок
+        self.parents: Dict[ast.AST, ast.AST] = {}
+        self.tree: Optional[ast.AST] = None
+        self._facts: Optional[FileFacts] = None
+
+    @property
+    def facts(self) -> FileFacts:
+        # Строятся при первом запросе любого детектора и общие для всех детекторов файла
+        if self._facts is None:
+            self._facts = FileFacts(self.tree, self.parents)
+        return self._facts
+
+    def parent(self, node: ast.AST) -> Optional[ast.AST]:
+        return self.parents.get(node)
+
+    def release(self) -> None:
+        self.parents.clear()
+        self.tree = None
+        self._facts = None
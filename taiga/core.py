@@ -1,74 +1,585 @@
 import ast
+import codecs
+import hashlib
+import json
+import os
+import sys
 import tokenize
-from io import StringIO
-from typing import List, Dict, Any
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO, StringIO
+from itertools import islice
+from time import perf_counter_ns
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple, Union
 from pathlib import Path
 
+from . import __version__
+from .archives import ArchiveReader
+from .cache import ResultCache
+from .context import AnalysisContext
+from .limits import LimitExceeded, ResourceLimits
+from .prefilter import Prefilter, coding_lines
+from .profiler import Profiler
+from .project import ProjectIndex, ProjectIndexer
+from .rules import SEVERITY_LEVELS, RuleIndex
+from .supervisor import SupervisedPool
 from .detectors.dangerous_calls import DangerousCallsDetector
 from .detectors.obfuscation import ObfuscationDetector
 
 
-class ASTVisitor(ast.NodeVisitor):
-    def __init__(self, detectors: list):
+Source = Union[str, bytes, bytearray, memoryview]
+
+SOURCE_HEAD_BYTES = 8192
+
+
+def decode_source(data: Union[bytes, memoryview]) -> str:
+    head = data[:SOURCE_HEAD_BYTES]
+    if not isinstance(head, bytes):
+        head = bytes(head)
+
+    # Без BOM и coding: в заголовке - обычный UTF-8, tokenize не нужен
+    if b'coding' in head or head.startswith(codecs.BOM_UTF8):
+        encoding, _ = tokenize.detect_encoding(BytesIO(coding_lines(head, len(data))).readline)
+    else:
+        encoding = 'utf-8'
+
+    source_code = str(data, encoding)
+    if '\r' in source_code:
+        source_code = source_code.replace('\r\n', '\n').replace('\r', '\n')
+    return source_code
+
+
+class ASTVisitor:
+    def __init__(self, detectors: list, profiler: Optional[Profiler] = None):
         self.detectors = detectors
+        self.profiler = profiler
+        self._subscriptions = [detector.node_handlers() for detector in detectors]
+        self._dispatch = {}
 
-    def visit(self, node: ast.AST) -> None:
-        for child in ast.iter_child_nodes(node):
-            child.parent = node
+    def _handlers_for(self, node_type: type) -> list:
+        handlers = []
+        for detector, subscription in zip(self.detectors, self._subscriptions):
+            for node_class in node_type.__mro__:
+                handler = subscription.get(node_class)
+                if handler is not None:
+                    # Замер времени встраивается в таблицу только при профилировании
+                    if self.profiler is not None:
+                        handler = self.profiler.wrap_handler(f'{detector.name}.visit_{node_class.__name__}', handler)
+                    handlers.append(handler)
+                    break
+        self._dispatch[node_type] = handlers
+        return handlers
+
+    def visit(self, tree: ast.AST, context: AnalysisContext, max_nodes: Optional[int] = None) -> None:
+        parents = context.parents
+        dispatch = self._dispatch
+        AST = ast.AST
+        limit = sys.maxsize if max_nodes is None else max_nodes
+        stack = [tree]
+
+        # Обход итеративный: глубоко вложенный сгенерированный код не упирается в лимит рекурсии
+        while stack:
+            node = stack.pop()
+
+            handlers = dispatch.get(type(node))
+            if handlers is None:
+                handlers = self._handlers_for(type(node))
+
+            children = []
+            for field in node._fields:
+                value = getattr(node, field, None)
+                if isinstance(value, AST):
+                    children.append(value)
+                elif isinstance(value, list):
+                    for item in value:
+                        if isinstance(item, AST):
+                            children.append(item)
+
+            for child in children:
+                parents[child] = node
+            if len(parents) > limit:
+                raise LimitExceeded('too_large', f'Больше {max_nodes} узлов AST')
+
+            for handler in handlers:
+                handler(node)
+
+            children.reverse()
+            stack.extend(children)
+
+
+_worker_analyzer = None
+
+
+def _init_worker(options: Dict[str, Any]) -> None:
+    global _worker_analyzer
+    _worker_analyzer = TaigaAnalyzer(**options)
+
+
+def _analyze_chunk(paths: List[str]):
+    results = []
+    for path in paths:
+        results.extend(_worker_analyzer.analyze_path(path))
+    _worker_analyzer.flush()
+    return results, _worker_analyzer.pop_stats(), _worker_analyzer.pop_profile()
+
+
+def _analyze_data_chunk(items: List[tuple]):
+    results = [_worker_analyzer.analyze_data(data, filename) for filename, data in items]
+    _worker_analyzer.flush()
+    return results, _worker_analyzer.pop_stats(), _worker_analyzer.pop_profile()
+
+
+# Задания для SupervisedPool: результат отправляется после каждого файла, статистика - после пакета
+
+def _analyze_path_item(path: str) -> List[Dict[str, Any]]:
+    return list(_worker_analyzer.analyze_path(path))
 
-        for detector in self.detectors:
-            detector.visit(node)
 
-        self.generic_visit(node)
+def _analyze_data_item(item: tuple) -> List[Dict[str, Any]]:
+    filename, data = item
+    return [_worker_analyzer.analyze_data(data, filename)]
+
+
+def _finish_worker_chunk():
+    _worker_analyzer.flush()
+    return _worker_analyzer.pop_stats(), _worker_analyzer.pop_profile()
 
 
 class TaigaAnalyzer:
-    def __init__(self):
-        self.detectors = [
-            DangerousCallsDetector(),
+    # Меньше файлов быстрее разобрать в текущем процессе, чем запускать пул
+    PARALLEL_MIN_FILES = 16
+    CHUNK_SIZE = 8
+
+    def __init__(self, cache: Optional[ResultCache] = None, prefilter: bool = False,
+                 rules: Optional[RuleIndex] = None, profile: bool = False,
+                 archives: Optional[ArchiveReader] = None, min_severity: str = 'LOW',
+                 limits: Optional[ResourceLimits] = None, project: bool = False):
+        self.limits = limits or ResourceLimits()
+        self._options = {'cache': cache, 'prefilter': prefilter, 'rules': rules, 'profile': profile,
+                         'archives': archives, 'min_severity': min_severity, 'limits': self.limits.for_worker(),
+                         'project': project}
+        self.cache = cache
+        self.archives = archives
+        self.profiler = Profiler() if profile else None
+        self.min_severity = min_severity
+        self._min_level = SEVERITY_LEVELS[min_severity]
+        self.detectors = self._select_detectors([
+            DangerousCallsDetector(rules),
             ObfuscationDetector()
-        ]
+        ])
+        # Сводка модуля для индекса проекта собирается в том же обходе, что и находки
+        self._indexer = None
+        if project:
+            self._indexer = ProjectIndexer(rules if rules is not None
+                                           else RuleIndex(DangerousCallsDetector.default_rules()))
+            self.detectors.append(self._indexer)
+        self._visitor = ASTVisitor(self.detectors, self.profiler)
+        self.prefilter = Prefilter.from_detectors(self.detectors) if prefilter else None
         self.results = []
+        self.stats = Counter()
+        self._fingerprint = None
+
+    def _select_detectors(self, detectors: list) -> list:
+        # Детектор, который не может сообщить ничего не ниже порога, не запускается вовсе
+        selected = []
+        for detector in detectors:
+            detector.set_min_severity(self.min_severity)
+            max_severity = detector.max_severity()
+            if max_severity is not None and SEVERITY_LEVELS[max_severity] >= self._min_level:
+                selected.append(detector)
+        return selected
+
+    def fingerprint(self) -> str:
+        if self._fingerprint is None:
+            signature = {
+                'version': __version__,
+                'detectors': [detector.signature() for detector in self.detectors]
+            }
+            # Результаты с порогом серьезности не годятся для запуска без него, и наоборот.
+            # Без порога отпечаток прежний, чтобы не сбрасывать существующие кэши
+            if self.min_severity != 'LOW':
+                signature['min_severity'] = self.min_severity
+            payload = json.dumps(signature, sort_keys=True).encode('utf-8')
+            self._fingerprint = hashlib.sha256(payload).hexdigest()
+        return self._fingerprint
 
     def analyze_file(self, file_path: str) -> Dict[str, Any]:
+        if self.profiler is None:
+            return self._analyze_file(file_path)
+
+        started = perf_counter_ns()
+        result = self._analyze_file(file_path)
+        self.profiler.add_file(str(file_path), started, perf_counter_ns())
+        return result
+
+    def _phase(self, phase: str, started: int, filename: str) -> int:
+        finished = perf_counter_ns()
+        self.profiler.add_phase(phase, started, finished, filename)
+        return finished
+
+    def _analyze_file(self, file_path: str) -> Dict[str, Any]:
+        profiler = self.profiler
+        filename = str(file_path)
+        started = perf_counter_ns() if profiler else 0
+
+        try:
+            # Размер проверяется до чтения: многогигабайтный файл не должен попасть в память
+            max_bytes = self.limits.max_bytes
+            if max_bytes is not None and os.path.getsize(file_path) > max_bytes:
+                return self._too_large_result(filename, max_bytes)
+
+            if self.prefilter is not None:
+                data, needs_analysis = self.prefilter.read_file(file_path)
+                if profiler:
+                    started = self._phase('prefilter', started, filename)
+                if not needs_analysis:
+                    self.stats['prefiltered'] += 1
+                    return self._prefiltered_result(filename)
+            else:
+                with open(file_path, 'rb') as f:
+                    data = f.read()
+                if profiler:
+                    started = self._phase('read', started, filename)
+        except OSError as e:
+            return self._error_result(filename, f'Не удалось прочитать файл: {e}')
+
+        return self._analyze_data(data, filename, started)
+
+    def analyze_data(self, data: Union[bytes, memoryview], filename: str = '<string>') -> Dict[str, Any]:
+        profiler = self.profiler
+        started = perf_counter_ns() if profiler else 0
+
+        if self.prefilter is not None:
+            needs_analysis = self.prefilter.needs_analysis(data)
+            if profiler:
+                started = self._phase('prefilter', started, filename)
+            if not needs_analysis:
+                self.stats['prefiltered'] += 1
+                return self._prefiltered_result(filename)
+
+        return self._analyze_data(data, filename, started)
+
+    def _analyze_data(self, data: Union[bytes, memoryview], filename: str, started: int) -> Dict[str, Any]:
+        profiler = self.profiler
+
+        max_bytes = self.limits.max_bytes
+        if max_bytes is not None and len(data) > max_bytes:
+            return self._too_large_result(filename, max_bytes)
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = ResultCache.make_key(data, self.fingerprint())
+            cached = self.cache.get(cache_key)
+            if profiler:
+                started = self._phase('cache', started, filename)
+            if cached is not None:
+                self.stats['cache_hits'] += 1
+                return {'filename': filename, **cached}
+            self.stats['cache_misses'] += 1
+
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                source_code = f.read()
-        except UnicodeDecodeError:
-            return {'error': f'Не удалось декодировать файл: {file_path}'}
+            source_code = decode_source(data)
+        except (UnicodeDecodeError, LookupError, SyntaxError):
+            return self._error_result(filename, f'Не удалось декодировать файл: {filename}')
+
+        if profiler:
+            self._phase('decode', started, filename)
+
+        # Размер уже проверен по байтам файла
+        result = self._analyze_text(source_code, filename)
+
+        # Превышение лимита зависит от настроек запуска, а не только от содержимого
+        if cache_key is not None and result['status'] != 'too_large':
+            cached = dict(result)
+            del cached['filename']
+            self.cache.put(cache_key, cached)
+
+        return result
+
+    def pop_stats(self) -> Counter:
+        stats, self.stats = self.stats, Counter()
+        return stats
+
+    def pop_profile(self) -> Optional[Dict[str, Any]]:
+        if self.profiler is None:
+            return None
+        return self.profiler.drain()
 
-        return self.analyze_source(source_code, str(file_path))
+    def flush(self) -> None:
+        if self.cache is not None:
+            self.cache.flush()
+
+    def analyze_paths(self, paths: Iterable, jobs: Optional[int] = None) -> List[Dict[str, Any]]:
+        return list(self.iter_analyze(paths, jobs))
+
+    def iter_analyze(self, paths: Iterable, jobs: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        if jobs is None:
+            jobs = os.cpu_count() or 1
+
+        paths = iter(str(path) for path in paths)
+        head = list(islice(paths, self.PARALLEL_MIN_FILES))
+
+        if self.limits.supervised:
+            yield from self._run_supervised(_analyze_path_item, self._chunked(head, paths, self.CHUNK_SIZE), jobs)
+            return
+
+        if jobs <= 1 or len(head) < self.PARALLEL_MIN_FILES:
+            try:
+                for path in head:
+                    yield from self.analyze_path(path, jobs)
+                for path in paths:
+                    yield from self.analyze_path(path, jobs)
+            finally:
+                self.flush()
+            return
+
+        yield from self._run_pool(_analyze_chunk, self._chunked(head, paths, self.CHUNK_SIZE), jobs)
+
+    def analyze_path(self, path: str, jobs: int = 1) -> Iterator[Dict[str, Any]]:
+        if self.archives is not None and self.archives.is_archive(path):
+            return self.analyze_archive(path, jobs)
+        return iter((self.analyze_file(path),))
+
+    def analyze_archive(self, path: str, jobs: int = 1) -> Iterator[Dict[str, Any]]:
+        reader = self.archives or ArchiveReader()
+        errors = []
+
+        def members():
+            for member in reader.iter_members(path):
+                if member.error is not None:
+                    errors.append(member)
+                else:
+                    yield member.name, member.data
+
+        # Содержимое архива не попадает на диск: файлы идут в анализ прямо из памяти
+        yield from self.analyze_sources(members(), jobs=jobs)
+
+        for member in errors:
+            self.stats['archive_errors'] += 1
+            yield self._error_result(member.name, member.error)
+
+    def analyze_sources(self, sources: Iterable[Tuple[str, Source]], batch_size: int = 256,
+                        jobs: int = 1) -> Iterator[Dict[str, Any]]:
+        # Строки кодируются в UTF-8, только если их нужно передать в воркер, кэш или предфильтр
+        supervised = self.limits.supervised
+        encode = jobs > 1 or supervised or self.cache is not None or self.prefilter is not None
+        items = ((name, source.encode('utf-8', 'surrogatepass') if encode and isinstance(source, str) else source)
+                 for name, source in sources)
+        head = list(islice(items, self.PARALLEL_MIN_FILES))
+
+        if not supervised and (jobs <= 1 or len(head) < self.PARALLEL_MIN_FILES):
+            try:
+                for batch in self._chunked(head, items, batch_size):
+                    for name, data in batch:
+                        if isinstance(data, str):
+                            yield self.analyze_source(data, name)
+                        else:
+                            yield self.analyze_data(data, name)
+                    self.flush()
+            finally:
+                self.flush()
+            return
+
+        # memoryview не сериализуется, в воркеры уходят bytes
+        head = [(name, data if isinstance(data, bytes) else bytes(data)) for name, data in head]
+        items = ((name, data if isinstance(data, bytes) else bytes(data)) for name, data in items)
+        if supervised:
+            # Пакет короче: после убитого воркера остаток пакета анализируется заново
+            yield from self._run_supervised(_analyze_data_item, self._chunked(head, items, self.CHUNK_SIZE), jobs)
+            return
+        yield from self._run_pool(_analyze_data_chunk, self._chunked(head, items, batch_size), jobs)
+
+    def link_project(self, results: Iterable[Dict[str, Any]], project: ProjectIndex,
+                     prune: bool = False) -> Iterator[Dict[str, Any]]:
+        # Косвенный вызов можно найти только по сводкам всех модулей, поэтому результаты
+        # придерживаются до конца анализа; повторного разбора файлов нет
+        held = []
+        for result in results:
+            project.update(result['filename'], result.pop('module', None))
+            held.append(result)
+        if prune:
+            project.prune()
+
+        project.build(self._indexer.rules)
+        project.save()
+
+        try:
+            for result in held:
+                indirect = project.indirect_findings(result['filename'], self._min_level)
+                if indirect:
+                    findings = result['findings'] + indirect
+                    findings.sort(key=lambda x: x['line'])
+                    result['findings'] = findings
+                    result['risk_score'] = self._calculate_risk_score(findings)
+                yield result
+        finally:
+            self.stats.update({f'project_{key}': value for key, value in project.stats.items()})
+
+    def _run_supervised(self, task, chunks: Iterator[list], jobs: int) -> Iterator[Dict[str, Any]]:
+        pool = SupervisedPool(jobs, _init_worker, (self._options,), task, _finish_worker_chunk,
+                              timeout=self.limits.timeout, max_memory=self.limits.max_memory)
+
+        def on_finish(payload) -> None:
+            stats, profile = payload
+            self.stats.update(stats)
+            if profile is not None:
+                self.profiler.merge(profile)
+
+        def on_failure(item, status: str, message: str) -> Dict[str, Any]:
+            filename = item if isinstance(item, str) else item[0]
+            if status == 'timeout':
+                self.stats['limit_timeout'] += 1
+                return self._limit_result(filename, status, message)
+            return self._error_result(filename, message)
+
+        try:
+            yield from pool.run(chunks, on_finish, on_failure)
+        finally:
+            self.stats['worker_restarts'] += pool.restarts
+
+    def _run_pool(self, task, chunks: Iterator[list], jobs: int) -> Iterator[Dict[str, Any]]:
+        pending = deque()
+
+        executor = ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(self._options,))
+        try:
+            # Окно ограничено, чтобы не держать в памяти задания на весь проект
+            for chunk in islice(chunks, jobs * 4):
+                pending.append(executor.submit(task, chunk))
+
+            while pending:
+                results, stats, profile = pending.popleft().result()
+                self.stats.update(stats)
+                if profile is not None:
+                    self.profiler.merge(profile)
+                for chunk in islice(chunks, 1):
+                    pending.append(executor.submit(task, chunk))
+                yield from results
+        finally:
+            # Потребитель остановился раньше (--fail-fast): пакеты из очереди отменяются,
+            # ждем только уже начатые
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _chunked(self, head: list, rest: Iterator, size: int) -> Iterator[list]:
+        for i in range(0, len(head), size):
+            yield head[i:i + size]
+        while True:
+            chunk = list(islice(rest, size))
+            if not chunk:
+                return
+            yield chunk
 
     def analyze_source(self, source_code: str, filename: str = '<string>') -> Dict[str, Any]:
+        # Лимит в байтах UTF-8, как у файлов. Символ занимает от 1 до 4 байт, поэтому
+        # кодировать приходится только строки, длина которых в символах ничего не решает
+        max_bytes = self.limits.max_bytes
+        if max_bytes is not None and len(source_code) * 4 > max_bytes and (
+                len(source_code) > max_bytes or len(source_code.encode('utf-8', 'surrogatepass')) > max_bytes):
+            return self._too_large_result(filename, max_bytes)
+        return self._analyze_text(source_code, filename)
+
+    def _analyze_text(self, source_code: str, filename: str) -> Dict[str, Any]:
+        context = AnalysisContext(filename)
+        for detector in self.detectors:
+            detector.reset(context)
+
+        profiler = self.profiler
+        started = perf_counter_ns() if profiler else 0
 
         try:
             tree = ast.parse(source_code, filename=filename)
+            if profiler:
+                started = self._phase('parse', started, filename)
 
-            visitor = ASTVisitor(self.detectors)
-            visitor.visit(tree)
+            # Дерево нужно фактам файла до конца finalize, освобождается в context.release()
+            context.tree = tree
+            self._visitor.visit(tree, context, self.limits.max_nodes)
+            del tree
+            if profiler:
+                started = self._phase('visit', started, filename)
+                profiler.nodes += len(context.parents) + 1
 
+            finalize_started = started
             for detector in self.detectors:
                 if hasattr(detector, 'finalize'):
                     detector.finalize()
+                    if profiler:
+                        finished = perf_counter_ns()
+                        profiler.add_detector(f'{detector.name}.finalize', finished - started)
+                        started = finished
+            if profiler:
+                started = self._phase('finalize', finalize_started, filename)
 
             findings = []
             for detector in self.detectors:
-                findings.extend(detector.report())
+                detector_findings = detector.report()
+                if profiler:
+                    profiler.detector_findings[detector.name] += len(detector_findings)
+                findings.extend(detector_findings)
 
-            findings.sort(key=lambda x: x['line'])
+            findings.sort(key=lambda x: x.line)
+            findings = [finding.to_dict() for finding in findings]
 
             risk_score = self._calculate_risk_score(findings)
+            if profiler:
+                self._phase('score', started, filename)
 
-            return {
+            result = {
                 'filename': filename,
                 'findings': findings,
                 'risk_score': risk_score,
                 'status': 'success'
             }
+            if self._indexer is not None:
+                result['module'] = self._indexer.summary
+            return result
 
-        except SyntaxError as e:
+        except (SyntaxError, RecursionError) as e:
             return self._fallback_token_analysis(source_code, filename, str(e))
 
+        except LimitExceeded as e:
+            self.stats['limit_too_large'] += 1
+            return self._limit_result(filename, e.status, str(e))
+
+        except MemoryError:
+            # RLIMIT_AS в воркере супервизора (--max-memory)
+            self.stats['limit_too_large'] += 1
+            return self._limit_result(filename, 'too_large', 'Превышен лимит памяти на файл')
+
+        finally:
+            context.release()
+            for detector in self.detectors:
+                detector.reset()
+
+    def _prefiltered_result(self, filename: str) -> Dict[str, Any]:
+        return {
+            'filename': filename,
+            'findings': [],
+            'risk_score': 0.0,
+            'status': 'prefiltered'
+        }
+
+    def _error_result(self, filename: str, error_msg: str) -> Dict[str, Any]:
+        return {
+            'filename': filename,
+            'findings': [],
+            'risk_score': 0.0,
+            'status': 'error',
+            'error': error_msg
+        }
+
+    def _limit_result(self, filename: str, status: str, error_msg: str) -> Dict[str, Any]:
+        return {
+            'filename': filename,
+            'findings': [],
+            'risk_score': 0.0,
+            'status': status,
+            'error': error_msg
+        }
+
+    def _too_large_result(self, filename: str, max_bytes: int) -> Dict[str, Any]:
+        self.stats['limit_too_large'] += 1
+        return self._limit_result(filename, 'too_large', f'Файл больше {max_bytes} байт')
+
     def _calculate_risk_score(self, findings: List[Dict]) -> float:
 
         severity_weights = {
@@ -89,6 +600,9 @@ class TaigaAnalyzer:
     def _fallback_token_analysis(self, source_code: str, filename: str, error_msg: str) -> Dict[str, Any]:
 
         findings = []
+        # Поиск по токенам сообщает только HIGH
+        if self._min_level > SEVERITY_LEVELS['HIGH']:
+            return self._error_result(filename, error_msg)
 
         try:
             tokens = list(tokenize.generate_tokens(StringIO(source_code).readline))
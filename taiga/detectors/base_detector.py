@@ -1,19 +1,63 @@
-from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from abc import ABC
+from typing import Callable, List, Dict, Any, Optional
 import ast
 
+from ..context import AnalysisContext, Finding
+from ..rules import SEVERITY_LEVELS
+
 
 class BaseDetector(ABC):
+    # Самый серьезный уровень, который детектор может сообщить; по умолчанию любой
+    MAX_SEVERITY = 'CRITICAL'
 
     def __init__(self):
         self.name = self.__class__.__name__
-        self.findings = []
+        self.findings: List[Finding] = []
+        self.context: Optional[AnalysisContext] = None
+        self.min_severity = 'LOW'
+        self._min_level = SEVERITY_LEVELS['LOW']
+
+    def max_severity(self) -> Optional[str]:
+        # None - детектор ничего не может сообщить при текущем пороге и не запускается
+        return self.MAX_SEVERITY
+
+    def set_min_severity(self, min_severity: str) -> None:
+        # Детекторы с несколькими проверками разного уровня отключают здесь лишние
+        self.min_severity = min_severity
+        self._min_level = SEVERITY_LEVELS[min_severity]
 
-    @abstractmethod
     def visit(self, node: ast.AST) -> None:
-        pass
+        handler = getattr(self, 'visit_' + node.__class__.__name__, None)
+        if handler is not None:
+            handler(node)
+
+    def node_handlers(self) -> Dict[type, Callable[[ast.AST], None]]:
+        handlers = {}
+        for attr in dir(self):
+            if not attr.startswith('visit_'):
+                continue
+            node_class = getattr(ast, attr[len('visit_'):], None)
+            if isinstance(node_class, type) and issubclass(node_class, ast.AST):
+                handlers[node_class] = getattr(self, attr)
+
+        # Детекторы со своим visit() без visit_<Тип> получают все узлы
+        if not handlers and type(self).visit is not BaseDetector.visit:
+            handlers[ast.AST] = self.visit
+
+        return handlers
 
-    def report(self) -> List[Dict[str, Any]]:
+    def prefilter_patterns(self) -> Optional[List[bytes]]:
+        # None - детектор не умеет предварительную фильтрацию, файл разбирается всегда
+        return None
+
+    def signature(self) -> Dict[str, Any]:
+        return {'name': self.name}
+
+    def reset(self, context: Optional[AnalysisContext] = None) -> None:
+        self.findings = []
+        self.context = context
+
+    def report(self) -> List[Finding]:
         return self.findings
 
     def add_finding(self,
@@ -22,12 +66,21 @@ class BaseDetector(ABC):
                     description: str,
                     pattern: str = None) -> None:
 
-        finding = {
-            'detector': self.name,
-            'severity': severity,
-            'description': description,
-            'line': getattr(node, 'lineno', 0),
-            'col': getattr(node, 'col_offset', 0),
-            'pattern': pattern or str(node)
-        }
-        self.findings.append(finding)
\ No newline at end of file
+        self.add_finding_at(
+            getattr(node, 'lineno', 0),
+            getattr(node, 'col_offset', 0),
+            severity,
+            description,
+            pattern or str(node)
+        )
+
+    def add_finding_at(self,
+                       line: int,
+                       col: int,
+                       severity: str,
+                       description: str,
+                       pattern: str) -> None:
+
+        if SEVERITY_LEVELS.get(severity, 1) < self._min_level:
+            return
+        self.findings.append(Finding(self.name, severity, description, line, col, pattern))
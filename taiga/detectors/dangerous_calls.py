@@ -1,5 +1,10 @@
 import ast
+from typing import Optional
+
 from .base_detector import BaseDetector
+from ..facts import FACTS_VERSION
+from ..prefilter import words_pattern
+from ..rules import Rule, RuleIndex
 
 
 class DangerousCallsDetector(BaseDetector):
@@ -12,34 +17,92 @@ class DangerousCallsDetector(BaseDetector):
         '__import__'
     }
 
-    def visit(self, node: ast.AST) -> None:
-        if isinstance(node, ast.Call):
-            self._check_call(node)
+    HIGH_SEVERITY_FUNCTIONS = {'eval', 'exec', '__import__'}
+
+    def __init__(self, rules: Optional[RuleIndex] = None):
+        super().__init__()
+        self.rules = rules if rules is not None else RuleIndex(self.default_rules())
+        self._reset_state()
+
+    def _reset_state(self) -> None:
+        # Псевдонимы импортов с именем правила: from os import system as s
+        self.renamed = set()
+        # Вызовы по простому имени, которое может оказаться таким псевдонимом, импортированным ниже
+        self.deferred = []
+
+    @classmethod
+    def default_rules(cls):
+        return [
+            Rule(
+                call=name,
+                severity='HIGH' if name in cls.HIGH_SEVERITY_FUNCTIONS else 'MEDIUM',
+                description=f'Вызов опасной функции: {name}',
+                id=f'taiga:{name}'
+            )
+            for name in sorted(cls.DANGEROUS_FUNCTIONS)
+        ]
+
+    def max_severity(self):
+        return self.rules.max_severity()
+
+    def set_min_severity(self, min_severity: str) -> None:
+        super().set_min_severity(min_severity)
+        # Правила ниже порога убираются из дерева: они не сопоставляются и не попадают в предфильтр
+        self.rules = self.rules.pruned(min_severity)
+
+    def prefilter_patterns(self):
+        # Совпадение требует всех частей имени, достаточно искать самую длинную
+        return [words_pattern({max(rule.call.split('.'), key=len) for rule in self.rules.rules()})]
+
+    def signature(self):
+        signature = super().signature()
+        signature['rules'] = self.rules.digest()
+        signature['facts'] = FACTS_VERSION
+        return signature
+
+    def reset(self, context=None) -> None:
+        super().reset(context)
+        self._reset_state()
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        for alias in node.names:
+            if alias.asname and alias.name in self.rules.trie:
+                self.renamed.add(alias.asname)
+
+    def visit_Call(self, node: ast.Call) -> None:
+        self._check_call(node)
+
+    def finalize(self) -> None:
+        if self.renamed:
+            for node in self.deferred:
+                if node.func.id in self.renamed:
+                    self._check_call(node)
+        self.deferred = []
 
     def _check_call(self, node: ast.Call) -> None:
+        func = node.func
+        rule = self.rules.match(func)
 
-        func_name = self._get_func_name(node.func)
+        # import subprocess as sp; sp.run(...) и from os import system; system(...):
+        # таблица импортов файла строится, только если последний сегмент имени похож на правило
+        # или имя - псевдоним импорта правила (from os import system as s; s(...))
+        if rule is None:
+            if self.rules.may_match(func) or isinstance(func, ast.Name) and func.id in self.renamed:
+                rule = self._match_imported(func)
+            elif isinstance(func, ast.Name):
+                self.deferred.append(node)
 
-        if func_name in self.DANGEROUS_FUNCTIONS:
-            severity = 'HIGH' if func_name in {'eval', 'exec', '__import__'} else 'MEDIUM'
+        if rule is not None:
             self.add_finding(
                 node=node,
-                severity=severity,
-                description=f'Вызов опасной функции: {func_name}',
-                pattern=func_name
+                severity=rule.severity,
+                description=rule.description,
+                pattern=rule.call
             )
 
-    def _get_func_name(self, node: ast.AST) -> str:
-
-        if isinstance(node, ast.Name):
-            return node.id
-        elif isinstance(node, ast.Attribute):
-            parts = []
-            current = node
-            while isinstance(current, ast.Attribute):
-                parts.append(current.attr)
-                current = current.value
-            if isinstance(current, ast.Name):
-                parts.append(current.id)
-            return '.'.join(reversed(parts))
-        return ''
\ No newline at end of file
+    def _match_imported(self, func: ast.AST) -> Optional[Rule]:
+        name = self.context.facts.qualified_name(func)
+        # Относительный импорт ('.os.system') ведет в модуль проекта, а не в стандартную библиотеку
+        if name is None or name.startswith('.'):
+            return None
+        return self.rules.match_name(name)
\ No newline at end of file
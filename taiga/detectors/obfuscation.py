@@ -3,74 +3,235 @@ import base64
 import re
 from math import log2
 from .base_detector import BaseDetector
+from .dangerous_calls import DangerousCallsDetector
+from ..entropy import batch_entropies, shannon_entropy
+from ..facts import FACTS_VERSION
+from ..folding import MAX_LENGTH, MAX_OPERATIONS, MAX_OUTPUT, ConstantFolder, is_foldable_call, may_fold
+from ..rules import SEVERITY_LEVELS
 
 
 class ObfuscationDetector(BaseDetector):
+    MAX_SEVERITY = 'HIGH'
+    ENTROPY_SEVERITY = 'MEDIUM'
+
+    ENTROPY_MIN_LENGTH = 20
+    ENTROPY_REPORT_LENGTH = 30
+    ENTROPY_LONG_STRING = 50
+    ENTROPY_THRESHOLD = 0.85
+    # Запас на погрешность векторного подсчета; пограничные строки пересчитываются точно
+    ENTROPY_TOLERANCE = 1e-6
+
+    EVAL_FUNCTIONS = {'eval', 'exec'}
+    # Сколько присваиваний подряд проходится от аргумента eval/exec к вызову base64
+    DEFINITION_DEPTH = 3
+
+    # Имена, которые не собирают из кусков без причины: getattr(builtins, 'ev' + 'al')
+    FOLDED_NAMES = DangerousCallsDetector.DANGEROUS_FUNCTIONS | {
+        'system', 'popen', 'subprocess', 'builtins', '__builtins__'
+    }
+    FOLDED_CALL = re.compile(r'\b(?:eval|exec|execfile|compile|__import__|system|popen)\s*\(')
+    FOLDED_PATTERN_LENGTH = 40
+
+    # Свертка начинается с операции над литералом, вызова chr/join или среза
+    FOLDING_PATTERNS = [
+        rb'["\'][\s)]*[+%*\[]|[+*][\s(]*[rRbBuU]{0,2}["\']',
+        rb'\bchr\s*\(|\.join\s*\(|\.decode\s*\(|\[\s*:[^\]\r\n]*:',
+        rb'\b[fF][rR]?["\']|\b[rR][fF]["\']',
+    ]
+
+    # Строка длиннее ENTROPY_REPORT_LENGTH может получиться только из длинного литерала
+    # в одной строке, тройных кавычек, склейки литералов через перевод строки
+    # или продолжения строки обратной косой чертой.
+    LONG_LITERAL_PATTERNS = [
+        rb'["\'][^\r\n]{31}',
+        rb"'''|\"\"\"",
+        rb'["\'][ \t]*\\?[ \t]*(?:#[^\r\n]*)?(?:(?:\r\n|\r|\n)[ \t]*(?:#[^\r\n]*)?)+[rRbBuUfF]{0,2}["\']',
+        rb'\\(?:\r\n|\r|\n)',
+    ]
 
     def __init__(self):
         super().__init__()
-        self.string_nodes = []
+        self.strings = []
+        self.eval_calls = []
+        self.reported = set()
+        self.base64 = False
+        self.folder = ConstantFolder()
+        self.entropy = True
+
+    def set_min_severity(self, min_severity: str) -> None:
+        super().set_min_severity(min_severity)
+        self.entropy = SEVERITY_LEVELS[self.ENTROPY_SEVERITY] >= self._min_level
+
+    def node_handlers(self):
+        handlers = super().node_handlers()
+        # Без проверки энтропии строковые константы не нужны, и обход их не передает
+        if not self.entropy:
+            del handlers[ast.Constant]
+        return handlers
+
+    def prefilter_patterns(self):
+        # base64 сообщается только внутри вызова eval/exec
+        patterns = [rb'\b(?:eval|exec)\b'] + self.FOLDING_PATTERNS
+        return patterns + self.LONG_LITERAL_PATTERNS if self.entropy else patterns
+
+    def signature(self):
+        signature = super().signature()
+        signature['entropy'] = [self.ENTROPY_MIN_LENGTH, self.ENTROPY_REPORT_LENGTH,
+                                self.ENTROPY_LONG_STRING, self.ENTROPY_THRESHOLD]
+        signature['facts'] = FACTS_VERSION
+        signature['folding'] = [MAX_LENGTH, MAX_OPERATIONS, MAX_OUTPUT, sorted(self.FOLDED_NAMES)]
+        return signature
+
+    def reset(self, context=None) -> None:
+        super().reset(context)
+        self.strings = []
+        self.eval_calls = []
+        self.reported = set()
+        self.base64 = False
+        self.folder.reset()
+
+    def visit_Constant(self, node: ast.Constant) -> None:
+        # Храним только значение и позицию, а не сам узел дерева.
+        # Строки не длиннее ENTROPY_REPORT_LENGTH никогда не попадают в отчет.
+        value = node.value
+        if isinstance(value, str) and len(value) > self.ENTROPY_REPORT_LENGTH:
+            self.strings.append((value, node.lineno, node.col_offset))
+
+    def visit_Call(self, node: ast.Call) -> None:
+        # Вызовы eval/exec проверяются в finalize и только если файл вообще упоминает base64:
+        # факты файла для разбора аргументов тогда строятся не во всех файлах с eval
+        func_name = self._get_func_name(node.func, resolve=False)
+        if func_name in self.EVAL_FUNCTIONS:
+            self.eval_calls.append(node)
+        elif 'base64' in func_name or 'b64decode' in func_name:
+            self.base64 = True
+        if is_foldable_call(node):
+            self._check_string_concat(node)
 
-    def visit(self, node: ast.AST) -> None:
-        if isinstance(node, ast.Constant) and isinstance(node.value, str):
-            self.string_nodes.append(node)
+    def visit_Import(self, node: ast.Import) -> None:
+        self._check_base64_import(node)
 
-        if isinstance(node, ast.Call):
-            self._check_base64_call(node)
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        self._check_base64_import(node)
 
-        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+    def visit_BinOp(self, node: ast.BinOp) -> None:
+        if isinstance(node.op, (ast.Add, ast.Mult, ast.Mod)):
             self._check_string_concat(node)
 
+    def visit_Subscript(self, node: ast.Subscript) -> None:
+        self._check_string_concat(node)
+
+    def visit_JoinedStr(self, node: ast.JoinedStr) -> None:
+        self._check_string_concat(node)
+
     def finalize(self) -> None:
-        for node in self.string_nodes:
-            self._check_string_entropy(node)
+        if self.base64:
+            for node in self.eval_calls:
+                self._check_base64_call(node)
 
-    def _check_base64_call(self, node: ast.Call) -> None:
-        func_name = self._get_func_name(node.func)
-
-        if 'base64' in func_name or 'b64decode' in func_name:
-            parent = getattr(node, 'parent', None)
-            if parent and isinstance(parent, ast.Call):
-                parent_func = self._get_func_name(parent.func)
-                if parent_func in {'eval', 'exec'}:
-                    self.add_finding(
-                        node=node,
-                        severity='HIGH',
-                        description='Использование base64 с eval/exec - явная обфускация',
-                        pattern=f'{func_name} -> {parent_func}'
-                    )
-
-    def _check_string_concat(self, node: ast.BinOp) -> None:
-        pass
-
-    def _check_string_entropy(self, node: ast.Constant) -> None:
-        s = node.value
-        if len(s) < 20:
+        if not self.strings:
             return
 
-        freq = {}
-        for char in s:
-            freq[char] = freq.get(char, 0) + 1
+        entropies = batch_entropies([value for value, _, _ in self.strings])
+        threshold = self.ENTROPY_THRESHOLD - self.ENTROPY_TOLERANCE
 
-        entropy = 0
-        for count in freq.values():
-            p = count / len(s)
-            entropy -= p * log2(p)
+        for (value, line, col), entropy in zip(self.strings, entropies):
+            if entropy / self._max_entropy(value) > threshold:
+                self._check_string_entropy(value, line, col)
 
-        max_entropy = log2(256) if len(s) > 50 else log2(94)
-        entropy_ratio = entropy / max_entropy
+    def _max_entropy(self, s: str) -> float:
+        return log2(256) if len(s) > self.ENTROPY_LONG_STRING else log2(94)
+
+    def _check_base64_import(self, node: ast.AST) -> None:
+        # from base64 import b64decode as unpack: вызов unpack(...) сам base64 не упоминает
+        module = getattr(node, 'module', None) or ''
+        if 'base64' in module or any('base64' in alias.name or 'b64decode' in alias.name
+                                     for alias in node.names):
+            self.base64 = True
+
+    def _check_base64_call(self, node: ast.Call) -> None:
+        # Проверка идет от eval/exec к аргументам: eval(b64decode(x)), eval(b64decode(x).decode())
+        # и через переменную - cmd = b64decode(x).decode(); eval(cmd)
+        parent_func = self._get_func_name(node.func, resolve=False)
+        for arg in node.args + [keyword.value for keyword in node.keywords]:
+            for source, func_name in self._base64_sources(arg, self.DEFINITION_DEPTH):
+                if source in self.reported:
+                    continue
+                self.reported.add(source)
+                self.add_finding(
+                    node=source,
+                    severity='HIGH',
+                    description='Использование base64 с eval/exec - явная обфускация',
+                    pattern=f'{func_name} -> {parent_func}'
+                )
+
+    def _base64_sources(self, expr: ast.AST, depth: int):
+        if isinstance(expr, ast.Call):
+            func_name = self._get_func_name(expr.func)
+            if 'base64' in func_name or 'b64decode' in func_name:
+                yield expr, func_name
+            elif isinstance(expr.func, ast.Attribute):
+                # Цепочка методов над результатом: b64decode(x).decode('utf-8')
+                yield from self._base64_sources(expr.func.value, depth)
+        elif isinstance(expr, ast.Name) and depth > 0:
+            for value in self.context.facts.definitions(expr):
+                yield from self._base64_sources(value, depth - 1)
+
+    def _check_string_concat(self, node: ast.AST) -> None:
+        if not may_fold(node):
+            return
+        # Обход идет сверху вниз: если родитель уже свернут целиком, его части отдельно не проверяются
+        folder = self.folder
+        parent = self.context.parent(node)
+        if parent is not None and folder.folded(parent):
+            return
 
-        if entropy_ratio > 0.85 and len(s) > 30:
+        value = folder.fold(node)
+        if not isinstance(value, str):
+            return
+
+        if value in self.FOLDED_NAMES or self.FOLDED_CALL.search(value):
+            shown = value if len(value) <= self.FOLDED_PATTERN_LENGTH else value[:self.FOLDED_PATTERN_LENGTH] + '...'
             self.add_finding(
                 node=node,
-                severity='MEDIUM',
+                severity='HIGH',
+                description='Имя опасной функции собирается из частей строки - обфускация',
+                pattern=f'Свернуто: {shown!r}'
+            )
+
+        # Собранная строка проверяется на энтропию наравне с литералами. Свертка одного длинного
+        # литерала (f'...' без подстановок, '...'[::-1]) уже проверена в visit_Constant
+        if self.entropy and len(value) > self.ENTROPY_REPORT_LENGTH and not self._single_literal(node):
+            self.strings.append((value, node.lineno, node.col_offset))
+
+    def _single_literal(self, node: ast.AST) -> bool:
+        literals = [child for child in ast.walk(node)
+                    if isinstance(child, ast.Constant) and isinstance(child.value, str)]
+        return len(literals) == 1 and len(literals[0].value) > self.ENTROPY_REPORT_LENGTH
+
+    def _check_string_entropy(self, s: str, line: int, col: int) -> None:
+        if len(s) < self.ENTROPY_MIN_LENGTH:
+            return
+
+        entropy = shannon_entropy(s)
+        max_entropy = self._max_entropy(s)
+        entropy_ratio = entropy / max_entropy
+
+        if entropy_ratio > self.ENTROPY_THRESHOLD and len(s) > self.ENTROPY_REPORT_LENGTH:
+            self.add_finding_at(
+                line=line,
+                col=col,
+                severity=self.ENTROPY_SEVERITY,
                 description=f'Высокая энтропия строки ({entropy_ratio:.2f}) - возможна обфускация',
                 pattern=f'Энтропия: {entropy:.2f}'
             )
 
-    def _get_func_name(self, node: ast.AST) -> str:
+    def _get_func_name(self, node: ast.AST, resolve: bool = True) -> str:
+        # Последний сегмент имени; для простого имени с раскрытием псевдонима импорта:
+        # from base64 import b64decode as unpack; unpack(...) -> 'b64decode'
         if isinstance(node, ast.Name):
-            return node.id
+            name = self.context.facts.qualified_name(node) if resolve else None
+            return (name or node.id).rsplit('.', 1)[-1]
         elif isinstance(node, ast.Attribute):
             return node.attr
-        return ''
\ No newline at end of file
+        return ''
@@ -0,0 +1,62 @@
+from collections import Counter
+from math import log2
+from typing import List, Sequence
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Меньшие пачки быстрее посчитать в чистом Python, чем готовить массивы NumPy
+NUMPY_MIN_BATCH = 64
+NUMPY_CHUNK = 4096
+DENSE_LIMIT = 4 * 1024 * 1024
+
+
+def shannon_entropy(s: str) -> float:
+    length = len(s)
+    entropy = 0
+    for count in Counter(s).values():
+        p = count / length
+        entropy -= p * log2(p)
+    return entropy
+
+
+def batch_entropies(strings: Sequence[str]) -> List[float]:
+    if np is None or len(strings) < NUMPY_MIN_BATCH:
+        return [shannon_entropy(s) for s in strings]
+
+    entropies = []
+    for start in range(0, len(strings), NUMPY_CHUNK):
+        entropies.extend(_numpy_entropies(strings[start:start + NUMPY_CHUNK]))
+    return entropies
+
+
+def _numpy_entropies(strings: Sequence[str]) -> List[float]:
+    lengths = np.fromiter((len(s) for s in strings), dtype=np.int64, count=len(strings))
+    codes = np.frombuffer(''.join(strings).encode('utf-32-le', 'surrogatepass'), dtype=np.uint32).astype(np.int64)
+    if codes.size == 0:
+        return [0.0] * len(strings)
+    rows = np.repeat(np.arange(len(strings), dtype=np.int64), lengths)
+
+    alphabet = np.flatnonzero(np.bincount(codes))
+    width = len(alphabet)
+
+    if len(strings) * width <= DENSE_LIMIT:
+        # Плотная гистограмма строк x символов пачки: коды сжимаются до номеров в алфавите
+        index = np.zeros(alphabet[-1] + 1, dtype=np.int64)
+        index[alphabet] = np.arange(width, dtype=np.int64)
+        histogram = np.bincount(rows * width + index[codes], minlength=len(strings) * width)
+        cells = np.flatnonzero(histogram)
+        counts = histogram[cells]
+        cell_rows = cells // width
+    else:
+        # Широкий алфавит (например, таблицы CJK): пары (строка, символ) через сортировку.
+        # Коды Unicode занимают 21 бит.
+        cells, counts = np.unique((rows << 21) | codes, return_counts=True)
+        cell_rows = cells >> 21
+
+    p = counts / lengths[cell_rows]
+    entropies = np.bincount(cell_rows, weights=-p * np.log2(p), minlength=len(strings))
+    return entropies.tolist()
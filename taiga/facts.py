@@ -0,0 +1,174 @@
+import ast
+from typing import Dict, List, Optional, Tuple
+
+FACTS_VERSION = 1
+
+SCOPE_NODES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+# Поля со списками вложенных инструкций (ExceptHandler и match_case сами содержат body)
+STATEMENT_FIELDS = ('body', 'orelse', 'finalbody', 'handlers', 'cases')
+
+
+def dotted_name(node: ast.AST) -> Optional[str]:
+    # os.path.join -> 'os.path.join'; вызов результата, индексация и т.п. - None
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    parts.append(node.id)
+    return '.'.join(reversed(parts))
+
+
+class Scope:
+    __slots__ = ('node', 'parent', 'imports', 'bindings', 'globals')
+
+    def __init__(self, node: ast.AST, parent: Optional['Scope']):
+        self.node = node
+        self.parent = parent
+        # Имя -> полное имя импорта ('sp' -> 'subprocess', 'system' -> 'os.system')
+        self.imports: Dict[str, str] = {}
+        # Имя -> присваивания в порядке исходника: (позиция, значение или None, если значение неизвестно)
+        self.bindings: Dict[str, List[Tuple[Tuple[int, int], Optional[ast.AST]]]] = {}
+        self.globals = set()
+
+    def bind(self, name: str, position: Tuple[int, int], value: Optional[ast.AST] = None) -> None:
+        self.bindings.setdefault(name, []).append((position, value))
+
+
+class FileFacts:
+    # Общие для детекторов факты о файле: псевдонимы импортов, области видимости и присваивания.
+    # Таблица строится одним обходом дерева при первом запросе и живет до конца анализа файла
+
+    def __init__(self, tree: ast.AST, parents: Dict[ast.AST, ast.AST]):
+        self.tree = tree
+        self.parents = parents
+        self._scopes: Optional[Dict[ast.AST, Scope]] = None
+
+    @property
+    def scopes(self) -> Dict[ast.AST, Scope]:
+        if self._scopes is None:
+            self._scopes = self._build_scopes()
+        return self._scopes
+
+    def _build_scopes(self) -> Dict[ast.AST, Scope]:
+        # Обходятся только списки инструкций: все связывания имен, кроме := и параметров lambda,
+        # - инструкции, а выражения составляют большую часть узлов дерева
+        module = Scope(self.tree, None)
+        scopes = {self.tree: module}
+        stack = [(statement, module) for statement in reversed(self.tree.body)]
+
+        while stack:
+            node, scope = stack.pop()
+            position = (getattr(node, 'lineno', 0), getattr(node, 'col_offset', 0))
+
+            if isinstance(node, SCOPE_NODES):
+                scope.bind(node.name, position, node)
+                inner = Scope(node, scope)
+                scopes[node] = inner
+                if not isinstance(node, ast.ClassDef):
+                    arguments = node.args
+                    for arg in arguments.posonlyargs + arguments.args + arguments.kwonlyargs:
+                        inner.bind(arg.arg, position)
+                    for arg in (arguments.vararg, arguments.kwarg):
+                        if arg is not None:
+                            inner.bind(arg.arg, position)
+                scope = inner
+            elif isinstance(node, ast.Import):
+                for alias in node.names:
+                    if alias.asname:
+                        scope.imports[alias.asname] = alias.name
+                    else:
+                        root = alias.name.split('.')[0]
+                        scope.imports[root] = root
+            elif isinstance(node, ast.ImportFrom):
+                # Относительный импорт сохраняет точки: '..util.run'
+                prefix = '.' * node.level + (node.module or '')
+                separator = '.' if node.module else ''
+                for alias in node.names:
+                    if alias.name != '*':
+                        scope.imports[alias.asname or alias.name] = prefix + separator + alias.name
+            elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+                targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+                for target in targets:
+                    if isinstance(target, ast.Name):
+                        scope.bind(target.id, position, node.value)
+                    else:
+                        self._bind_targets(scope, target, position)
+            elif isinstance(node, (ast.AugAssign, ast.For, ast.AsyncFor)):
+                self._bind_targets(scope, node.target, position)
+            elif isinstance(node, (ast.With, ast.AsyncWith)):
+                for item in node.items:
+                    if item.optional_vars is not None:
+                        self._bind_targets(scope, item.optional_vars, position)
+            elif isinstance(node, ast.ExceptHandler) and node.name:
+                scope.bind(node.name, position)
+            elif isinstance(node, (ast.Global, ast.Nonlocal)):
+                scope.globals.update(node.names)
+
+            for field in STATEMENT_FIELDS:
+                statements = getattr(node, field, None)
+                if statements:
+                    stack.extend((statement, scope) for statement in reversed(statements))
+
+        return scopes
+
+    @staticmethod
+    def _bind_targets(scope: Scope, target: ast.AST, position: Tuple[int, int]) -> None:
+        for name in ast.walk(target):
+            if isinstance(name, ast.Name):
+                scope.bind(name.id, position)
+
+    def scope_of(self, node: ast.AST) -> Scope:
+        scopes = self.scopes
+        parent = self.parents.get(node)
+        while parent is not None:
+            scope = scopes.get(parent)
+            if scope is not None:
+                return scope
+            parent = self.parents.get(parent)
+        return scopes[self.tree]
+
+    def lookup(self, name: str, node: ast.AST) -> Tuple[Optional[Scope], Optional[str]]:
+        # (область, полное имя импорта) для имени в точке node; (None, None) - встроенное или неизвестное
+        scope = self.scope_of(node)
+        inner = True
+        while scope is not None:
+            if name in scope.globals:
+                scope = self.scopes[self.tree]
+                inner = False
+                continue
+            # Имена тела класса не видны из его методов
+            if inner or not isinstance(scope.node, ast.ClassDef):
+                if name in scope.imports:
+                    return scope, scope.imports[name]
+                if name in scope.bindings:
+                    return scope, None
+            scope = scope.parent
+            inner = False
+        return None, None
+
+    def qualified_name(self, node: ast.AST) -> Optional[str]:
+        # Имя вызова с раскрытыми псевдонимами: sp.run -> subprocess.run, system -> os.system.
+        # None - корень имени локальная переменная или функция файла
+        name = dotted_name(node)
+        if name is None:
+            return None
+        root, _, rest = name.partition('.')
+        scope, imported = self.lookup(root, node)
+        if imported is not None:
+            return f'{imported}.{rest}' if rest else imported
+        if scope is not None:
+            return None
+        return name
+
+    def definitions(self, name: ast.Name) -> List[ast.AST]:
+        # Значения, присвоенные имени до этого использования в той же функции (def-use без учета ветвлений).
+        # Для имени из внешней области порядок выполнения неизвестен, возвращаются все значения
+        scope, imported = self.lookup(name.id, name)
+        if scope is None or imported is not None:
+            return []
+        position = (name.lineno, name.col_offset)
+        same_scope = scope is self.scope_of(name)
+        return [value for where, value in scope.bindings.get(name.id, ())
+                if value is not None and (not same_scope or where < position)]
@@ -0,0 +1,268 @@
+import ast
+import re
+from typing import Any, Dict, List, Optional
+
+# Длиннее строки, списки и байты не сворачиваются: враждебный файл не раздует память умножением
+MAX_LENGTH = 100_000
+# Операций свертки и символов во всех свернутых значениях на файл; после исчерпания
+# любого из лимитов файл дальше не сворачивается
+MAX_OPERATIONS = 100_000
+MAX_OUTPUT = 1_000_000
+MAX_INT = 2 ** 64
+
+# Значение узла уже вошло в свернутое значение родителя и не хранится
+FOLDED = object()
+
+# '%' сворачивается только без ширины и точности: '%999999999s' % x не должен выделять гигабайт
+SAFE_FORMAT = re.compile(r'(?:[^%]|%[sdrc%])*', re.DOTALL)
+
+SEQUENCE_TYPES = (str, bytes, tuple)
+FOLDING_METHODS = {'join', 'decode'}
+
+
+def is_foldable_call(node: ast.Call) -> bool:
+    func = node.func
+    if isinstance(func, ast.Name):
+        return func.id == 'chr'
+    return isinstance(func, ast.Attribute) and func.attr in FOLDING_METHODS
+
+
+def may_fold(node: ast.AST) -> bool:
+    # Быстрая проверка до свертки: x % 3, items[i], sep.join(parts) не сворачиваются,
+    # потому что непосредственный операнд - переменная или вызов
+    if isinstance(node, ast.BinOp):
+        operands = (node.left, node.right)
+    elif isinstance(node, ast.Subscript):
+        operands = (node.value, node.slice)
+    elif isinstance(node, ast.Call):
+        operands = node.args if isinstance(node.func, ast.Name) else [node.func.value] + node.args
+    else:
+        return True
+    for operand in operands:
+        if isinstance(operand, (ast.Name, ast.Attribute)):
+            return False
+        if isinstance(operand, ast.Call) and not is_foldable_call(operand):
+            return False
+    return True
+
+
+class ConstantFolder:
+    # Свертка выражений из констант снизу вверх: 'ev' + 'al', ''.join([...]), chr(101), s[::-1], '%s' % x,
+    # f-строки. Значение каждого поддерева запоминается, поэтому обход каждого узла выполняется один раз,
+    # а цепочка a + b + c + ... из тысяч слагаемых склеивается одним join, а не попарно
+
+    def __init__(self, max_length: int = MAX_LENGTH, max_operations: int = MAX_OPERATIONS,
+                 max_output: int = MAX_OUTPUT):
+        self.max_length = max_length
+        self.max_operations = max_operations
+        self.max_output = max_output
+        # Узел -> значение, None - не сворачивается, FOLDED - значение передано родителю
+        self.values: Dict[ast.AST, Any] = {}
+        self.operations = 0
+        self.output = 0
+
+    def reset(self) -> None:
+        self.values = {}
+        self.operations = 0
+        self.output = 0
+
+    def folded(self, node: ast.AST) -> bool:
+        return self.values.get(node) is not None
+
+    def fold(self, node: ast.AST) -> Optional[Any]:
+        values = self.values
+        stack = [(node, False)]
+
+        while stack:
+            current, ready = stack.pop()
+            if current in values:
+                continue
+            if ready:
+                self._evaluate(current)
+                continue
+
+            operands = self._operands(current)
+            if operands is None:
+                values[current] = None
+                continue
+            stack.append((current, True))
+            stack.extend((operand, False) for operand in operands if operand not in values)
+
+        value = values[node]
+        return None if value is FOLDED else value
+
+    def _operands(self, node: ast.AST) -> Optional[List[ast.AST]]:
+        # Узлы, которые нужно свернуть раньше node; None - форма не поддерживается
+        if isinstance(node, ast.Constant):
+            value = node.value
+            return [] if isinstance(value, (str, bytes, int)) and not isinstance(value, bool) else None
+        if isinstance(node, ast.BinOp):
+            if isinstance(node.op, ast.Add):
+                return self._chain_terms(node)
+            if isinstance(node.op, (ast.Sub, ast.Mult, ast.Mod)):
+                return [node.left, node.right]
+            return None
+        if isinstance(node, ast.UnaryOp):
+            return [node.operand] if isinstance(node.op, ast.USub) else None
+        if isinstance(node, ast.Subscript):
+            return [node.value, node.slice]
+        if isinstance(node, ast.Slice):
+            return [part for part in (node.lower, node.upper, node.step) if part is not None]
+        if isinstance(node, (ast.List, ast.Tuple)):
+            if len(node.elts) > self.max_length or any(isinstance(elt, ast.Starred) for elt in node.elts):
+                return None
+            return node.elts
+        if isinstance(node, ast.JoinedStr):
+            return node.values
+        if isinstance(node, ast.FormattedValue):
+            # !s и без преобразования; формат ширины ('{x:>1000000}') не сворачивается
+            if node.format_spec is not None or node.conversion not in (-1, ord('s')):
+                return None
+            return [node.value]
+        if isinstance(node, ast.Call):
+            if node.keywords or not is_foldable_call(node):
+                return None
+            func = node.func
+            if isinstance(func, ast.Name):
+                return node.args if len(node.args) == 1 else None
+            if func.attr == 'join':
+                return [func.value] + node.args if len(node.args) == 1 else None
+            return [func.value] + node.args if len(node.args) <= 1 else None
+        return None
+
+    def _chain_terms(self, node: ast.BinOp) -> List[ast.AST]:
+        terms = []
+        while isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+            terms.append(node.right)
+            node = node.left
+        terms.append(node)
+        terms.reverse()
+        return terms
+
+    def _evaluate(self, node: ast.AST) -> None:
+        values = self.values
+        operands = self._operands(node)
+        args = [values[operand] for operand in operands]
+
+        value = None
+        if all(arg is not None and arg is not FOLDED for arg in args) \
+                and self.operations < self.max_operations and self.output < self.max_output:
+            self.operations += max(1, len(args) - 1)
+            try:
+                value = self._compute(node, args)
+            except (ArithmeticError, IndexError, LookupError, TypeError, ValueError):
+                value = None
+            if isinstance(value, SEQUENCE_TYPES):
+                self.output += len(value)
+                if len(value) > self.max_length or self.output > self.max_output:
+                    value = None
+            elif isinstance(value, int) and not -MAX_INT < value < MAX_INT:
+                value = None
+
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+            # Промежуточные суммы цепочки отдельно не вычисляются. Если цепочка не свернулась,
+            # помечаются только суммы, содержащие первое несворачиваемое слагаемое: 'ev' + 'al' + x
+            # оставляет 'ev' + 'al' для свертки, а x + 'a' + 'b' + ... не обходится заново на каждом уровне
+            failed = next((i for i, arg in enumerate(args) if arg is None or arg is FOLDED), 0)
+            inner = node.left
+            last = len(args) - 2
+            while isinstance(inner, ast.BinOp) and isinstance(inner.op, ast.Add):
+                if value is not None:
+                    values[inner] = FOLDED
+                elif last >= failed:
+                    values[inner] = None
+                else:
+                    break
+                inner = inner.left
+                last -= 1
+
+        values[node] = value
+        if value is not None:
+            for operand in operands:
+                values[operand] = FOLDED
+
+    def _compute(self, node: ast.AST, args: List[Any]) -> Any:
+        if isinstance(node, ast.Constant):
+            return node.value
+
+        if isinstance(node, ast.BinOp):
+            op = node.op
+            if isinstance(op, ast.Add):
+                return self._concat(args)
+            left, right = args
+            if isinstance(op, ast.Mult):
+                count, sequence = (left, right) if isinstance(left, int) else (right, left)
+                if isinstance(sequence, SEQUENCE_TYPES) and isinstance(count, int):
+                    if len(sequence) * max(count, 0) > self.max_length:
+                        return None
+                elif not (isinstance(left, int) and isinstance(right, int)):
+                    return None
+                return left * right
+            if isinstance(op, ast.Sub):
+                return left - right if isinstance(left, int) and isinstance(right, int) else None
+            if isinstance(left, str):
+                if not SAFE_FORMAT.fullmatch(left):
+                    return None
+                return left % right
+            return left % right if isinstance(left, int) and isinstance(right, int) else None
+
+        if isinstance(node, ast.UnaryOp):
+            return -args[0] if isinstance(args[0], int) else None
+
+        if isinstance(node, ast.Subscript):
+            sequence, index = args
+            if not isinstance(sequence, SEQUENCE_TYPES) or not isinstance(index, (int, slice)):
+                return None
+            return sequence[index]
+
+        if isinstance(node, ast.Slice):
+            parts = iter(args)
+            lower, upper, step = (next(parts) if part is not None else None
+                                  for part in (node.lower, node.upper, node.step))
+            if not all(part is None or isinstance(part, int) for part in (lower, upper, step)):
+                return None
+            return slice(lower, upper, step)
+
+        if isinstance(node, (ast.List, ast.Tuple)):
+            return tuple(args)
+
+        if isinstance(node, ast.JoinedStr):
+            parts = [str(arg) for arg in args]
+            if sum(map(len, parts)) > self.max_length:
+                return None
+            return ''.join(parts)
+
+        if isinstance(node, ast.FormattedValue):
+            value = args[0]
+            return value if isinstance(value, str) else str(value) if isinstance(value, int) else None
+
+        if isinstance(node, ast.Call):
+            if isinstance(node.func, ast.Name):
+                return chr(args[0]) if isinstance(args[0], int) else None
+            receiver = args[0]
+            if node.func.attr == 'join':
+                items = args[1]
+                if not isinstance(receiver, (str, bytes)) or not isinstance(items, tuple) \
+                        or not all(isinstance(item, type(receiver)) for item in items):
+                    return None
+                if sum(map(len, items)) + len(receiver) * len(items) > self.max_length:
+                    return None
+                return receiver.join(items)
+            if not isinstance(receiver, bytes) or not all(isinstance(arg, str) for arg in args[1:]):
+                return None
+            return receiver.decode(*args[1:])
+
+        return None
+
+    def _concat(self, terms: List[Any]) -> Any:
+        first = terms[0]
+        if isinstance(first, int):
+            return sum(terms) if all(isinstance(term, int) for term in terms) else None
+        kind = type(first)
+        if kind not in SEQUENCE_TYPES or not all(type(term) is kind for term in terms):
+            return None
+        if sum(map(len, terms)) > self.max_length:
+            return None
+        if kind is tuple:
+            return tuple(item for term in terms for item in term)
+        return kind().join(terms)
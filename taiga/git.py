@@ -0,0 +1,141 @@
+import os
+import subprocess
+import threading
+import time
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from .walker import is_ignored, parse_ignore_lines
+
+
+class GitError(Exception):
+    pass
+
+
+def _run_git(args: List[str], cwd: str) -> bytes:
+    try:
+        completed = subprocess.run(['git', *args], cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError as e:
+        raise GitError(f'не удалось запустить git: {e}')
+    if completed.returncode != 0:
+        # Первая строка - суть ошибки, дальше git печатает справку по использованию
+        message = completed.stderr.decode('utf-8', 'replace').strip().splitlines()
+        raise GitError(message[0] if message else f'git {args[0]} завершился с ошибкой')
+    return completed.stdout
+
+
+def _split_z(output: bytes) -> List[bytes]:
+    return [item for item in output.split(b'\0') if item]
+
+
+class GitChanges:
+    # Добавленные, скопированные, измененные, переименованные и сменившие тип файлы
+    DIFF_FILTER = 'ACMRT'
+
+    def __init__(self, repo_dir: str = '.', git_range: Optional[str] = None, staged: bool = False,
+                 exclude: Iterable[str] = (), suffixes: Tuple[str, ...] = ('.py',)):
+        if (git_range is None) == (not staged):
+            raise ValueError('нужно указать либо диапазон коммитов, либо staged')
+
+        self.repo_dir = str(repo_dir)
+        self.git_range = git_range
+        self.staged = staged
+        self.exclude = parse_ignore_lines(exclude)
+        self.suffixes = tuple(suffix.encode() for suffix in suffixes)
+        self.prefix = '' if self.repo_dir == '.' else self.repo_dir.rstrip(os.sep) + os.sep
+        self.timings = {'git_list': 0.0, 'git_read': 0.0}
+
+    def _diff_args(self) -> List[str]:
+        # --relative: пути относительно целевой директории и только внутри нее
+        args = ['diff', '--name-only', '-z', '--relative', f'--diff-filter={self.DIFF_FILTER}']
+        if self.staged:
+            return args + ['--cached']
+        if '..' in self.git_range:
+            return args + [self.git_range]
+        return args + [self.git_range, 'HEAD']
+
+    def _revision(self) -> bytes:
+        # Спецификация объекта для cat-file: ':./путь' - индекс, 'rev:./путь' - коммит
+        if self.staged:
+            return b''
+        if '..' in self.git_range:
+            revision = self.git_range.split('..')[-1].lstrip('.') or 'HEAD'
+        else:
+            revision = 'HEAD'
+        return revision.encode('utf-8')
+
+    def changed_paths(self) -> List[bytes]:
+        started = time.perf_counter()
+        # Вне репозитория git diff молча переходит в режим --no-index
+        _run_git(['rev-parse', '--git-dir'], self.repo_dir)
+        paths = []
+        for path in _split_z(_run_git(self._diff_args(), self.repo_dir)):
+            # Спецификации cat-file --batch построчные, перевод строки в пути их ломает
+            if not path.endswith(self.suffixes) or b'\n' in path:
+                continue
+            if self.exclude and self._excluded(os.fsdecode(path)):
+                continue
+            paths.append(path)
+        self.timings['git_list'] += time.perf_counter() - started
+        return paths
+
+    def _excluded(self, path: str) -> bool:
+        # Обход отсекает исключенные каталоги целиком, а git отдает пути файлов: проверяем и родителей
+        parts = path.split('/')
+        return any(is_ignored(self.exclude, '/'.join(parts[:i]), True) for i in range(1, len(parts))) \
+            or is_ignored(self.exclude, path, False)
+
+    def tracked_count(self) -> int:
+        # Для оценки полного обхода: сколько .py файлов git знает в этой директории
+        started = time.perf_counter()
+        patterns = [f'*{suffix.decode()}' for suffix in self.suffixes]
+        count = len(_split_z(_run_git(['ls-files', '-z', '--', *patterns], self.repo_dir)))
+        self.timings['git_list'] += time.perf_counter() - started
+        return count
+
+    def sources(self, paths: List[bytes]) -> Iterator[Tuple[str, bytes]]:
+        # Все файлы читаются через один процесс git cat-file, а не по процессу или open() на файл
+        if not paths:
+            return
+
+        revision = self._revision()
+        try:
+            process = subprocess.Popen(['git', 'cat-file', '--batch'], cwd=self.repo_dir,
+                                       stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        except OSError as e:
+            raise GitError(f'не удалось запустить git: {e}')
+
+        def feed():
+            try:
+                for path in paths:
+                    process.stdin.write(revision + b':./' + path + b'\n')
+                process.stdin.close()
+            except OSError:
+                pass
+
+        writer = threading.Thread(target=feed, daemon=True)
+        writer.start()
+
+        started = time.perf_counter()
+        try:
+            for path in paths:
+                header = process.stdout.readline()
+                if not header:
+                    raise GitError('git cat-file завершился раньше времени')
+                # '<spec> missing': файла нет в ревизии (например, подмодуль)
+                if header.endswith((b' missing\n', b' ambiguous\n')):
+                    continue
+
+                _, _, size = header.split()
+                data = process.stdout.read(int(size))
+                process.stdout.read(1)
+
+                self.timings['git_read'] += time.perf_counter() - started
+                yield self.prefix + os.fsdecode(path), data
+                started = time.perf_counter()
+        finally:
+            self.timings['git_read'] += time.perf_counter() - started
+            process.stdout.close()
+            if process.poll() is None:
+                process.kill()
+            process.wait()
+            writer.join()
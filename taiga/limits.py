@@ -0,0 +1,50 @@
+import os
+from typing import NamedTuple, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class ResourceLimits(NamedTuple):
+    # None - без ограничения
+    timeout: Optional[float] = None
+    max_bytes: Optional[int] = None
+    max_nodes: Optional[int] = None
+    max_memory: Optional[int] = None
+
+    @property
+    def supervised(self) -> bool:
+        # Зависший ast.parse не прерывается сигналом, такой воркер можно только убить
+        return self.timeout is not None or self.max_memory is not None
+
+    def for_worker(self) -> 'ResourceLimits':
+        # Время и память контролирует супервизор, воркер проверяет только размер
+        return self._replace(timeout=None, max_memory=None)
+
+
+class LimitExceeded(Exception):
+
+    def __init__(self, status: str, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _address_space() -> int:
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def set_memory_limit(max_memory: Optional[int]) -> None:
+    # Лимит считается сверх памяти, уже занятой воркером после импорта детекторов и numpy
+    if max_memory is None or resource is None:
+        return
+    limit = _address_space() + max_memory
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
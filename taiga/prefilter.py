@@ -0,0 +1,131 @@
+import codecs
+import mmap
+import re
+import tokenize
+import unicodedata
+from io import BytesIO
+from typing import Iterable, List, Optional, Union
+
+Buffer = Union[bytes, mmap.mmap]
+
+NON_ASCII = re.compile(rb'[\x80-\xff]')
+# Объявление кодировки (PEP 263) может стоять только в первых двух строках
+CODING_HEAD_BYTES = 8192
+UTF8_NAMES = {'utf-8', 'utf-8-sig'}
+
+
+def coding_lines(head: bytes, size: int) -> bytes:
+    # PEP 263 разрешает объявлять кодировку только в первых двух строках
+    lines = head.split(b'\n', 2)
+    if len(lines) == 3 or len(head) == size:
+        return b'\n'.join(lines[:2])
+    # Строки длиннее заголовка: обрезка могла разрезать многобайтовый символ,
+    # а coding-комментарий бывает только в целой строке
+    cut = head.rfind(b'\n') + 1
+    if not cut and head.startswith(codecs.BOM_UTF8):
+        cut = len(codecs.BOM_UTF8)
+    return head[:cut]
+
+
+def declared_encoding(data: Buffer) -> Optional[str]:
+    # Кодировка из coding-комментария, если она не UTF-8; ValueError - кодировка неизвестна
+    head = bytes(data[:CODING_HEAD_BYTES])
+    if b'coding' not in head:
+        return None
+    try:
+        encoding, _ = tokenize.detect_encoding(BytesIO(coding_lines(head, len(data))).readline)
+    except SyntaxError as e:
+        raise ValueError(str(e))
+    encoding = codecs.lookup(encoding).name
+    return None if encoding in UTF8_NAMES else encoding
+
+
+def words_pattern(words: Iterable[str]) -> bytes:
+    # Альтернатива из тысяч слов проверяется движком re по одному слову на позицию.
+    # Общие префиксы выносятся в дерево: (?:ev(?:al)|ex(?:ec(?:file)?)), и на каждой
+    # позиции проверяется не больше одной ветки на символ.
+    trie = {}
+    for word in words:
+        node = trie
+        for byte in word.encode('utf-8'):
+            node = node.setdefault(byte, {})
+        node[None] = True
+
+    if not trie:
+        return rb'(?!)'
+    return rb'\b' + _trie_pattern(trie) + rb'\b'
+
+
+def _trie_pattern(node: dict) -> bytes:
+    branches = []
+    for byte, child in sorted((k, v) for k, v in node.items() if k is not None):
+        branches.append(re.escape(bytes([byte])) + (_trie_pattern(child) if child.keys() - {None} else b''))
+
+    optional = None in node
+    if len(branches) == 1 and not optional:
+        return branches[0]
+
+    pattern = b'(?:' + b'|'.join(branches) + b')'
+    return pattern + b'?' if optional else pattern
+
+
+class Prefilter:
+    MMAP_THRESHOLD = 1024 * 1024
+
+    def __init__(self, patterns: List[bytes]):
+        # Без детекторов (все отсечены порогом серьезности) разбирать нечего
+        joined = b'|'.join(b'(?:' + pattern + b')' for pattern in patterns) or rb'(?!)'
+        self.pattern = re.compile(joined)
+        self.text_pattern = re.compile(joined.decode('utf-8'))
+
+    @classmethod
+    def from_detectors(cls, detectors: Iterable) -> Optional['Prefilter']:
+        patterns = []
+        for detector in detectors:
+            detector_patterns = detector.prefilter_patterns()
+            # Детектор без триггеров может найти что угодно: фильтровать нельзя
+            if detector_patterns is None:
+                return None
+            patterns.extend(detector_patterns)
+        return cls(patterns)
+
+    def needs_analysis(self, data: Buffer) -> bool:
+        if self.pattern.search(data):
+            return True
+
+        # В файле с coding: utf-7 или unicode_escape триггер в байтах может не совпасть с текстом:
+        # '+AGU-val' и '\\x65val' после декодирования - это eval
+        try:
+            encoding = declared_encoding(data)
+        except ValueError:
+            return True
+        if encoding is not None:
+            try:
+                text = bytes(data).decode(encoding)
+            except (UnicodeDecodeError, LookupError):
+                return True
+            return self.text_pattern.search(unicodedata.normalize('NFKC', text)) is not None
+
+        if NON_ASCII.search(data) is None:
+            return False
+
+        # Идентификаторы Python нормализуются по NFKC, поэтому 'ｅｖａｌ' - это eval.
+        # Нормализация всего текста может только добавить совпадения, но не убрать их.
+        try:
+            text = bytes(data).decode('utf-8')
+        except UnicodeDecodeError:
+            return True
+        return self.text_pattern.search(unicodedata.normalize('NFKC', text)) is not None
+
+    def read_file(self, file_path: str):
+        with open(file_path, 'rb') as f:
+            size = f.seek(0, 2)
+            f.seek(0)
+            if size < self.MMAP_THRESHOLD:
+                data = f.read()
+                return data, self.needs_analysis(data)
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if not self.needs_analysis(mapped):
+                    return None, False
+                return mapped[:], True
@@ -0,0 +1,161 @@
+import heapq
+import json
+import os
+from collections import Counter
+from time import perf_counter_ns
+from typing import Any, Callable, Dict, List
+
+PHASES = ('read', 'prefilter', 'cache', 'decode', 'parse', 'visit', 'finalize', 'score', 'render')
+
+
+class Profiler:
+    SLOWEST_FILES = 10
+    # Ограничение на события трассировки, чтобы профиль большого прогона не съел память
+    MAX_TRACE_EVENTS = 200_000
+
+    def __init__(self, slowest: int = SLOWEST_FILES, max_events: int = MAX_TRACE_EVENTS):
+        self.slowest = slowest
+        self.max_events = max_events
+        self.phase_ns = Counter()
+        self.phase_calls = Counter()
+        self.detector_ns = Counter()
+        self.detector_calls = Counter()
+        self.detector_findings = Counter()
+        self.nodes = 0
+        self.files = 0
+        self.dropped_events = 0
+        self.events: List[Dict[str, Any]] = []
+        self._slowest: List[tuple] = []
+
+    def add_phase(self, phase: str, start_ns: int, end_ns: int, filename: str = '') -> None:
+        self.phase_ns[phase] += end_ns - start_ns
+        self.phase_calls[phase] += 1
+        self._trace(phase, start_ns, end_ns, filename)
+
+    def add_detector(self, key: str, elapsed_ns: int, calls: int = 1) -> None:
+        self.detector_ns[key] += elapsed_ns
+        self.detector_calls[key] += calls
+
+    def add_file(self, filename: str, start_ns: int, end_ns: int) -> None:
+        self.files += 1
+        entry = (end_ns - start_ns, filename)
+        if len(self._slowest) < self.slowest:
+            heapq.heappush(self._slowest, entry)
+        elif entry > self._slowest[0]:
+            heapq.heapreplace(self._slowest, entry)
+        self._trace('file', start_ns, end_ns, filename)
+
+    def wrap_handler(self, key: str, handler: Callable) -> Callable:
+        detector_ns = self.detector_ns
+        detector_calls = self.detector_calls
+
+        def timed(node):
+            start = perf_counter_ns()
+            handler(node)
+            detector_ns[key] += perf_counter_ns() - start
+            detector_calls[key] += 1
+
+        return timed
+
+    def _trace(self, name: str, start_ns: int, end_ns: int, filename: str) -> None:
+        if len(self.events) >= self.max_events:
+            self.dropped_events += 1
+            return
+        self.events.append({
+            'name': name,
+            'cat': 'taiga',
+            'ph': 'X',
+            'ts': start_ns / 1000,
+            'dur': (end_ns - start_ns) / 1000,
+            'pid': os.getpid(),
+            'tid': 0,
+            'args': {'file': filename} if filename else {}
+        })
+
+    def slowest_files(self) -> List[Dict[str, Any]]:
+        return [
+            {'filename': filename, 'ms': elapsed / 1e6}
+            for elapsed, filename in sorted(self._slowest, reverse=True)
+        ]
+
+    def drain(self) -> Dict[str, Any]:
+        data = self.to_dict(include_events=True)
+        self.__init__(self.slowest, self.max_events)
+        return data
+
+    def merge(self, data: Dict[str, Any]) -> None:
+        self.phase_ns.update(data['phase_ns'])
+        self.phase_calls.update(data['phase_calls'])
+        self.detector_ns.update(data['detector_ns'])
+        self.detector_calls.update(data['detector_calls'])
+        self.detector_findings.update(data['detector_findings'])
+        self.nodes += data['nodes']
+        self.files += data['files']
+        self.dropped_events += data['dropped_events']
+
+        for entry in data['slowest']:
+            entry = (int(entry['ms'] * 1e6), entry['filename'])
+            if len(self._slowest) < self.slowest:
+                heapq.heappush(self._slowest, entry)
+            elif entry > self._slowest[0]:
+                heapq.heapreplace(self._slowest, entry)
+
+        room = self.max_events - len(self.events)
+        events = data.get('events', [])
+        self.events.extend(events[:max(room, 0)])
+        self.dropped_events += max(len(events) - max(room, 0), 0)
+
+    def to_dict(self, include_events: bool = False) -> Dict[str, Any]:
+        data = {
+            'files': self.files,
+            'nodes': self.nodes,
+            'phase_ns': dict(self.phase_ns),
+            'phase_calls': dict(self.phase_calls),
+            'detector_ns': dict(self.detector_ns),
+            'detector_calls': dict(self.detector_calls),
+            'detector_findings': dict(self.detector_findings),
+            'slowest': self.slowest_files(),
+            'dropped_events': self.dropped_events
+        }
+        if include_events:
+            data['events'] = self.events
+        return data
+
+    def write_json(self, path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    def write_trace(self, path: str) -> None:
+        # Формат Chrome trace event: открывается в chrome://tracing и Perfetto
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+
+    def table(self) -> List[str]:
+        lines = [f" Файлов: {self.files}, узлов AST: {self.nodes}", '',
+                 f" {'Фаза':<22}{'Всего, мс':>12}{'Вызовов':>10}{'Среднее, мкс':>15}"]
+
+        phases = [p for p in PHASES if p in self.phase_calls] + \
+                 sorted(p for p in self.phase_calls if p not in PHASES)
+        for phase in phases:
+            total = self.phase_ns[phase]
+            calls = self.phase_calls[phase]
+            lines.append(f" {phase:<22}{total / 1e6:>12.1f}{calls:>10}{total / calls / 1e3:>15.1f}")
+
+        if self.detector_calls:
+            lines += ['', f" {'Детектор':<44}{'Всего, мс':>12}{'Вызовов':>10}"]
+            for key in sorted(self.detector_ns, key=self.detector_ns.get, reverse=True):
+                lines.append(f" {key:<44}{self.detector_ns[key] / 1e6:>12.1f}{self.detector_calls[key]:>10}")
+
+        if self.detector_findings:
+            lines += ['', ' Находок по детекторам:']
+            for detector, count in sorted(self.detector_findings.items()):
+                lines.append(f"   {detector}: {count}")
+
+        if self._slowest:
+            lines += ['', ' Самые медленные файлы:']
+            for entry in self.slowest_files():
+                lines.append(f"   {entry['ms']:>10.1f} мс  {entry['filename']}")
+
+        if self.dropped_events:
+            lines.append(f" Событий трассировки отброшено: {self.dropped_events}")
+        return lines
@@ -0,0 +1,363 @@
+import ast
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .detectors.base_detector import BaseDetector
+from .facts import dotted_name
+from .rules import SEVERITIES, SEVERITY_LEVELS, RuleIndex
+from .stdlib import BUNDLED_STDLIB_MODULE_NAMES
+
+SUMMARY_VERSION = 1
+# Длина цепочки в описании находки; сама цепочка может быть длиннее
+CHAIN_DISPLAY = 6
+# sys.stdlib_module_names есть только с Python 3.10
+STDLIB_MODULE_NAMES = getattr(sys, 'stdlib_module_names', BUNDLED_STDLIB_MODULE_NAMES)
+
+
+def module_name(rel_path: str) -> str:
+    parts = rel_path.replace(os.sep, '/').split('/')
+    parts[-1] = parts[-1][:-3] if parts[-1].endswith('.py') else parts[-1]
+    if parts[-1] == '__init__':
+        parts.pop()
+    return '.'.join(parts)
+
+
+class ProjectIndexer(BaseDetector):
+    # Находок не сообщает: в том же обходе AST собирает сводку модуля для индекса проекта -
+    # импорты, определения верхнего уровня и вызовы, которые могут вести в другие модули
+
+    def __init__(self, rules: RuleIndex):
+        super().__init__()
+        self.rules = rules
+        self.summary = None
+        self._reset_state()
+
+    def _reset_state(self) -> None:
+        self.imports: Dict[str, str] = {}
+        self.defs = set()
+        self.calls: List[Tuple[str, int, int, Optional[str]]] = []
+
+    def prefilter_patterns(self):
+        # Вызывать опасный код может любой модуль, пропускать файлы нельзя
+        return None
+
+    def signature(self):
+        signature = super().signature()
+        signature['version'] = SUMMARY_VERSION
+        return signature
+
+    def reset(self, context=None) -> None:
+        super().reset(context)
+        self._reset_state()
+        self.summary = None
+
+    def visit_Import(self, node: ast.Import) -> None:
+        for alias in node.names:
+            if alias.asname:
+                self.imports[alias.asname] = alias.name
+            else:
+                root = alias.name.split('.')[0]
+                self.imports[root] = root
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        # Относительный импорт хранится с точками: пакет модуля известен только индексу
+        prefix = '.' * node.level + (node.module or '')
+        separator = '.' if node.module else ''
+        for alias in node.names:
+            if alias.name != '*':
+                self.imports[alias.asname or alias.name] = prefix + separator + alias.name
+
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
+        owner = self._owner(node)
+        if owner is not None:
+            self.defs.add(owner)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        if isinstance(self.context.parent(node), ast.Module):
+            self.defs.add(node.name)
+
+    def visit_Call(self, node: ast.Call) -> None:
+        name = dotted_name(node.func)
+        if name is not None:
+            self.calls.append((name, node.lineno, node.col_offset, self._owner(node)))
+
+    def _owner(self, node: ast.AST) -> Optional[str]:
+        # Функция верхнего уровня или метод класса верхнего уровня, к которым относится узел;
+        # вложенные функции считаются частью внешней
+        scopes = []
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            scopes.append(node)
+        parent = self.context.parent(node)
+        while parent is not None:
+            if isinstance(parent, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                scopes.append(parent)
+            parent = self.context.parent(parent)
+
+        if not scopes:
+            return None
+        outer = scopes[-1]
+        if not isinstance(outer, ast.ClassDef):
+            return outer.name
+        if len(scopes) > 1 and isinstance(scopes[-2], (ast.FunctionDef, ast.AsyncFunctionDef)):
+            return f'{outer.name}.{scopes[-2].name}'
+        return None
+
+    def _resolve(self, name: str) -> Optional[str]:
+        root, _, rest = name.partition('.')
+        target = self.imports.get(root)
+        if target is not None:
+            target = f'{target}.{rest}' if rest else target
+        elif root in self.defs or name in self.defs:
+            # '@' - определение в этом же модуле
+            target = '@' + name
+        else:
+            target = name
+
+        # Относительный импорт сопоставляется с правилами только в индексе, когда известен пакет модуля
+        if target[0] in '@.':
+            return target
+        if self.rules.match_name(target) is not None:
+            return target
+        # Встроенные имена, локальные переменные и стандартная библиотека в граф проекта не входят
+        if root not in self.imports or target.split('.')[0] in STDLIB_MODULE_NAMES:
+            return None
+        return target
+
+    def finalize(self) -> None:
+        functions: Dict[str, set] = {}
+        calls = []
+        for name, line, col, owner in self.calls:
+            target = self._resolve(name)
+            if target is None:
+                continue
+            if owner is not None:
+                functions.setdefault(owner, set()).add(target)
+            if self.rules.match_name(target) is None:
+                calls.append([target, line, col])
+
+        self.summary = {
+            'imports': {alias: target for alias, target in self.imports.items()
+                        if target[0] == '.' or target.split('.')[0] not in STDLIB_MODULE_NAMES},
+            'defs': sorted(self.defs),
+            'functions': {owner: sorted(targets) for owner, targets in functions.items()},
+            'calls': calls
+        }
+
+
+class ProjectIndex:
+    # Сводки модулей хранятся между запусками; перезаписываются только изменившиеся
+    VERSION = SUMMARY_VERSION
+    FLUSH_EVERY = 1000
+    MAX_ALIAS_HOPS = 8
+
+    def __init__(self, path: Optional[str], root: str = '.'):
+        self.path = path
+        self.root = str(Path(root))
+        self.modules: Dict[str, Dict[str, Any]] = {}
+        self._digests: Dict[str, str] = {}
+        self._dirty: Dict[str, Optional[Tuple[str, str]]] = {}
+        self._seen = set()
+        self.stats = {'modules': 0, 'updated': 0, 'reaching': 0, 'indirect': 0}
+        self._functions: Dict[str, List[str]] = {}
+        self._aliases: Dict[str, Dict[str, str]] = {}
+        self._is_package: Dict[str, bool] = {}
+        self._next: Dict[str, Optional[str]] = {}
+        self._sink: Dict[str, Any] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS modules ('
+            'path TEXT PRIMARY KEY, digest TEXT NOT NULL, summary TEXT NOT NULL)'
+        )
+        return conn
+
+    def load(self) -> None:
+        if self.path is None or not os.path.exists(self.path):
+            return
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+            # Сводки другой версии собраны иначе, индекс строится заново
+            if row is None or int(row[0]) != self.VERSION:
+                conn.execute('DELETE FROM modules')
+                return
+            for path, digest, summary in conn.execute('SELECT path, digest, summary FROM modules'):
+                self.modules[path] = json.loads(summary)
+                self._digests[path] = digest
+        finally:
+            conn.close()
+
+    def relative(self, filename: str) -> Optional[str]:
+        # Файлы из архивов (pkg.whl!mod.py) не являются модулями проекта
+        if '!' in filename or not filename.endswith('.py'):
+            return None
+        path = os.path.relpath(filename, self.root)
+        if path.startswith('..'):
+            return None
+        return path.replace(os.sep, '/')
+
+    def update(self, filename: str, summary: Optional[Dict[str, Any]]) -> None:
+        rel_path = self.relative(filename)
+        if rel_path is None:
+            return
+        self._seen.add(rel_path)
+
+        if summary is None:
+            # Файл не разобрался: его прежняя сводка больше не верна
+            if rel_path in self.modules:
+                del self.modules[rel_path]
+                self._dirty[rel_path] = None
+            return
+
+        payload = json.dumps(summary, sort_keys=True, ensure_ascii=False)
+        digest = hashlib.sha256(payload.encode('utf-8')).hexdigest()
+        if self._digests.get(rel_path) == digest:
+            return
+        self.modules[rel_path] = summary
+        self._digests[rel_path] = digest
+        self._dirty[rel_path] = (digest, payload)
+        self.stats['updated'] += 1
+
+    def prune(self) -> None:
+        # После обхода всей директории: модули, которых больше нет, удаляются из индекса
+        for rel_path in list(self.modules.keys() - self._seen):
+            del self.modules[rel_path]
+            self._digests.pop(rel_path, None)
+            self._dirty[rel_path] = None
+
+    def save(self) -> None:
+        if self.path is None or not self._dirty:
+            return
+        conn = self._connect()
+        try:
+            items = list(self._dirty.items())
+            for i in range(0, len(items), self.FLUSH_EVERY):
+                with conn:
+                    conn.execute('BEGIN IMMEDIATE')
+                    batch = items[i:i + self.FLUSH_EVERY]
+                    conn.executemany('DELETE FROM modules WHERE path = ?',
+                                     [(path,) for path, row in batch if row is None])
+                    conn.executemany('INSERT OR REPLACE INTO modules (path, digest, summary) VALUES (?, ?, ?)',
+                                     [(path, *row) for path, row in batch if row is not None])
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)", (str(self.VERSION),))
+        finally:
+            conn.close()
+        self._dirty = {}
+
+    def _qualify(self, module: str, target: str) -> str:
+        if target[0] == '@':
+            return f'{module}.{target[1:]}' if module else target[1:]
+        if target[0] == '.':
+            level = len(target) - len(target.lstrip('.'))
+            package = module.split('.') if module else []
+            # Модуль, а не пакет: относительный импорт считается от его пакета
+            if not self._is_package.get(module, False):
+                package = package[:-1]
+            base = package[:len(package) - (level - 1)] if level > 1 else package
+            rest = target[level:]
+            return '.'.join(base + ([rest] if rest else []))
+        return target
+
+    def _function(self, name: str) -> Optional[str]:
+        # Имя через реэкспорты (from .util import run в __init__.py) приводится к определению
+        for _ in range(self.MAX_ALIAS_HOPS):
+            if name in self._functions:
+                return name
+            if f'{name}.__init__' in self._functions:
+                return f'{name}.__init__'
+            module, _, attr = name.rpartition('.')
+            alias = self._aliases.get(module, {}).get(attr)
+            if alias is None:
+                return None
+            name = alias
+        return None
+
+    def build(self, rules: RuleIndex) -> None:
+        # Граф строится за один проход по сводкам: вершины - функции, ребра - вызовы.
+        # Обратный обход в ширину от функций с прямым опасным вызовом дает кратчайшую цепочку
+        self._is_package = {module_name(path): path.endswith('__init__.py') for path in self.modules}
+        self._functions = {}
+        self._aliases = {}
+        sinks = {}
+
+        for rel_path, summary in self.modules.items():
+            module = module_name(rel_path)
+            self._aliases[module] = {alias: self._qualify(module, target)
+                                     for alias, target in summary.get('imports', {}).items()}
+            for owner, targets in summary.get('functions', {}).items():
+                name = f'{module}.{owner}' if module else owner
+                qualified = [self._qualify(module, target) for target in targets]
+                self._functions[name] = qualified
+                for target in qualified:
+                    rule = rules.match_name(target)
+                    if rule is not None and name not in sinks:
+                        sinks[name] = rule
+
+        callers: Dict[str, List[str]] = {}
+        for name, targets in self._functions.items():
+            for target in targets:
+                callee = self._function(target)
+                if callee is not None and callee != name:
+                    callers.setdefault(callee, []).append(name)
+
+        self._next = {name: None for name in sinks}
+        self._sink = dict(sinks)
+        queue = deque(sinks)
+        while queue:
+            callee = queue.popleft()
+            for caller in callers.get(callee, ()):
+                if caller not in self._next:
+                    self._next[caller] = callee
+                    self._sink[caller] = self._sink[callee]
+                    queue.append(caller)
+
+        self.stats['modules'] = len(self.modules)
+        self.stats['reaching'] = len(self._next)
+
+    def chain(self, name: str) -> List[str]:
+        chain = [name]
+        while self._next.get(chain[-1]) is not None:
+            chain.append(self._next[chain[-1]])
+        return chain
+
+    def indirect_findings(self, filename: str, min_level: int = 1) -> List[Dict[str, Any]]:
+        rel_path = self.relative(filename)
+        summary = self.modules.get(rel_path) if rel_path is not None else None
+        if not summary:
+            return []
+
+        module = module_name(rel_path)
+        findings = []
+        for target, line, col in summary.get('calls', []):
+            callee = self._function(self._qualify(module, target))
+            if callee is None or callee not in self._next:
+                continue
+            rule = self._sink[callee]
+            # Косвенный вызов на уровень мягче прямого: опасный код может быть не на этом пути
+            severity = SEVERITIES[max(SEVERITY_LEVELS[rule.severity] - 1, 1) - 1]
+            if SEVERITY_LEVELS[severity] < min_level:
+                continue
+            chain = self.chain(callee)
+            shown = chain[:CHAIN_DISPLAY] + (['...'] if len(chain) > CHAIN_DISPLAY else [])
+            findings.append({
+                'detector': 'DangerousCallsDetector',
+                'severity': severity,
+                'description': f'Косвенный вызов опасной функции {rule.call}: {" -> ".join(shown + [rule.call])}',
+                'line': line,
+                'col': col,
+                'pattern': f'{callee} -> {rule.call}'
+            })
+        self.stats['indirect'] += len(findings)
+        return findings
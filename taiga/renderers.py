@@ -0,0 +1,361 @@
+import os
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, Optional, TextIO
+
+from .report import LIMIT_STATUSES, ReportWriter, ScanSummary
+
+ANSI_COLORS = {
+    'black': 30, 'red': 31, 'green': 32, 'yellow': 33,
+    'blue': 34, 'magenta': 35, 'cyan': 36, 'white': 37,
+}
+ANSI_STYLES = {'bright': '\033[1m', 'dim': '\033[2m'}
+ANSI_RESET = '\033[0m'
+
+SEVERITY_STYLES = {
+    # цвет строки, значок в сводке файла, значок находки, цвета плашки (фон, текст)
+    'HIGH': ('red', '🔴', '🚨', ('red', 'white')),
+    'MEDIUM': ('yellow', '🟡', '⚠️', ('yellow', 'black')),
+    'LOW': ('green', '🟢', 'ℹ️', ('green', 'black')),
+}
+OTHER_SEVERITY_STYLE = ('white', '⚪', 'ℹ️', ('green', 'black'))
+
+
+def color_supported(stream: TextIO, no_color: bool = False) -> bool:
+    # https://no-color.org и FORCE_COLOR для логов CI, которые умеют ANSI
+    if no_color or 'NO_COLOR' in os.environ:
+        return False
+    if os.environ.get('FORCE_COLOR'):
+        return True
+    if os.environ.get('TERM') == 'dumb':
+        return False
+    isatty = getattr(stream, 'isatty', None)
+    return bool(isatty and isatty())
+
+
+def enable_ansi_console() -> None:
+    # ANSI-последовательности нужно переводить в вызовы консоли только на Windows,
+    # поэтому colorama импортируется лишь там и лишь при цветном выводе
+    if os.name != 'nt':
+        return
+    try:
+        import colorama
+    except ImportError:
+        return
+    fix_console = getattr(colorama, 'just_fix_windows_console', None)
+    if fix_console is not None:
+        fix_console()
+    else:
+        colorama.init()
+
+
+class Painter:
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._prefixes: Dict[tuple, str] = {}
+
+    def paint(self, text: str, color: str = '', style: str = '', bg_color: str = '') -> str:
+        if not self.enabled:
+            return text
+
+        key = (color, style, bg_color)
+        prefix = self._prefixes.get(key)
+        if prefix is None:
+            prefix = ANSI_STYLES.get(style, '')
+            if color.lower() in ANSI_COLORS:
+                prefix += f'\033[{ANSI_COLORS[color.lower()]}m'
+            if bg_color.lower() in ANSI_COLORS:
+                prefix += f'\033[{ANSI_COLORS[bg_color.lower()] + 10}m'
+            self._prefixes[key] = prefix
+        return prefix + text + ANSI_RESET if prefix else text
+
+
+class OutputBuffer:
+    # Строки копятся в списке и уходят в поток одной записью: print() на каждую строку
+    # с десятками тысяч находок стоит дороже самого анализа
+    LIMIT = 64 * 1024
+
+    def __init__(self, stream: TextIO, interactive: Optional[bool] = None, limit: int = LIMIT):
+        self.stream = stream
+        self.limit = limit
+        if interactive is None:
+            isatty = getattr(stream, 'isatty', None)
+            interactive = bool(isatty and isatty())
+        self.interactive = interactive
+        self._parts = []
+        self._size = 0
+
+    def write(self, text: str) -> None:
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= self.limit:
+            self.flush()
+
+    def checkpoint(self) -> None:
+        # В терминале результат показывается сразу, в файл или канал - большими блоками
+        if self.interactive:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._parts:
+            self.stream.write(''.join(self._parts))
+            self._parts = []
+            self._size = 0
+        self.stream.flush()
+
+    def isatty(self) -> bool:
+        return self.interactive
+
+
+class Console:
+
+    def __init__(self, out: OutputBuffer, painter: Painter):
+        self.out = out
+        self.painter = painter
+
+    def line(self, text: str = '', color: str = '', style: str = '', bg_color: str = '',
+             end: str = '\n') -> None:
+        self.out.write(self.painter.paint(text, color, style, bg_color) + end)
+
+    def flush(self) -> None:
+        self.out.flush()
+
+
+class Renderer(ABC):
+    # Вывод хода анализа в консоль; машиночитаемые форматы отключают все, кроме результатов
+    quiet = False
+
+    def __init__(self, console: Console, verbose: bool = False, multiple: bool = False):
+        self.console = console
+        self.verbose = verbose
+        self.multiple = multiple
+
+    @abstractmethod
+    def result(self, index: int, result: Dict[str, Any]) -> None:
+        pass
+
+    def summary(self, summary: ScanSummary) -> None:
+        pass
+
+    def close(self) -> None:
+        self.console.flush()
+
+
+class TextRenderer(Renderer):
+
+    def result(self, index: int, result: Dict[str, Any]) -> None:
+        if self.multiple:
+            self.console.line(f"\n[{index}] Анализ: {Path(result['filename'])}", 'cyan', style='bright')
+        if not self.multiple or result['findings'] or result.get('status') in LIMIT_STATUSES:
+            self.report(result)
+        self.console.out.checkpoint()
+
+    def report(self, result: Dict[str, Any]) -> None:
+        line = self.console.line
+        paint = self.console.painter.paint
+
+        findings = result['findings']
+        risk_score = result['risk_score']
+
+        line(f"\n{'=' * 70}", 'blue', style='bright')
+        line(f" Анализ файла: {result['filename']}", 'blue', style='bright')
+        line(f"{'=' * 70}", 'blue', style='bright')
+
+        if result.get('status') == 'error':
+            line(f" Ошибка синтаксиса: {result.get('error', 'неизвестно')}", 'red', style='bright')
+            return
+
+        if result.get('status') in LIMIT_STATUSES:
+            line(f" Файл не проанализирован: {result.get('error', result['status'])}", 'yellow', style='bright')
+            return
+
+        if risk_score == 0:
+            risk_color, risk_icon, risk_text, risk_emoji = 'green', '✅', "НИЗКИЙ", "🟢"
+        elif risk_score < 5:
+            risk_color, risk_icon, risk_text, risk_emoji = 'yellow', '⚠️', "СРЕДНИЙ", "🟡"
+        else:
+            risk_color, risk_icon, risk_text, risk_emoji = 'red', '🚨', "ВЫСОКИЙ", "🔴"
+
+        line(f"\n{risk_emoji} Общая оценка риска", risk_color, style='bright')
+        line(f"   Балл: {risk_score}/10", risk_color)
+        line(f"   Уровень: {risk_text} {risk_icon}", risk_color)
+
+        line(f"\n Статистика", 'blue', style='bright')
+        line(f"   Найдено паттернов: {len(findings)}", 'blue')
+
+        severity_counts = {}
+        for finding in findings:
+            severity = finding['severity']
+            severity_counts[severity] = severity_counts.get(severity, 0) + 1
+
+        if severity_counts:
+            line("   Распределение:", 'blue')
+            for severity, count in severity_counts.items():
+                color, icon, _, _ = SEVERITY_STYLES.get(severity, OTHER_SEVERITY_STYLE)
+                line(f"     {icon} {severity}: {count}", color)
+
+        if not findings:
+            line(f"\n Отличные новости!", 'green', style='bright')
+            line("    Вредоносных паттернов не обнаружено", 'green')
+            line("    Файл выглядит безопасно", 'green')
+            line(f"\n{'=' * 70}", 'blue', style='bright')
+            return
+
+        line(f"\n Обнаруженные паттерны:", 'blue', style='bright')
+
+        write = self.console.out.write
+        for i, finding in enumerate(findings, 1):
+            severity = finding['severity']
+            # Неизвестные уровни (CRITICAL из пакетов правил) выводятся как LOW, как и раньше
+            color, _, icon, (box_bg, box_fg) = SEVERITY_STYLES.get(severity, SEVERITY_STYLES['LOW'])
+
+            # Номер, плашка уровня и описание - одна строка из трех частей разного цвета
+            write(paint(f"\n{i:>3}. ") + paint(f" {severity} ", box_fg, 'bright', box_bg) + " ")
+            line(f"{icon} {finding['description']}", color)
+
+            location_info = f"    Строка {finding['line']}"
+            if finding.get('col'):
+                location_info += f", столбец {finding['col']}"
+            line(location_info, 'white', style='dim')
+
+            if finding.get('detector'):
+                line(f"    Детектор: {finding['detector']}", 'cyan', style='dim')
+
+            if self.verbose and finding.get('pattern'):
+                line(f"    Паттерн: {finding['pattern']}", 'white', style='dim')
+
+        line(f"\n{'=' * 70}", 'blue', style='bright')
+
+    def summary(self, summary: ScanSummary) -> None:
+        line = self.console.line
+
+        line(f"\n{'=' * 70}", 'magenta', style='bright')
+        line(" СВОДКА ПО ВСЕМ ФАЙЛАМ", 'magenta', style='bright')
+        line(f"{'=' * 70}", 'magenta', style='bright')
+
+        line(f" Проанализировано файлов: {summary.files}", 'cyan')
+        line(f" Всего паттернов: {summary.findings}", 'cyan')
+        line(f" Файлов с находками: {summary.files_with_findings}", 'cyan')
+        line(f" Средний балл риска: {summary.average_risk:.1f}/10", 'cyan')
+
+        counters = summary.counters
+        timings = summary.timings
+
+        if counters['cache_hits'] or counters['cache_misses']:
+            line(f" Кэш: {counters['cache_hits']} попаданий, {counters['cache_misses']} промахов", 'cyan')
+
+        if counters['too_large']:
+            line(f" Пропущено больших файлов: {counters['too_large']}", 'cyan')
+
+        if counters['limit_timeout'] or counters['limit_too_large']:
+            line(f" Не проанализировано из-за лимитов: {counters['limit_timeout']} по времени, "
+                 f"{counters['limit_too_large']} по размеру или памяти", 'yellow')
+            if counters['worker_restarts']:
+                line(f" Перезапущено процессов анализа: {counters['worker_restarts']}", 'yellow')
+
+        if counters['project_modules']:
+            line(f" Индекс проекта: {counters['project_modules']} модулей (обновлено {counters['project_updated']}), "
+                 f"функций с путем к опасным вызовам: {counters['project_reaching']}, "
+                 f"косвенных вызовов: {counters['project_indirect']}", 'cyan')
+
+        if counters['shard_skipped']:
+            line(f" Файлов в других шардах: {counters['shard_skipped']}", 'cyan')
+
+        if counters['duplicates']:
+            line(f" Пропущено повторов из разных отчетов: {counters['duplicates']}", 'yellow')
+
+        if 'walk' in timings:
+            line(f" Время обхода: {timings['walk']:.2f} с, анализа: {timings['analysis']:.2f} с", 'cyan')
+        elif 'git_list' in timings:
+            line(f" Время: список изменений {timings['git_list']:.2f} с, чтение из git {timings['git_read']:.2f} с, "
+                 f"анализ {timings['analysis']:.2f} с", 'cyan')
+            if counters['git_tracked']:
+                line(f" Изменено {summary.files} из {counters['git_tracked']} файлов; полный анализ занял бы около "
+                     f"{timings['full_scan_estimate']:.2f} с", 'cyan')
+
+        prefiltered = counters['prefiltered']
+        if prefiltered:
+            line(f" Пропущено предфильтром: {prefiltered} ({prefiltered / summary.files * 100:.1f}%)", 'cyan')
+
+        if summary.files_with_findings > 0:
+            line(f"\n Файлы с наибольшим риском:", 'red', style='bright')
+            for r in summary.top_files():
+                if r['risk_score'] > 0:
+                    risk_color = 'red' if r['risk_score'] >= 5 else 'yellow'
+                    line(f"   • {Path(r['filename']).name}: {r['risk_score']}/10 ({r['findings']} паттернов)",
+                         risk_color)
+
+    def change(self, change) -> None:
+        line = self.console.line
+        if change.new is None:
+            line(f"   ✖ {change.filename}: удален", 'white', style='dim')
+            return
+
+        result = change.new
+        findings = result['findings']
+        if result.get('status') == 'error':
+            line(f"   ✖ {change.filename}: {result.get('error', 'ошибка')}", 'red')
+        else:
+            icon = "✅" if not findings else "⚠️" if result['risk_score'] < 5 else "🚨"
+            was = f" (было {change.old['risk_score']}/10)" if change.old is not None else ''
+            line(f"   {icon} {change.filename}: {len(findings)} паттернов, риск: {result['risk_score']}/10{was}",
+                 'green' if not findings else 'yellow' if result['risk_score'] < 5 else 'red')
+
+        if self.verbose and findings:
+            self.report(result)
+
+    def profile(self, profiler) -> None:
+        self.console.line(f"\n{'=' * 70}", 'magenta', style='bright')
+        self.console.line(" ПРОФИЛЬ АНАЛИЗА", 'magenta', style='bright')
+        self.console.line(f"{'=' * 70}", 'magenta', style='bright')
+
+        for text in profiler.table():
+            self.console.line(text, 'cyan')
+
+
+class CompactRenderer(TextRenderer):
+
+    def result(self, index: int, result: Dict[str, Any]) -> None:
+        if not self.multiple:
+            return super().result(index, result)
+
+        findings = result['findings']
+        risk_score = result['risk_score']
+        icon = "✅" if not findings else "⚠️" if risk_score < 5 else "🚨"
+        self.console.line(f"\n[{index}] Анализ: {Path(result['filename'])}", 'cyan', style='bright')
+        if result.get('status') in LIMIT_STATUSES:
+            self.console.line(f"   ⏱ {Path(result['filename']).name}: {result.get('error', result['status'])}", 'yellow')
+            self.console.out.checkpoint()
+            return
+        self.console.line(
+            f"   {icon} {Path(result['filename']).name}: {len(findings)} паттернов, риск: {risk_score}/10",
+            'green' if not findings else 'yellow' if risk_score < 5 else 'red')
+        self.console.out.checkpoint()
+
+    def summary(self, summary: ScanSummary) -> None:
+        pass
+
+
+class SummaryRenderer(TextRenderer):
+    # Отчет в JSON/NDJSON/SARIF пишется в файл, в консоли - только ход анализа и сводка
+
+    def result(self, index: int, result: Dict[str, Any]) -> None:
+        if self.multiple:
+            self.console.line(f"\n[{index}] Анализ: {Path(result['filename'])}", 'cyan', style='bright')
+            self.console.out.checkpoint()
+
+
+class ReportRenderer(Renderer):
+    # Машиночитаемый отчет в stdout: сообщения о ходе анализа его бы испортили
+    quiet = True
+
+    def __init__(self, console: Console, writer: ReportWriter):
+        super().__init__(console)
+        self.writer = writer
+
+    def result(self, index: int, result: Dict[str, Any]) -> None:
+        self.writer.write(result)
+
+    def close(self) -> None:
+        self.writer.close()
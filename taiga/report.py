@@ -0,0 +1,284 @@
+import heapq
+import json
+from abc import ABC, abstractmethod
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+
+from . import __version__
+
+# Файл не проанализирован из-за лимитов ресурсов (--timeout, --max-bytes, --max-nodes, --max-memory)
+LIMIT_STATUSES = ('timeout', 'too_large')
+
+
+class ScanSummary:
+    TOP_FILES = 3
+
+    def __init__(self):
+        self.files = 0
+        self.findings = 0
+        self.files_with_findings = 0
+        self.total_risk = 0.0
+        self.counters = Counter()
+        self.timings = {}
+        self._top = []
+
+    def add(self, result: Dict[str, Any]) -> None:
+        findings_count = len(result.get('findings', []))
+        risk_score = result.get('risk_score', 0.0)
+
+        self.files += 1
+        self.findings += findings_count
+        self.total_risk += risk_score
+        if findings_count:
+            self.files_with_findings += 1
+
+        # При равном риске выше остается файл, проанализированный раньше
+        entry = (risk_score, -self.files, result.get('filename', ''), findings_count)
+        if len(self._top) < self.TOP_FILES:
+            heapq.heappush(self._top, entry)
+        elif entry > self._top[0]:
+            heapq.heapreplace(self._top, entry)
+
+    @property
+    def average_risk(self) -> float:
+        return self.total_risk / self.files if self.files else 0
+
+    def top_files(self) -> List[Dict[str, Any]]:
+        return [
+            {'filename': filename, 'risk_score': risk_score, 'findings': findings_count}
+            for risk_score, _, filename, findings_count in sorted(self._top, reverse=True)
+        ]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'files': self.files,
+            'findings': self.findings,
+            'files_with_findings': self.files_with_findings,
+            'average_risk': round(self.average_risk, 2),
+            'top_files': self.top_files(),
+            'stats': dict(self.counters),
+            'timings': dict(self.timings)
+        }
+
+
+
+class IncrementalSummary(ScanSummary):
+    # Сводка для watch: результат файла можно заменить или убрать без пересчета всего дерева
+
+    def __init__(self):
+        super().__init__()
+        self._files: Dict[str, tuple] = {}
+        self._seq = 0
+
+    def __contains__(self, filename: str) -> bool:
+        return filename in self._files
+
+    def add(self, result: Dict[str, Any]) -> None:
+        filename = result.get('filename', '')
+        self.remove(filename)
+
+        findings_count = len(result.get('findings', []))
+        risk_score = result.get('risk_score', 0.0)
+
+        self.files += 1
+        self.findings += findings_count
+        self.total_risk += risk_score
+        if findings_count:
+            self.files_with_findings += 1
+
+        self._seq += 1
+        self._files[filename] = (risk_score, -self._seq, filename, findings_count)
+
+    def remove(self, filename: str) -> bool:
+        entry = self._files.pop(filename, None)
+        if entry is None:
+            return False
+
+        risk_score, _, _, findings_count = entry
+        self.files -= 1
+        self.findings -= findings_count
+        if findings_count:
+            self.files_with_findings -= 1
+        # Вычитание float копит погрешность, поэтому пустую сводку обнуляем явно
+        self.total_risk = self.total_risk - risk_score if self.files else 0.0
+        return True
+
+    def top_files(self) -> List[Dict[str, Any]]:
+        return [
+            {'filename': filename, 'risk_score': risk_score, 'findings': findings_count}
+            for risk_score, _, filename, findings_count in heapq.nlargest(self.TOP_FILES, self._files.values())
+        ]
+
+
+class ReportWriter(ABC):
+
+    def __init__(self, stream: TextIO, owns_stream: bool = False):
+        self.stream = stream
+        self.owns_stream = owns_stream
+        self.count = 0
+
+    @abstractmethod
+    def write(self, result: Dict[str, Any]) -> None:
+        pass
+
+    def close(self) -> None:
+        if self.owns_stream:
+            self.stream.close()
+        else:
+            self.stream.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class JSONReportWriter(ReportWriter):
+    # Тот же вывод, что и json.dump(results, indent=2), но без накопления списка
+
+    def write(self, result: Dict[str, Any]) -> None:
+        text = json.dumps(result, ensure_ascii=False, indent=2)
+        self.stream.write('[\n  ' if self.count == 0 else ',\n  ')
+        self.stream.write(text.replace('\n', '\n  '))
+        self.count += 1
+
+    def close(self) -> None:
+        self.stream.write('\n]' if self.count else '[]')
+        super().close()
+
+
+class NDJSONReportWriter(ReportWriter):
+
+    def __init__(self, stream: TextIO, owns_stream: bool = False, line_buffered: bool = True):
+        super().__init__(stream, owns_stream)
+        # Построчный сброс нужен тем, кто читает отчет во время анализа (tail -f, конвейер)
+        self.line_buffered = line_buffered
+
+    def write(self, result: Dict[str, Any]) -> None:
+        self.stream.write(json.dumps(result, ensure_ascii=False) + '\n')
+        if self.line_buffered:
+            self.stream.flush()
+        self.count += 1
+
+
+class SARIFReportWriter(ReportWriter):
+    # SARIF 2.1.0 для GitHub code scanning и IDE. Результаты пишутся потоком, а описания
+    # правил копятся по мере появления и дописываются после них: порядок ключей JSON не важен
+    SCHEMA = 'https://json.schemastore.org/sarif-2.1.0.json'
+    LEVELS = {'LOW': 'note', 'MEDIUM': 'warning', 'HIGH': 'error', 'CRITICAL': 'error'}
+
+    def __init__(self, stream: TextIO, owns_stream: bool = False):
+        super().__init__(stream, owns_stream)
+        self.rules: Dict[str, int] = {}
+        self.notifications = []
+        self.stream.write(f'{{"version": "2.1.0", "$schema": "{self.SCHEMA}", "runs": [{{"results": [')
+
+    def write(self, result: Dict[str, Any]) -> None:
+        uri = Path(result['filename']).as_posix()
+        if result.get('status') == 'error' or result.get('status') in LIMIT_STATUSES:
+            self.notifications.append({
+                'level': 'warning',
+                'message': {'text': result.get('error', '')},
+                'locations': [{'physicalLocation': {'artifactLocation': {'uri': uri}}}]
+            })
+
+        for finding in result.get('findings', []):
+            rule_id = finding.get('detector') or 'Taiga'
+            rule_index = self.rules.setdefault(rule_id, len(self.rules))
+            entry = {
+                'ruleId': rule_id,
+                'ruleIndex': rule_index,
+                'level': self.LEVELS.get(finding['severity'], 'warning'),
+                'message': {'text': finding['description']},
+                'locations': [{'physicalLocation': {
+                    'artifactLocation': {'uri': uri},
+                    'region': {'startLine': max(finding.get('line') or 1, 1),
+                               'startColumn': (finding.get('col') or 0) + 1}
+                }}],
+                'properties': {'severity': finding['severity'], 'pattern': finding.get('pattern')}
+            }
+            self.stream.write(',\n' if self.count else '\n')
+            self.stream.write(json.dumps(entry, ensure_ascii=False))
+            self.count += 1
+
+    def close(self) -> None:
+        tool = {'driver': {
+            'name': 'Taiga',
+            'version': __version__,
+            'informationUri': 'https://github.com/Fderios/Taiga-analyzer',
+            'rules': [{'id': rule_id} for rule_id in self.rules]
+        }}
+        invocation = {'executionSuccessful': True, 'toolExecutionNotifications': self.notifications}
+        self.stream.write(f'\n], "tool": {json.dumps(tool, ensure_ascii=False)}, '
+                          f'"invocations": [{json.dumps(invocation, ensure_ascii=False)}]}}]}}\n')
+        super().close()
+
+
+NDJSON_SUFFIXES = ('.ndjson', '.jsonl')
+SARIF_SUFFIXES = ('.sarif', '.sarif.json')
+STORE_SUFFIXES = ('.db', '.sqlite', '.sqlite3')
+REPORT_WRITERS = {'json': JSONReportWriter, 'ndjson': NDJSONReportWriter, 'sarif': SARIFReportWriter}
+
+
+def report_format(path: str, fmt: Optional[str] = None) -> str:
+    # --format json - формат вывода в консоль, он не отменяет NDJSON по расширению файла
+    if fmt in ('ndjson', 'sarif'):
+        return fmt
+    if path.lower().endswith(NDJSON_SUFFIXES):
+        return 'ndjson'
+    if path.lower().endswith(SARIF_SUFFIXES):
+        return 'sarif'
+    return 'json'
+
+
+def open_report_writer(path: str, fmt: Optional[str] = None, label: Optional[str] = None) -> ReportWriter:
+    if path.lower().endswith(STORE_SUFFIXES):
+        # База результатов вместо файла отчета: находки пишутся пакетами в индексированные таблицы
+        from .store import StoreReportWriter
+        return StoreReportWriter(path, label=label)
+    writer_class = REPORT_WRITERS[report_format(path, fmt)]
+    return writer_class(open(path, 'w', encoding='utf-8'), owns_stream=True)
+
+
+def iter_report(path: str, chunk_size: int = 1 << 16) -> Iterator[Dict[str, Any]]:
+    # Отчет читается по одному результату: отчеты шардов большого репозитория не помещаются в память
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = f.read(chunk_size)
+        start = len(buffer) - len(buffer.lstrip())
+        array = buffer[start:start + 1] == '['
+        if array:
+            start += 1
+        eof = not buffer
+
+        while True:
+            # Пропускаем пробелы и запятые между элементами массива или строками NDJSON
+            while start < len(buffer) and buffer[start] in ' \t\r\n,':
+                start += 1
+            if start == len(buffer):
+                if eof:
+                    break
+                buffer, start = f.read(chunk_size), 0
+                eof = not buffer
+                continue
+            if array and buffer[start] == ']':
+                break
+
+            try:
+                result, end = decoder.raw_decode(buffer, start)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # Большой результат дочитываем удваивая буфер, чтобы не разбирать его заново на каждом куске
+                chunk = f.read(max(chunk_size, len(buffer) - start))
+                eof = not chunk
+                buffer = buffer[start:] + chunk
+                start = 0
+                continue
+
+            if not isinstance(result, dict):
+                raise ValueError(f'{path}: ожидался результат анализа файла, получено {type(result).__name__}')
+            yield result
+            start = end
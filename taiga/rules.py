@@ -0,0 +1,197 @@
+import ast
+import hashlib
+import json
+import os
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence
+
+SEVERITIES = ('LOW', 'MEDIUM', 'HIGH', 'CRITICAL')
+SEVERITY_LEVELS = {severity: level for level, severity in enumerate(SEVERITIES, 1)}
+
+# Пустая строка не может быть частью имени, поэтому служит ключом правила в узле дерева
+_RULE_KEY = ''
+COMPILED_FORMAT = 2
+
+
+class Rule(NamedTuple):
+    call: str
+    severity: str
+    description: str
+    id: str = ''
+
+
+# Префиксное дерево правил по сегментам имени вызова, от последнего к первому:
+# для os.path.join путь 'join' -> 'path' -> 'os' совпадает с порядком обхода
+# цепочки ast.Attribute от вызова к корневому имени, строки имен не собираются.
+class RuleIndex:
+
+    def __init__(self, rules: Iterable[Rule] = ()):
+        self.trie: Dict[str, dict] = {}
+        self.count = 0
+        for rule in rules:
+            self.add(rule)
+
+    def add(self, rule: Rule) -> None:
+        node = self.trie
+        for segment in reversed(rule.call.split('.')):
+            node = node.setdefault(segment, {})
+        if _RULE_KEY not in node:
+            self.count += 1
+        node[_RULE_KEY] = rule
+
+    def match(self, func: ast.AST) -> Optional[Rule]:
+        node = self.trie
+        while isinstance(func, ast.Attribute):
+            node = node.get(func.attr)
+            if node is None:
+                return None
+            func = func.value
+
+        if isinstance(func, ast.Name):
+            node = node.get(func.id)
+            if node is not None:
+                return node.get(_RULE_KEY)
+        return None
+
+    def may_match(self, func: ast.AST) -> bool:
+        # Последний сегмент имени есть среди правил: вызов мог быть импортирован под псевдонимом
+        if isinstance(func, ast.Attribute):
+            return func.attr in self.trie
+        return isinstance(func, ast.Name) and func.id in self.trie
+
+    def match_name(self, name: str) -> Optional[Rule]:
+        # То же сопоставление для уже собранного имени (индекс проекта хранит вызовы строками)
+        node = self.trie
+        for segment in reversed(name.split('.')):
+            # Пустой сегмент ('.os.system' из относительного импорта) совпал бы с ключом правила
+            if not segment:
+                return None
+            node = node.get(segment)
+            if not isinstance(node, dict):
+                return None
+        return node.get(_RULE_KEY)
+
+    def max_severity(self) -> Optional[str]:
+        levels = [SEVERITY_LEVELS[rule.severity] for rule in self.rules()]
+        return SEVERITIES[max(levels) - 1] if levels else None
+
+    def pruned(self, min_severity: str) -> 'RuleIndex':
+        min_level = SEVERITY_LEVELS[min_severity]
+        return RuleIndex(rule for rule in self.rules() if SEVERITY_LEVELS[rule.severity] >= min_level)
+
+    def rules(self) -> Iterator[Rule]:
+        stack = [self.trie]
+        while stack:
+            node = stack.pop()
+            for key, value in node.items():
+                if key == _RULE_KEY:
+                    yield value
+                else:
+                    stack.append(value)
+
+    def digest(self) -> str:
+        payload = json.dumps(sorted(self.rules()), ensure_ascii=False).encode('utf-8')
+        return hashlib.sha256(payload).hexdigest()
+
+    def to_data(self) -> Dict[str, Any]:
+        # Только словари, строки и списки: скомпилированный пакет читается json, а не pickle,
+        # и подложенный в каталог кэша файл не может выполнить код
+        return {'format': COMPILED_FORMAT, 'count': self.count, 'trie': self.trie}
+
+    @classmethod
+    def from_data(cls, data: Any) -> 'RuleIndex':
+        if not isinstance(data, dict) or data.get('format') != COMPILED_FORMAT:
+            raise ValueError('Неподдерживаемый формат скомпилированного пакета правил')
+        trie = data.get('trie')
+        stack = [trie]
+        while stack:
+            node = stack.pop()
+            if not isinstance(node, dict):
+                raise ValueError('Поврежденный скомпилированный пакет правил')
+            for key, value in node.items():
+                if key == _RULE_KEY:
+                    node[key] = Rule(*(str(field) for field in value))
+                else:
+                    stack.append(value)
+
+        index = cls()
+        index.trie = trie
+        index.count = int(data.get('count', 0))
+        return index
+
+    @classmethod
+    def load(cls, paths: Sequence[str], base_rules: Iterable[Rule] = (),
+             cache_dir: Optional[Path] = None) -> 'RuleIndex':
+        cache_file = None
+        if cache_dir is not None:
+            cache_file = Path(cache_dir) / 'rules' / f'{_packs_key(paths, base_rules)}.json'
+            try:
+                with open(cache_file, 'r', encoding='utf-8') as f:
+                    return cls.from_data(json.load(f))
+            except (OSError, ValueError, TypeError):
+                # Нет файла, другой формат или повреждение: пакет компилируется заново
+                pass
+
+        index = cls(base_rules)
+        for path in paths:
+            for rule in load_rule_pack(path):
+                index.add(rule)
+
+        if cache_file is not None:
+            try:
+                cache_file.parent.mkdir(parents=True, exist_ok=True)
+                tmp_file = cache_file.with_suffix(f'.{os.getpid()}.tmp')
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump(index.to_data(), f, ensure_ascii=False)
+                os.replace(tmp_file, cache_file)
+            except OSError:
+                pass
+
+        return index
+
+
+def _packs_key(paths: Sequence[str], base_rules: Iterable[Rule]) -> str:
+    # Ключ по метаданным файлов: скомпилированный пакет читается без разбора исходника
+    digest = hashlib.sha256(f'{COMPILED_FORMAT}'.encode('ascii'))
+    digest.update(json.dumps(sorted(base_rules), ensure_ascii=False).encode('utf-8'))
+    for path in paths:
+        stat = os.stat(path)
+        digest.update(f'\0{os.path.abspath(path)}\0{stat.st_size}\0{stat.st_mtime_ns}'.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def load_rule_pack(path: str) -> List[Rule]:
+    path = str(path)
+    if path.endswith('.toml'):
+        try:
+            import tomllib
+        except ImportError:
+            raise ValueError(f'Для пакета правил {path} нужен Python 3.11+ (tomllib)')
+        with open(path, 'rb') as f:
+            data = tomllib.load(f)
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+    pack_name = data.get('name', Path(path).stem)
+    rules = []
+    for i, entry in enumerate(data.get('rules', []), 1):
+        call = entry.get('call')
+        if isinstance(call, str):
+            # Python нормализует идентификаторы по NFKC, правила должны совпадать с ними
+            call = unicodedata.normalize('NFKC', call)
+        if not call or not all(segment.isidentifier() for segment in call.split('.')):
+            raise ValueError(f'{path}: правило #{i} - некорректное имя вызова: {call!r}')
+
+        severity = entry.get('severity', 'MEDIUM').upper()
+        if severity not in SEVERITIES:
+            raise ValueError(f'{path}: правило #{i} - неизвестный уровень серьезности: {severity}')
+
+        rules.append(Rule(
+            call=call,
+            severity=severity,
+            description=entry.get('description') or f'Вызов опасной функции: {call}',
+            id=entry.get('id') or f'{pack_name}:{i}'
+        ))
+    return rules
@@ -0,0 +1,207 @@
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import socketserver
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from . import __version__
+from .cache import MemoryCache, ResultCache
+from .client import default_socket_path
+from .core import TaigaAnalyzer, _init_worker, _analyze_data_chunk
+
+
+class AnalysisServer:
+    def __init__(self, socket_path: Optional[str] = None, jobs: int = 1,
+                 memory_entries: int = MemoryCache.DEFAULT_MAX_ENTRIES, config: Optional[str] = None, **options):
+        self.socket_path = Path(socket_path) if socket_path else default_socket_path()
+        self.jobs = jobs
+        # config_fingerprint() настроек запуска: клиент с другими правилами или порогом анализирует сам
+        self.config = config
+        self.memory = MemoryCache(memory_entries)
+        self.analyzer = TaigaAnalyzer(**options)
+        self.stats = Counter()
+        self.started = time.time()
+        self._options = options
+        # Детекторы хранят состояние файла, поэтому анализ в процессе демона идет под замком
+        self._lock = threading.Lock()
+        self._executor = None
+        self._server = None
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        if self.jobs <= 1:
+            return None
+        if self._executor is None:
+            # fork из многопоточного процесса может унаследовать захваченные замки
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('forkserver') if 'forkserver' in methods else None
+            self._executor = ProcessPoolExecutor(max_workers=self.jobs, mp_context=context,
+                                                 initializer=_init_worker, initargs=(self._options,))
+        return self._executor
+
+    def analyze(self, paths: List[str], sources: List[Dict[str, str]]) -> Dict[str, Any]:
+        results: List[Optional[Dict[str, Any]]] = []
+        misses = []
+        keys = {}
+        stats = Counter()
+        fingerprint = self.analyzer.fingerprint()
+
+        items = [(path, None) for path in paths]
+        items.extend((item.get('name', '<string>'), item.get('source', '')) for item in sources)
+
+        for index, (name, source) in enumerate(items):
+            if source is None:
+                try:
+                    with open(name, 'rb') as f:
+                        data = f.read()
+                except OSError as e:
+                    results.append(self.analyzer._error_result(name, f'Не удалось прочитать файл: {e}'))
+                    continue
+            else:
+                data = source.encode('utf-8', 'surrogatepass')
+
+            key = ResultCache.make_key(data, fingerprint)
+            cached = self.memory.get(key)
+            if cached is not None:
+                stats['memory_hits'] += 1
+                results.append({'filename': name, **cached})
+                continue
+
+            results.append(None)
+            keys[index] = key
+            misses.append((index, name, data))
+
+        for index, result in zip((index for index, _, _ in misses), self._analyze_misses(misses, stats)):
+            results[index] = result
+            cached = dict(result)
+            del cached['filename']
+            self.memory.put(keys[index], cached)
+
+        self.stats.update(stats)
+        self.stats['files'] += len(items)
+        self.stats['requests'] += 1
+        return {'results': results, 'stats': dict(stats)}
+
+    def _analyze_misses(self, misses: list, stats: Counter) -> List[Dict[str, Any]]:
+        items = [(name, data) for _, name, data in misses]
+        executor = self._get_executor()
+
+        if executor is None or len(items) < TaigaAnalyzer.PARALLEL_MIN_FILES:
+            with self._lock:
+                results = [self.analyzer.analyze_data(data, name) for name, data in items]
+                self.analyzer.flush()
+                stats.update(self.analyzer.pop_stats())
+            return results
+
+        size = TaigaAnalyzer.CHUNK_SIZE
+        futures = [executor.submit(_analyze_data_chunk, items[i:i + size]) for i in range(0, len(items), size)]
+        results = []
+        for future in futures:
+            chunk_results, chunk_stats, _ = future.result()
+            stats.update(chunk_stats)
+            results.extend(chunk_results)
+        return results
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        command = request.get('command', 'analyze')
+
+        if command == 'analyze':
+            return self.analyze(request.get('paths', []), request.get('sources', []))
+        if command == 'ping':
+            return {'version': __version__, 'pid': os.getpid(), 'fingerprint': self.analyzer.fingerprint(),
+                    'config': self.config}
+        if command == 'stats':
+            return {
+                'stats': dict(self.stats),
+                'memory_entries': len(self.memory),
+                'uptime': round(time.time() - self.started, 1)
+            }
+        if command == 'clear':
+            self.memory.clear()
+            return {'cleared': True}
+        if command == 'shutdown':
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {'shutdown': True}
+        return {'error': f'неизвестная команда: {command}'}
+
+    def _remove_stale_socket(self) -> None:
+        if not self.socket_path.exists():
+            return
+
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(str(self.socket_path))
+        except OSError:
+            self.socket_path.unlink()
+        else:
+            raise RuntimeError(f'демон уже запущен: {self.socket_path}')
+        finally:
+            probe.close()
+
+    def serve_forever(self) -> None:
+        self._remove_stale_socket()
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Сокет доступен только владельцу: демон читает любые файлы от его имени
+        old_umask = os.umask(0o177)
+        try:
+            self._server = _ThreadingUnixServer(str(self.socket_path), _RequestHandler)
+        finally:
+            os.umask(old_umask)
+        self._server.analysis_server = self
+
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+            self.analyzer.flush()
+            if self.analyzer.cache is not None:
+                self.analyzer.cache.close()
+            try:
+                self.socket_path.unlink()
+            except OSError:
+                pass
+
+    def shutdown(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+
+
+class _ThreadingUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+
+    def handle(self) -> None:
+        server = self.server.analysis_server
+        # Одно соединение - сколько угодно запросов, по строке JSON на запрос и на ответ
+        for line in self.rfile:
+            try:
+                response = server.handle(json.loads(line))
+            except (ValueError, TypeError, AttributeError) as e:
+                response = {'error': f'некорректный запрос: {e}'}
+            except Exception as e:
+                response = {'error': f'ошибка анализа: {e}'}
+            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+            self.wfile.flush()
+
+
+def serve(socket_path: Optional[str] = None, jobs: int = 1,
+          memory_entries: int = MemoryCache.DEFAULT_MAX_ENTRIES, config: Optional[str] = None, **options) -> None:
+    server = AnalysisServer(socket_path, jobs, memory_entries, config, **options)
+
+    def stop(signum, frame):
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    server.serve_forever()
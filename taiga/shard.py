@@ -0,0 +1,97 @@
+import hashlib
+import heapq
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise ValueError(f'шард задается как K/N, например 1/4: {value}')
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f'номер шарда должен быть от 1 до N: {value}')
+    return index, count
+
+
+def shard_of(rel_path: str, count: int) -> int:
+    # hash() в Python солится per-process, а шард должен совпадать на всех узлах CI
+    digest = hashlib.blake2b(rel_path.encode('utf-8', 'surrogateescape'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') % count
+
+
+def load_manifest(path: str) -> Dict[str, int]:
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or not all(isinstance(size, int) for size in data.values()):
+        raise ValueError(f'манифест должен быть объектом {{"путь": размер}}: {path}')
+    return data
+
+
+def write_manifest(paths: Iterable[str], root: str, path: str) -> int:
+    prefix = _prefix(root)
+    sizes = {}
+    for file_path in paths:
+        try:
+            sizes[_relative(file_path, prefix)] = os.stat(file_path).st_size
+        except OSError:
+            continue
+
+    target = Path(path)
+    tmp_path = target.with_name(f'{target.name}.{os.getpid()}.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(dict(sorted(sizes.items())), f, ensure_ascii=False, indent=0)
+    os.replace(tmp_path, target)
+    return len(sizes)
+
+
+def _prefix(root: str) -> str:
+    root = str(Path(root))
+    return '' if root == '.' else root.rstrip(os.sep) + os.sep
+
+
+def _relative(path: str, prefix: str) -> str:
+    if prefix and path.startswith(prefix):
+        path = path[len(prefix):]
+    return path.replace(os.sep, '/')
+
+
+class ShardFilter:
+    # Разбор маленького файла тоже чего-то стоит, поэтому к размеру добавляется постоянная часть
+    FILE_OVERHEAD = 4096
+
+    def __init__(self, index: int, count: int, root: str = '.', manifest: Optional[Dict[str, int]] = None):
+        self.index = index
+        self.count = count
+        self.prefix = _prefix(root)
+        self.skipped = 0
+        self._assigned = self._balance(manifest) if manifest else {}
+
+    def _balance(self, manifest: Dict[str, int]) -> Dict[str, int]:
+        # Жадная раскладка: самый большой из оставшихся файлов уходит в наименее загруженный шард.
+        # Порядок полностью определен содержимым манифеста, поэтому все узлы получают одно разбиение
+        loads = [(0, shard) for shard in range(self.count)]
+        assigned = {}
+        for rel_path, size in sorted(manifest.items(), key=lambda item: (-item[1], item[0])):
+            load, shard = loads[0]
+            assigned[rel_path] = shard
+            heapq.heapreplace(loads, (load + size + self.FILE_OVERHEAD, shard))
+        return assigned
+
+    def shard_for(self, rel_path: str) -> int:
+        # Файлы, которых нет в манифесте (новые), раскладываются по хэшу
+        shard = self._assigned.get(rel_path)
+        return shard_of(rel_path, self.count) if shard is None else shard
+
+    def accepts(self, rel_path: str) -> bool:
+        return self.shard_for(rel_path) == self.index - 1
+
+    def filter(self, paths: Iterable[Union[str, bytes]]) -> Iterator[Union[str, bytes]]:
+        for path in paths:
+            rel_path = os.fsdecode(path)
+            if self.accepts(_relative(rel_path, self.prefix)):
+                yield path
+            else:
+                self.skipped += 1
@@ -0,0 +1,279 @@
+import os
+import re
+import sqlite3
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from . import __version__
+from .rules import SEVERITIES, SEVERITY_LEVELS
+
+GLOB_CHARS = re.compile(r'[*?\[]')
+
+# Повторяющиеся строки (детектор, паттерн, описание) хранятся один раз и
+# находятся по уникальному индексу, в находке остаются только целые числа
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS runs ('
+    'id INTEGER PRIMARY KEY, label TEXT, command TEXT, cwd TEXT, version TEXT, '
+    'started REAL NOT NULL, finished REAL, files INTEGER NOT NULL DEFAULT 0, '
+    'findings INTEGER NOT NULL DEFAULT 0)',
+    'CREATE TABLE IF NOT EXISTS files ('
+    'id INTEGER PRIMARY KEY, run_id INTEGER NOT NULL REFERENCES runs (id), path TEXT NOT NULL, '
+    'status TEXT NOT NULL, risk_score REAL NOT NULL, findings INTEGER NOT NULL, error TEXT)',
+    'CREATE TABLE IF NOT EXISTS detectors (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)',
+    'CREATE TABLE IF NOT EXISTS patterns (id INTEGER PRIMARY KEY, text TEXT NOT NULL UNIQUE)',
+    'CREATE TABLE IF NOT EXISTS messages (id INTEGER PRIMARY KEY, text TEXT NOT NULL UNIQUE)',
+    'CREATE TABLE IF NOT EXISTS findings ('
+    'id INTEGER PRIMARY KEY, run_id INTEGER NOT NULL, file_id INTEGER NOT NULL REFERENCES files (id), '
+    'detector_id INTEGER NOT NULL, severity INTEGER NOT NULL, pattern_id INTEGER NOT NULL, '
+    'message_id INTEGER NOT NULL, line INTEGER NOT NULL, col INTEGER NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS files_run_path ON files (run_id, path)',
+    'CREATE INDEX IF NOT EXISTS findings_run_detector ON findings (run_id, detector_id, severity)',
+    'CREATE INDEX IF NOT EXISTS findings_pattern ON findings (pattern_id, run_id, severity)',
+    'CREATE INDEX IF NOT EXISTS findings_file ON findings (file_id)',
+)
+
+
+class StoreError(Exception):
+    pass
+
+
+class ResultStore:
+    # Файлы и находки пишутся пакетами: одна транзакция на FLUSH_FILES файлов
+    FLUSH_FILES = 1000
+    FLUSH_FINDINGS = 50_000
+
+    def __init__(self, path: str):
+        self.path = str(path)
+        self._conn = None
+        self._names: Dict[str, Dict[str, int]] = {'detectors': {}, 'patterns': {}, 'messages': {}}
+        self._pending: List[Dict[str, Any]] = []
+        self._pending_findings = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            try:
+                conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute('PRAGMA synchronous=NORMAL')
+                for statement in SCHEMA:
+                    conn.execute(statement)
+            except sqlite3.Error as e:
+                raise StoreError(f'{self.path}: {e}')
+            self._conn = conn
+        return self._conn
+
+    def begin_run(self, label: Optional[str] = None, command: Optional[str] = None) -> int:
+        conn = self._connect()
+        cursor = conn.execute(
+            'INSERT INTO runs (label, command, cwd, version, started) VALUES (?, ?, ?, ?, ?)',
+            (label, command, os.getcwd(), __version__, time.time())
+        )
+        return cursor.lastrowid
+
+    def add(self, run_id: int, result: Dict[str, Any]) -> None:
+        self._pending.append(result)
+        self._pending_findings += len(result.get('findings', []))
+        if len(self._pending) >= self.FLUSH_FILES or self._pending_findings >= self.FLUSH_FINDINGS:
+            self.flush(run_id)
+
+    def _name_id(self, conn: sqlite3.Connection, table: str, column: str, value: str) -> int:
+        ids = self._names[table]
+        name_id = ids.get(value)
+        if name_id is None:
+            conn.execute(f'INSERT OR IGNORE INTO {table} ({column}) VALUES (?)', (value,))
+            name_id = conn.execute(f'SELECT id FROM {table} WHERE {column} = ?', (value,)).fetchone()[0]
+            ids[value] = name_id
+        return name_id
+
+    def flush(self, run_id: int) -> None:
+        if not self._pending:
+            return
+
+        conn = self._connect()
+        files = 0
+        findings = 0
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            for result in self._pending:
+                result_findings = result.get('findings', [])
+                cursor = conn.execute(
+                    'INSERT INTO files (run_id, path, status, risk_score, findings, error) VALUES (?, ?, ?, ?, ?, ?)',
+                    (run_id, result['filename'], result.get('status', 'success'), result.get('risk_score', 0.0),
+                     len(result_findings), result.get('error'))
+                )
+                file_id = cursor.lastrowid
+                conn.executemany(
+                    'INSERT INTO findings (run_id, file_id, detector_id, severity, pattern_id, message_id, line, col) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    [(run_id, file_id,
+                      self._name_id(conn, 'detectors', 'name', finding.get('detector') or ''),
+                      SEVERITY_LEVELS.get(finding['severity'], 1),
+                      self._name_id(conn, 'patterns', 'text', str(finding.get('pattern') or '')),
+                      self._name_id(conn, 'messages', 'text', finding.get('description') or ''),
+                      finding.get('line') or 0, finding.get('col') or 0)
+                     for finding in result_findings]
+                )
+                files += 1
+                findings += len(result_findings)
+            conn.execute('UPDATE runs SET files = files + ?, findings = findings + ? WHERE id = ?',
+                         (files, findings, run_id))
+
+        self._pending = []
+        self._pending_findings = 0
+
+    def finish_run(self, run_id: int) -> None:
+        self.flush(run_id)
+        conn = self._connect()
+        conn.execute('UPDATE runs SET finished = ? WHERE id = ?', (time.time(), run_id))
+        # Статистика индексов для планировщика: без нее фильтр по пути может пойти через все находки запуска
+        conn.execute('PRAGMA optimize')
+
+    def runs(self) -> List[Dict[str, Any]]:
+        cursor = self._connect().execute(
+            'SELECT id, label, command, cwd, version, started, finished, files, findings FROM runs ORDER BY id')
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor]
+
+    def resolve_runs(self, run: Optional[str]) -> Optional[List[int]]:
+        # None - все запуски; по умолчанию последний; иначе номер или метка
+        conn = self._connect()
+        if run == 'all':
+            return None
+        if run is None or run == 'last':
+            row = conn.execute('SELECT MAX(id) FROM runs').fetchone()
+            return [row[0]] if row[0] is not None else []
+        if run.isdigit() and conn.execute('SELECT 1 FROM runs WHERE id = ?', (int(run),)).fetchone():
+            return [int(run)]
+        return [row[0] for row in conn.execute('SELECT id FROM runs WHERE label = ? ORDER BY id', (run,))]
+
+    def _where(self, runs: Optional[Sequence[int]], detectors: Sequence[str], severities: Sequence[str],
+               min_severity: Optional[str], patterns: Sequence[str], paths: Sequence[str]) -> Tuple[str, list]:
+        # Все условия накладываются на столбцы findings: имена, паттерны и пути сначала
+        # превращаются в id подзапросом по уникальному индексу, дальше работают индексы находок
+        clauses = []
+        params = []
+
+        def any_of(column: str, values: Sequence, glob: bool = False) -> str:
+            # Значения без * ? [ сравниваются на равенство
+            params.extend(values)
+            return '(' + ' OR '.join(
+                f'{column} GLOB ?' if glob and GLOB_CHARS.search(value) else f'{column} = ?' for value in values
+            ) + ')'
+
+        if runs is not None and not paths:
+            clauses.append(any_of('fd.run_id', runs))
+        if detectors:
+            clauses.append(f'fd.detector_id IN (SELECT id FROM detectors WHERE {any_of("name", detectors)})')
+        if severities:
+            clauses.append(any_of('fd.severity', [SEVERITY_LEVELS[severity] for severity in severities]))
+        if min_severity:
+            clauses.append('fd.severity >= ?')
+            params.append(SEVERITY_LEVELS[min_severity])
+        if patterns:
+            clauses.append(f'fd.pattern_id IN (SELECT id FROM patterns WHERE {any_of("text", patterns, glob=True)})')
+        if paths:
+            # Запуск выбирается через файлы: так планировщик идет от путей, а не от всех находок запуска
+            files = 'SELECT id FROM files WHERE '
+            if runs is not None:
+                files += any_of('run_id', runs) + ' AND '
+            clauses.append(f'fd.file_id IN ({files}{any_of("path", paths, glob=True)})')
+
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def query(self, runs: Optional[Sequence[int]] = None, detectors: Sequence[str] = (),
+              severities: Sequence[str] = (), min_severity: Optional[str] = None,
+              patterns: Sequence[str] = (), paths: Sequence[str] = (),
+              limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        where, params = self._where(runs, detectors, severities, min_severity, patterns, paths)
+        sql = ('SELECT fd.run_id, f.path, fd.line, fd.col, fd.severity, d.name, p.text, m.text '
+               'FROM findings fd '
+               'JOIN files f ON f.id = fd.file_id '
+               'JOIN detectors d ON d.id = fd.detector_id '
+               'JOIN patterns p ON p.id = fd.pattern_id '
+               'JOIN messages m ON m.id = fd.message_id'
+               f'{where}')
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+
+        for run_id, path, line, col, severity, detector, pattern, description in self._connect().execute(sql, params):
+            yield {
+                'run': run_id,
+                'filename': path,
+                'line': line,
+                'col': col,
+                'severity': SEVERITIES[severity - 1],
+                'detector': detector,
+                'pattern': pattern,
+                'description': description
+            }
+
+    GROUPS = {
+        'run': 'fd.run_id',
+        'detector': 'd.name',
+        'severity': 'fd.severity',
+        'pattern': 'p.text',
+        'file': 'f.path',
+    }
+
+    def count(self, group_by: Optional[str] = None, runs: Optional[Sequence[int]] = None,
+              detectors: Sequence[str] = (), severities: Sequence[str] = (), min_severity: Optional[str] = None,
+              patterns: Sequence[str] = (), paths: Sequence[str] = (),
+              limit: Optional[int] = None) -> List[Tuple[Any, int]]:
+        where, params = self._where(runs, detectors, severities, min_severity, patterns, paths)
+        if group_by is None:
+            row = self._connect().execute(f'SELECT COUNT(*) FROM findings fd{where}', params).fetchone()
+            return [(None, row[0])]
+
+        # Для группировки по имени присоединяется только нужная таблица
+        joins = {
+            'detector': ' JOIN detectors d ON d.id = fd.detector_id',
+            'pattern': ' JOIN patterns p ON p.id = fd.pattern_id',
+            'file': ' JOIN files f ON f.id = fd.file_id',
+        }.get(group_by, '')
+        column = self.GROUPS[group_by]
+        sql = f'SELECT {column}, COUNT(*) AS n FROM findings fd{joins}{where} GROUP BY {column} ORDER BY n DESC'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        rows = self._connect().execute(sql, params).fetchall()
+        if group_by == 'severity':
+            rows = [(SEVERITIES[level - 1], n) for level, n in rows]
+        return rows
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class StoreReportWriter:
+    # Тот же интерфейс, что у ReportWriter: -o results.db пишет запуск в базу
+
+    def __init__(self, path: str, label: Optional[str] = None, command: Optional[str] = None):
+        self.store = ResultStore(path)
+        self.run_id = self.store.begin_run(label, command if command is not None else ' '.join(sys.argv))
+        self.count = 0
+
+    def write(self, result: Dict[str, Any]) -> None:
+        self.store.add(self.run_id, result)
+        self.count += 1
+
+    def close(self) -> None:
+        try:
+            self.store.finish_run(self.run_id)
+        finally:
+            self.store.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def open_store(path: str) -> ResultStore:
+    if not os.path.exists(path):
+        raise StoreError(f'{path}: база результатов не найдена')
+    return ResultStore(path)
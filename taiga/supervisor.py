@@ -0,0 +1,189 @@
+import multiprocessing
+import time
+from collections import deque
+from multiprocessing.connection import wait
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from .limits import set_memory_limit
+
+
+def _worker_main(conn, initializer: Callable, initargs: tuple, task: Callable, finish: Callable,
+                 max_memory: Optional[int]) -> None:
+    initializer(*initargs)
+    set_memory_limit(max_memory)
+    # Импорт детекторов и загрузка правил не должны съедать лимит времени первого файла
+    conn.send(('ready', None))
+    while True:
+        try:
+            chunk = conn.recv()
+        except EOFError:
+            return
+        if chunk is None:
+            return
+        # Результат отправляется после каждого файла: по нему супервизор знает, какой файл сейчас в работе
+        for item in chunk:
+            conn.send(('result', task(item)))
+        conn.send(('done', finish()))
+
+
+class _Batch:
+    # Результаты пакета в порядке файлов; остаток пакета после убитого воркера дописывает другой воркер
+    __slots__ = ('results', 'remaining')
+
+    def __init__(self, size: int):
+        self.results: List[Dict[str, Any]] = []
+        self.remaining = size
+
+    def add(self, results: List[Dict[str, Any]]) -> None:
+        self.results.extend(results)
+        self.remaining -= 1
+
+
+class _Worker:
+
+    def __init__(self, context, args: tuple):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, *args), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.batch: Optional[_Batch] = None
+        self.chunk: List[Any] = []
+        self.position = 0
+        self.deadline = None
+        self.ready = False
+
+    def start(self, batch: _Batch, chunk: List[Any], timeout: Optional[float]) -> None:
+        # Пакет ждет в канале, пока воркер запускается; отсчет времени начинается с сообщения ready
+        self.batch = batch
+        self.chunk = chunk
+        self.position = 0
+        self.restart_deadline(timeout)
+        self.conn.send(chunk)
+
+    def restart_deadline(self, timeout: Optional[float]) -> None:
+        self.deadline = time.monotonic() + timeout if timeout is not None and self.ready else None
+
+    def current(self) -> Optional[Any]:
+        # None - все файлы пакета готовы, воркер сбрасывает кэш и статистику
+        return self.chunk[self.position] if self.position < len(self.chunk) else None
+
+    def rest(self) -> List[Any]:
+        return self.chunk[self.position + 1:]
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(1)
+        if self.process.is_alive():
+            self.kill()
+        else:
+            self.conn.close()
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class SupervisedPool:
+    # Каждый файл анализируется под контролем: воркер, превысивший время, убивается и заменяется новым,
+    # а остаток его пакета уходит другим воркерам. ProcessPoolExecutor так не умеет - после гибели
+    # одного процесса весь пул становится непригоден
+
+    def __init__(self, jobs: int, initializer: Callable, initargs: tuple, task: Callable, finish: Callable,
+                 timeout: Optional[float] = None, max_memory: Optional[int] = None):
+        self.jobs = max(1, jobs)
+        self.timeout = timeout
+        self._args = (initializer, initargs, task, finish, max_memory)
+        self._context = multiprocessing.get_context()
+        self.restarts = 0
+
+    def run(self, chunks: Iterator[List[Any]], on_finish: Callable[[Any], None],
+            on_failure: Callable[[Any, str, str], Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        # Результаты копятся по пакетам и отдаются в порядке входа, как у _run_pool
+        ordered: Deque[_Batch] = deque()
+        requeued: Deque[Tuple[_Batch, List[Any]]] = deque()
+        busy: Dict[Any, _Worker] = {}
+        idle: List[_Worker] = []
+        window = self.jobs * 4
+
+        def next_chunk() -> Optional[Tuple[_Batch, List[Any]]]:
+            if requeued:
+                return requeued.popleft()
+            # Окно ограничено: зависший первый пакет не копит в памяти результаты всего проекта
+            if len(ordered) >= window:
+                return None
+            chunk = next(chunks, None)
+            if chunk is None:
+                return None
+            batch = _Batch(len(chunk))
+            ordered.append(batch)
+            return batch, chunk
+
+        def retire(worker: _Worker) -> None:
+            del busy[worker.conn]
+            rest = worker.rest()
+            worker.kill()
+            self.restarts += 1
+            if rest:
+                requeued.append((worker.batch, rest))
+
+        def fail(worker: _Worker, status: str, message: str) -> None:
+            item = worker.current()
+            retire(worker)
+            if item is not None:
+                worker.batch.add([on_failure(item, status, message)])
+
+        try:
+            while True:
+                while ordered and ordered[0].remaining == 0:
+                    yield from ordered.popleft().results
+
+                while len(busy) < self.jobs:
+                    entry = next_chunk()
+                    if entry is None:
+                        break
+                    worker = idle.pop() if idle else _Worker(self._context, self._args)
+                    worker.start(*entry, self.timeout)
+                    busy[worker.conn] = worker
+
+                if not busy:
+                    return
+
+                deadlines = [worker.deadline for worker in busy.values() if worker.deadline is not None]
+                wait_timeout = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+
+                for conn in wait(list(busy), wait_timeout):
+                    worker = busy[conn]
+                    try:
+                        kind, payload = conn.recv()
+                    except (EOFError, OSError):
+                        # Процесс умер сам: нехватка памяти вне Python или падение интерпретатора
+                        worker.process.join()
+                        fail(worker, 'error', f'Процесс анализа завершился с кодом {worker.process.exitcode}')
+                        continue
+
+                    if kind == 'ready':
+                        worker.ready = True
+                        worker.restart_deadline(self.timeout)
+                    elif kind == 'result':
+                        worker.position += 1
+                        worker.restart_deadline(self.timeout)
+                        worker.batch.add(payload)
+                    else:
+                        on_finish(payload)
+                        del busy[conn]
+                        idle.append(worker)
+
+                now = time.monotonic()
+                for worker in [worker for worker in busy.values()
+                               if worker.deadline is not None and worker.deadline <= now]:
+                    fail(worker, 'timeout', f'Превышено время анализа файла ({self.timeout:g} с)')
+        finally:
+            # Потребитель мог остановиться раньше (--fail-fast): занятые воркеры не дожидаемся
+            for worker in busy.values():
+                worker.kill()
+            for worker in idle:
+                worker.stop()
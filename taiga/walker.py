@@ -0,0 +1,229 @@
+import os
+import re
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+DEFAULT_PRUNE_DIRS = frozenset({
+    '.git', '.hg', '.svn', '.bzr',
+    '__pycache__', '.mypy_cache', '.pytest_cache', '.ruff_cache',
+    '.tox', '.nox', '.eggs',
+    '.venv', 'venv', 'node_modules', 'site-packages', 'dist-packages',
+})
+
+IGNORE_FILES = ('.gitignore', '.taigaignore')
+
+# Признак виртуального окружения, созданного venv/virtualenv под любым именем
+VENV_MARKER = 'pyvenv.cfg'
+
+
+def _translate_glob(pattern: str) -> str:
+    i, n = 0, len(pattern)
+    parts = []
+    while i < n:
+        c = pattern[i]
+        if c == '*':
+            if pattern[i:i + 3] == '**/':
+                parts.append('(?:.*/)?')
+                i += 3
+                continue
+            if pattern[i:i + 2] == '**':
+                parts.append('.*')
+                i += 2
+                continue
+            parts.append('[^/]*')
+        elif c == '?':
+            parts.append('[^/]')
+        elif c == '[':
+            end = pattern.find(']', i + 2 if pattern[i + 1:i + 2] in ('!', ']') else i + 1)
+            if end == -1:
+                parts.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                parts.append('[' + body.replace('\\', '\\\\') + ']')
+                i = end
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            parts.append(re.escape(pattern[i]))
+        else:
+            parts.append(re.escape(c))
+        i += 1
+    return ''.join(parts)
+
+
+class IgnoreRule:
+    __slots__ = ('base', 'regex', 'negate', 'dir_only')
+
+    def __init__(self, pattern: str, base: str = ''):
+        self.base = base
+        self.negate = pattern.startswith('!')
+        if self.negate:
+            pattern = pattern[1:]
+        elif pattern.startswith('\\'):
+            pattern = pattern[1:]
+
+        self.dir_only = pattern.endswith('/')
+        pattern = pattern.rstrip('/')
+
+        # Шаблон со слешем привязан к каталогу файла игнорирования, без слеша - к имени
+        anchored = '/' in pattern
+        pattern = pattern.lstrip('/')
+        prefix = '' if anchored else '(?:.*/)?'
+        self.regex = re.compile(prefix + _translate_glob(pattern) + r'\Z', re.DOTALL)
+
+    def matches(self, rel_path: str, is_dir: bool) -> bool:
+        if self.dir_only and not is_dir:
+            return False
+        if self.base:
+            if not rel_path.startswith(self.base):
+                return False
+            rel_path = rel_path[len(self.base):]
+        return self.regex.match(rel_path) is not None
+
+
+def parse_ignore_lines(lines: Iterable[str], base: str = '') -> List[IgnoreRule]:
+    rules = []
+    for line in lines:
+        line = line.rstrip('\n').rstrip('\r')
+        if not line.endswith('\\ '):
+            line = line.rstrip(' ')
+        if not line or line.startswith('#'):
+            continue
+        rules.append(IgnoreRule(line, base))
+    return rules
+
+
+def is_ignored(rules: List[IgnoreRule], rel_path: str, is_dir: bool) -> bool:
+    # Как в git: решает последнее совпавшее правило
+    ignored = False
+    for rule in rules:
+        if rule.negate == ignored and rule.matches(rel_path, is_dir):
+            ignored = not rule.negate
+    return ignored
+
+
+class FileWalker:
+
+    def __init__(self, root: str,
+                 exclude: Iterable[str] = (),
+                 use_ignore_files: bool = True,
+                 prune_dirs: Iterable[str] = DEFAULT_PRUNE_DIRS,
+                 max_file_size: Optional[int] = None,
+                 suffixes: Tuple[str, ...] = ('.py',),
+                 on_directory: Optional[Callable[[str, str, List[IgnoreRule]], None]] = None):
+        self.root = str(Path(root))
+        self.prefix = '' if self.root == '.' else self.root.rstrip(os.sep) + os.sep
+        self.exclude = parse_ignore_lines(exclude)
+        self.use_ignore_files = use_ignore_files
+        self.prune_dirs = frozenset(prune_dirs)
+        self.max_file_size = max_file_size
+        self.suffixes = suffixes
+        self.elapsed = 0.0
+        self.skipped = Counter()
+        # Вызывается для каждого обходимого каталога с его правилами игнорирования (нужно watch)
+        self.on_directory = on_directory
+
+    def path_for(self, rel_path: str) -> str:
+        return self.prefix + rel_path.replace('/', os.sep) if rel_path else self.root
+
+    def accepts_dir(self, name: str, rel_path: str, rules: List[IgnoreRule]) -> bool:
+        return name not in self.prune_dirs and not (rules and is_ignored(rules, rel_path, True))
+
+    def accepts_file(self, name: str, rel_path: str, rules: List[IgnoreRule]) -> bool:
+        return name.endswith(self.suffixes) and not (rules and is_ignored(rules, rel_path, False))
+
+    def __iter__(self) -> Iterator[str]:
+        # Время обхода копится только пока работает сам генератор, без анализа файлов
+        started = time.perf_counter()
+        try:
+            for path in self._walk():
+                self.elapsed += time.perf_counter() - started
+                yield path
+                started = time.perf_counter()
+        finally:
+            self.elapsed += time.perf_counter() - started
+
+    def walk(self, rel_dir: str = '', rules: Optional[List[IgnoreRule]] = None) -> Iterator[str]:
+        # Обход поддерева с уже накопленными правилами родительских каталогов
+        return self._walk(rel_dir, rules)
+
+    def _walk(self, rel_dir: str = '', rules: Optional[List[IgnoreRule]] = None) -> Iterator[str]:
+        prefix = self.prefix
+        visited = set()
+        stack = [(rel_dir, list(self.exclude) if rules is None else rules)]
+
+        while stack:
+            rel_dir, rules = stack.pop()
+            dir_path = self.path_for(rel_dir)
+
+            try:
+                stat = os.stat(dir_path)
+                # Каталоги по ссылкам обходим один раз: защита от циклов символических ссылок
+                identity = (stat.st_dev, stat.st_ino)
+                if identity in visited:
+                    self.skipped['symlink_loop'] += 1
+                    continue
+                visited.add(identity)
+
+                with os.scandir(dir_path) as it:
+                    entries = sorted(it, key=lambda e: e.name)
+            except OSError:
+                self.skipped['unreadable'] += 1
+                continue
+
+            names = {entry.name for entry in entries}
+            if rel_dir and self.prune_dirs and VENV_MARKER in names:
+                self.skipped['pruned'] += 1
+                continue
+
+            if self.use_ignore_files:
+                for ignore_name in IGNORE_FILES:
+                    if ignore_name in names:
+                        rules = rules + self._read_ignore_file(dir_path, ignore_name, rel_dir)
+
+            if self.on_directory is not None:
+                self.on_directory(dir_path, rel_dir, rules)
+
+            subdirs = []
+            for entry in entries:
+                rel_path = rel_dir + entry.name
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    continue
+
+                if is_dir:
+                    if entry.name in self.prune_dirs:
+                        self.skipped['pruned'] += 1
+                    elif rules and is_ignored(rules, rel_path, True):
+                        self.skipped['ignored'] += 1
+                    else:
+                        subdirs.append((rel_path + '/', rules))
+                    continue
+
+                if not entry.name.endswith(self.suffixes):
+                    continue
+                if rules and is_ignored(rules, rel_path, False):
+                    self.skipped['ignored'] += 1
+                    continue
+                if self.max_file_size is not None:
+                    try:
+                        if entry.stat().st_size > self.max_file_size:
+                            self.skipped['too_large'] += 1
+                            continue
+                    except OSError:
+                        continue
+
+                yield prefix + rel_path.replace('/', os.sep)
+
+            stack.extend(reversed(subdirs))
+
+    def _read_ignore_file(self, dir_path: str, name: str, rel_dir: str) -> List[IgnoreRule]:
+        try:
+            with open(os.path.join(dir_path, name), 'r', encoding='utf-8', errors='replace') as f:
+                return parse_ignore_lines(f, rel_dir)
+        except OSError:
+            return []
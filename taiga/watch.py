@@ -0,0 +1,325 @@
+import ctypes
+import ctypes.util
+import errno
+import hashlib
+import json
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from .report import IncrementalSummary
+from .walker import IGNORE_FILES, FileWalker
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE |
+              IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+EVENT_HEADER = struct.Struct('iIII')
+
+
+class IndexEntry(NamedTuple):
+    mtime_ns: int
+    size: int
+    digest: str
+    result: Dict[str, Any]
+
+
+class Change(NamedTuple):
+    filename: str
+    old: Optional[Dict[str, Any]]
+    new: Optional[Dict[str, Any]]
+
+
+class Changes(NamedTuple):
+    paths: Set[str]
+    removed_dirs: Set[str]
+    rescan: bool
+
+
+class FileIndex:
+    VERSION = 1
+
+    def __init__(self, fingerprint: str):
+        self.fingerprint = fingerprint
+        self.entries: Dict[str, IndexEntry] = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @classmethod
+    def load(cls, path: str, fingerprint: str) -> 'FileIndex':
+        index = cls(fingerprint)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return index
+
+        # Результаты других версий детекторов или правил недействительны
+        if data.get('version') != cls.VERSION or data.get('fingerprint') != fingerprint:
+            return index
+
+        for filename, (mtime_ns, size, digest, result) in data.get('entries', {}).items():
+            index.entries[filename] = IndexEntry(mtime_ns, size, digest, result)
+        return index
+
+    def save(self, path: str) -> None:
+        data = {
+            'version': self.VERSION,
+            'fingerprint': self.fingerprint,
+            'entries': {filename: list(entry) for filename, entry in self.entries.items()}
+        }
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_name(f'{target.name}.{os.getpid()}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, target)
+
+
+# hashlib.file_digest появился только в Python 3.11
+DIGEST_CHUNK = 1 << 16
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(DIGEST_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PollingWatcher:
+    name = 'poll'
+
+    def __init__(self, walker: FileWalker, interval: float = 1.0):
+        self.walker = walker
+        self.interval = interval
+
+    def poll(self, timeout: Optional[float] = None) -> Optional[Changes]:
+        # Изменения ищет полный обход со сравнением mtime и размера
+        time.sleep(self.interval if timeout is None else min(self.interval, timeout))
+        return Changes(set(), set(), True)
+
+    def close(self) -> None:
+        pass
+
+
+def _load_libc():
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+    except OSError:
+        return None
+    if not hasattr(libc, 'inotify_init1'):
+        return None
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    return libc
+
+
+class InotifyWatcher:
+    name = 'inotify'
+    # Серия записей в один файл объединяется, но не дольше MAX_DELAY
+    MAX_DELAY = 2.0
+
+    def __init__(self, walker: FileWalker, debounce: float = 0.2):
+        self._libc = _load_libc()
+        if self._libc is None:
+            raise OSError(errno.ENOSYS, 'inotify недоступен')
+
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1')
+
+        self.walker = walker
+        self.debounce = debounce
+        self._dirs: Dict[int, Tuple[str, str, list]] = {}
+        walker.on_directory = self.add_directory
+
+    def add_directory(self, dir_path: str, rel_dir: str, rules: list) -> None:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(dir_path), WATCH_MASK)
+        if wd < 0:
+            code = ctypes.get_errno()
+            # Исчерпан лимит fs.inotify.max_user_watches - вызывающий перейдет на опрос
+            if code == errno.ENOSPC:
+                raise OSError(code, 'лимит inotify исчерпан')
+            return
+        self._dirs[wd] = (dir_path, rel_dir, rules)
+
+    def _read_events(self) -> Iterator[Tuple[int, int, str]]:
+        while True:
+            try:
+                buffer = os.read(self.fd, 65536)
+            except BlockingIOError:
+                return
+            offset = 0
+            while offset < len(buffer):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(buffer, offset)
+                offset += EVENT_HEADER.size
+                name = buffer[offset:offset + length].rstrip(b'\0')
+                offset += length
+                yield wd, mask, os.fsdecode(name)
+
+    def poll(self, timeout: Optional[float] = None) -> Optional[Changes]:
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return None
+
+        changes = Changes(set(), set(), False)
+        deadline = time.monotonic() + self.MAX_DELAY
+        while True:
+            if self._collect(changes):
+                changes = changes._replace(rescan=True)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            ready, _, _ = select.select([self.fd], [], [], min(self.debounce, remaining))
+            if not ready:
+                break
+        return changes
+
+    def _collect(self, changes: Changes) -> bool:
+        rescan = False
+        for wd, mask, name in self._read_events():
+            if mask & IN_Q_OVERFLOW:
+                rescan = True
+                continue
+
+            if mask & IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+
+            watched = self._dirs.get(wd)
+            if watched is None or not name:
+                continue
+
+            dir_path, rel_dir, rules = watched
+            rel_path = rel_dir + name
+            if name in IGNORE_FILES:
+                rescan = True
+            elif mask & IN_ISDIR:
+                if mask & (IN_MOVED_FROM | IN_DELETE):
+                    changes.removed_dirs.add(self.walker.path_for(rel_path) + os.sep)
+                elif mask & (IN_CREATE | IN_MOVED_TO) and self.walker.accepts_dir(name, rel_path, rules):
+                    # Новый каталог мог наполниться до появления наблюдения за ним
+                    changes.paths.update(self.walker.walk(rel_path + '/', rules))
+            elif self.walker.accepts_file(name, rel_path, rules):
+                changes.paths.add(self.walker.path_for(rel_path))
+        return rescan
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+def create_watcher(walker: FileWalker, interval: float = 1.0, debounce: float = 0.2,
+                   polling: bool = False):
+    if not polling:
+        try:
+            return InotifyWatcher(walker, debounce)
+        except OSError:
+            pass
+    return PollingWatcher(walker, interval)
+
+
+class WatchSession:
+
+    def __init__(self, analyzer, walker: FileWalker, index: FileIndex, jobs: int = 1):
+        self.analyzer = analyzer
+        self.walker = walker
+        self.index = index
+        self.jobs = jobs
+        self.summary = IncrementalSummary()
+        for filename, entry in index.entries.items():
+            self.summary.add({'filename': filename, **entry.result})
+
+    def rescan(self) -> List[Change]:
+        seen = set()
+        candidates = []
+        for path in self.walker:
+            seen.add(path)
+            candidates.append(path)
+
+        changes = self.refresh(candidates)
+        for filename in [filename for filename in self.index.entries if filename not in seen]:
+            changes.append(self._remove(filename))
+        return changes
+
+    def apply(self, changes: Changes) -> List[Change]:
+        if changes.rescan:
+            return self.rescan()
+
+        removed = []
+        for prefix in changes.removed_dirs:
+            removed.extend(self._remove(filename) for filename in list(self.index.entries)
+                           if filename.startswith(prefix))
+        return removed + self.refresh(sorted(changes.paths))
+
+    def refresh(self, paths: List[str]) -> List[Change]:
+        changes = []
+        pending = []
+        max_file_size = self.walker.max_file_size
+
+        for path in paths:
+            entry = self.index.entries.get(path)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                if entry is not None:
+                    changes.append(self._remove(path))
+                continue
+
+            if max_file_size is not None and stat.st_size > max_file_size:
+                if entry is not None:
+                    changes.append(self._remove(path))
+                continue
+
+            if entry is not None and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+                continue
+
+            try:
+                digest = _file_digest(path)
+            except OSError:
+                continue
+
+            # touch и сохранение без правок не требуют повторного анализа
+            if entry is not None and entry.digest == digest:
+                self.index.entries[path] = entry._replace(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+                continue
+
+            pending.append((path, stat, digest))
+
+        results = self.analyzer.iter_analyze([path for path, _, _ in pending], jobs=self.jobs)
+        for result, (path, stat, digest) in zip(results, pending):
+            entry = self.index.entries.get(path)
+            stored = dict(result)
+            del stored['filename']
+            self.index.entries[path] = IndexEntry(stat.st_mtime_ns, stat.st_size, digest, stored)
+            self.summary.add(result)
+            changes.append(Change(path, entry.result if entry is not None else None, result))
+
+        return changes
+
+    def _remove(self, filename: str) -> Change:
+        entry = self.index.entries.pop(filename)
+        self.summary.remove(filename)
+        return Change(filename, entry.result, None)
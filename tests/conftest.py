@@ -0,0 +1,39 @@
+import pytest
+
+# Образец вредоносного кода для ручной проверки анализатора: импорт выполняет его
+collect_ignore = ['test_malicious.py']
+
+SAMPLES = {
+    'clean.py': 'def add(a, b):\n    return a + b\n',
+    'shell.py': 'import os\nos.system("ls")\n',
+    'dynamic.py': 'code = input()\neval(code)\n',
+    'obfuscated.py': 'import base64\nexec(base64.b64decode("cHJpbnQoMSk="))\n',
+    'broken.py': 'def broken(:\n    eval(x)\n',
+}
+
+
+def write_tree(root, files):
+    for name, source in files.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(source, encoding='utf-8')
+    return root
+
+
+@pytest.fixture
+def sample_tree(tmp_path):
+    # Больше PARALLEL_MIN_FILES файлов, чтобы анализ с jobs > 1 действительно шел в пуле
+    files = {}
+    for i in range(6):
+        for name, source in SAMPLES.items():
+            files[f'pkg{i}/{name}'] = source
+    return write_tree(tmp_path / 'tree', files)
+
+
+def findings_by_file(results):
+    return {
+        result['filename']: (result['status'], sorted(
+            (f['detector'], f['severity'], f['line'], f['pattern']) for f in result['findings']
+        ))
+        for result in results
+    }
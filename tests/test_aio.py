@@ -0,0 +1,99 @@
+import asyncio
+import time
+
+from taiga.aio import AsyncAnalyzer
+from taiga.core import TaigaAnalyzer
+from conftest import SAMPLES, findings_by_file, write_tree
+
+
+async def collect(results):
+    return [result async for result in results]
+
+
+def test_many_async_matches_serial(sample_tree):
+    paths = sorted(str(path) for path in sample_tree.rglob('*.py'))
+
+    async def run():
+        async with AsyncAnalyzer(jobs=2, concurrency=4) as analyzer:
+            return await collect(analyzer.analyze_many_async(paths))
+
+    results = asyncio.run(run())
+    # Порядок - по готовности, но каждый путь ровно один раз и с тем же результатом
+    assert sorted(result['filename'] for result in results) == paths
+    assert findings_by_file(results) == findings_by_file(TaigaAnalyzer().analyze_paths(paths))
+
+
+def test_data_async_keeps_call_order():
+    sources = list(SAMPLES.items())
+
+    async def run():
+        async with AsyncAnalyzer(jobs=2) as analyzer:
+            return await asyncio.gather(*(analyzer.analyze_data_async(source.encode(), name)
+                                          for name, source in sources))
+
+    results = asyncio.run(run())
+    assert [result['filename'] for result in results] == [name for name, _ in sources]
+    assert findings_by_file(results) == findings_by_file(TaigaAnalyzer().analyze_sources(sources))
+
+
+def test_sources_async(tmp_path):
+    sources = [(name, source) for name, source in SAMPLES.items()] + [('raw.py', b'eval(x)\n')]
+
+    async def run():
+        async with AsyncAnalyzer(jobs=2, concurrency=2) as analyzer:
+            return await collect(analyzer.analyze_sources_async(sources))
+
+    results = asyncio.run(run())
+    assert findings_by_file(results) == findings_by_file(TaigaAnalyzer().analyze_sources(sources))
+
+
+def test_missing_file_is_error(tmp_path):
+    async def run():
+        async with AsyncAnalyzer(jobs=1) as analyzer:
+            return await analyzer.analyze_file_async(tmp_path / 'missing.py')
+
+    assert asyncio.run(run())['status'] == 'error'
+
+
+def test_timeout_replaces_hung_worker(tmp_path, monkeypatch):
+    # Воркеры получают подмену через fork: зависает только анализ slow.py
+    analyze_text = TaigaAnalyzer._analyze_text
+
+    def hanging(self, source_code, filename):
+        if filename.endswith('slow.py'):
+            time.sleep(60)
+        return analyze_text(self, source_code, filename)
+
+    monkeypatch.setattr(TaigaAnalyzer, '_analyze_text', hanging)
+    root = write_tree(tmp_path, {'slow.py': 'x = 1\n', **{f'ok{i}.py': 'x = 2\n' for i in range(4)}})
+    paths = sorted(str(path) for path in root.iterdir())
+
+    async def run():
+        # Единственный воркер: без замены зависшего процесса остальные файлы не дождались бы очереди
+        async with AsyncAnalyzer(jobs=1, timeout=1.0) as analyzer:
+            results = await collect(analyzer.analyze_many_async(paths))
+            return results, analyzer.stats
+
+    started = time.monotonic()
+    results, stats = asyncio.run(run())
+    assert time.monotonic() - started < 30
+
+    statuses = {result['filename'].rsplit('/', 1)[-1]: result['status'] for result in results}
+    assert statuses == {'slow.py': 'timeout', 'ok0.py': 'success', 'ok1.py': 'success',
+                        'ok2.py': 'success', 'ok3.py': 'success'}
+    assert stats['timeouts'] == 1
+    assert stats['worker_restarts'] == 1
+
+
+def test_early_close_releases_workers(sample_tree):
+    paths = sorted(str(path) for path in sample_tree.rglob('*.py'))
+
+    async def run():
+        async with AsyncAnalyzer(jobs=2, concurrency=8) as analyzer:
+            results = analyzer.analyze_many_async(paths)
+            async for _ in results:
+                break
+            await results.aclose()
+            return len(analyzer._busy)
+
+    assert asyncio.run(run()) == 0
@@ -0,0 +1,141 @@
+import io
+import tarfile
+import zipfile
+
+import pytest
+
+from taiga.archives import ArchiveReader
+from taiga.core import TaigaAnalyzer
+
+
+def make_zip(files, compression=zipfile.ZIP_DEFLATED):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', compression) as archive:
+        for name, data in files.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def make_tar(files, mode='w:gz'):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode=mode) as archive:
+        for name, data in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+def members(reader, path):
+    return {member.name.split('!', 1)[1]: member.data if member.error is None else member.error
+            for member in reader.iter_members(path)}
+
+
+def write(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return path
+
+
+def test_zip_members(tmp_path):
+    path = write(tmp_path, 'pkg.whl', make_zip({'pkg/a.py': b'x = 1\n', 'pkg/data.txt': b'skip', 'pkg/': b''}))
+    assert members(ArchiveReader(), path) == {'pkg/a.py': b'x = 1\n'}
+
+
+@pytest.mark.parametrize('name, mode', [('src.tar', 'w'), ('src.tar.gz', 'w:gz'), ('src.tar.bz2', 'w:bz2')])
+def test_tar_members(tmp_path, name, mode):
+    path = write(tmp_path, name, make_tar({'src/a.py': b'x = 1\n', 'src/README': b'skip'}, mode))
+    assert members(ArchiveReader(), path) == {'src/a.py': b'x = 1\n'}
+
+
+def test_zip_bomb_ratio(tmp_path):
+    # 2 МБ нулей сжимаются в несколько килобайт: распаковка не начинается
+    path = write(tmp_path, 'bomb.zip', make_zip({'big.py': b'\0' * (2 * 1024 * 1024), 'ok.py': b'x = 1\n'}))
+    found = members(ArchiveReader(max_member_size=4 * 1024 * 1024), path)
+    assert 'zip-бомба' in found['big.py']
+    assert found['ok.py'] == b'x = 1\n'
+
+    # Без сжатия тот же размер бомбой не считается
+    path = write(tmp_path, 'stored.zip', make_zip({'big.py': b'\0' * (2 * 1024 * 1024)}, zipfile.ZIP_STORED))
+    assert isinstance(members(ArchiveReader(max_member_size=4 * 1024 * 1024), path)['big.py'], bytes)
+
+
+def test_tar_bomb_ratio(tmp_path):
+    # Объем считается по всем файлам, даже ненужным: пропуск в потоке тоже распаковывает
+    path = write(tmp_path, 'bomb.tar.gz', make_tar({'a.py': b'x = 1\n', 'blob.bin': b'\0' * (2 * 1024 * 1024),
+                                                    'b.py': b'y = 2\n'}))
+    found = list(ArchiveReader().iter_members(path))
+    assert [member.data for member in found[:-1]] == [b'x = 1\n']
+    assert found[-1].name == str(path)
+    assert 'tar-бомба' in found[-1].error
+
+
+def test_member_size_cap(tmp_path):
+    files = {'small.py': b'x = 1\n', 'large.py': b'#' * 100}
+    reader = ArchiveReader(max_member_size=50)
+    for path in (write(tmp_path, 'a.zip', make_zip(files)), write(tmp_path, 'a.tar', make_tar(files, 'w'))):
+        found = members(reader, path)
+        assert found['small.py'] == b'x = 1\n'
+        assert found['large.py'] == 'Файл в архиве слишком большой: 100 байт'
+
+
+def test_member_size_header_is_not_trusted(tmp_path):
+    # Заявленный размер занижен: данные в анализ не попадают
+    data = bytearray(make_zip({'liar.py': b'#' * 100}, zipfile.ZIP_STORED))
+    central = data.rindex(b'PK\x01\x02')
+    data[central + 24:central + 28] = (10).to_bytes(4, 'little')
+    path = write(tmp_path, 'liar.zip', bytes(data))
+    assert members(ArchiveReader(max_member_size=50), path)['liar.py'].startswith('Не удалось распаковать')
+
+
+def test_total_budget(tmp_path):
+    files = {f'm{i}.py': b'#' * 40 for i in range(4)}
+    path = write(tmp_path, 'a.zip', make_zip(files))
+    found = members(ArchiveReader(max_total_size=100), path)
+    assert [name for name, data in found.items() if isinstance(data, bytes)] == ['m0.py', 'm1.py']
+    assert found['m2.py'] == found['m3.py'] == 'Превышен общий объем распаковки архива'
+
+
+def test_total_budget_covers_nested_archives(tmp_path):
+    inner = make_zip({'inner.py': b'#' * 40})
+    path = write(tmp_path, 'outer.zip', make_zip({'a.py': b'#' * 40, 'nested.zip': inner}))
+    # Вложенный архив списывает и свой размер, и размер содержимого
+    found = {member.name.rsplit('!', 1)[1]: member.error for member in
+             ArchiveReader(max_total_size=40 + len(inner) + 10).iter_members(path)}
+    assert found['a.py'] is None
+    assert found['inner.py'] == 'Превышен общий объем распаковки архива'
+
+
+def test_nesting_depth(tmp_path):
+    level2 = make_zip({'deep.py': b'z = 3\n'})
+    level1 = make_tar({'mid.py': b'y = 2\n', 'level2.zip': level2}, 'w')
+    path = write(tmp_path, 'level0.zip', make_zip({'top.py': b'x = 1\n', 'level1.tar': level1}))
+
+    found = {member.name: member.data if member.error is None else member.error
+             for member in ArchiveReader(max_depth=1).iter_members(path)}
+    assert found[f'{path}!top.py'] == b'x = 1\n'
+    assert found[f'{path}!level1.tar!mid.py'] == b'y = 2\n'
+    assert found[f'{path}!level1.tar!level2.zip'] == 'Превышена глубина вложенности архивов (1)'
+
+    names = {member.name for member in ArchiveReader(max_depth=2).iter_members(path)}
+    assert f'{path}!level1.tar!level2.zip!deep.py' in names
+
+
+def test_corrupted_archive(tmp_path):
+    path = write(tmp_path, 'broken.zip', b'PK\x03\x04 not a zip')
+    found = list(ArchiveReader().iter_members(path))
+    assert len(found) == 1
+    assert found[0].data is None
+    assert found[0].error.startswith('Поврежденный архив')
+
+
+def test_analyzer_reports_archive_errors(tmp_path):
+    files = {'shell.py': b'import os\nos.system(cmd)\n', 'large.py': b'#' * 100}
+    path = write(tmp_path, 'pkg.zip', make_zip(files))
+    analyzer = TaigaAnalyzer(archives=ArchiveReader(max_member_size=50))
+    results = {result['filename'].split('!', 1)[1]: result for result in analyzer.analyze_path(str(path))}
+
+    assert results['shell.py']['status'] == 'success'
+    assert any('os.system' in f['pattern'] for f in results['shell.py']['findings'])
+    assert results['large.py']['status'] == 'error'
+    assert analyzer.stats['archive_errors'] == 1
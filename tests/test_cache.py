@@ -0,0 +1,64 @@
+from taiga.cache import MemoryCache, ResultCache
+from taiga.core import TaigaAnalyzer
+from taiga.rules import Rule, RuleIndex
+from taiga.detectors.dangerous_calls import DangerousCallsDetector
+
+
+def analyze_twice(analyzer_factory, path):
+    first = analyzer_factory()
+    first_result = first.analyze_file(str(path))
+    first.flush()
+    second = analyzer_factory()
+    second_result = second.analyze_file(str(path))
+    return first, first_result, second, second_result
+
+
+def test_unchanged_file_hits_cache(tmp_path):
+    path = tmp_path / 'shell.py'
+    path.write_text('import os\nos.system("ls")\n', encoding='utf-8')
+    cache_dir = tmp_path / 'cache'
+
+    first, first_result, second, second_result = analyze_twice(
+        lambda: TaigaAnalyzer(cache=ResultCache(str(cache_dir))), path)
+
+    assert first.stats['cache_misses'] == 1
+    assert second.stats['cache_hits'] == 1
+    assert second_result == first_result
+
+
+def test_changed_content_misses_cache(tmp_path):
+    path = tmp_path / 'shell.py'
+    path.write_text('import os\nos.system("ls")\n', encoding='utf-8')
+    cache = ResultCache(str(tmp_path / 'cache'))
+
+    analyzer = TaigaAnalyzer(cache=cache)
+    analyzer.analyze_file(str(path))
+    analyzer.flush()
+
+    path.write_text('import os\nos.system("ls")\neval("1")\n', encoding='utf-8')
+    analyzer = TaigaAnalyzer(cache=cache)
+    result = analyzer.analyze_file(str(path))
+
+    assert analyzer.stats['cache_misses'] == 1
+    assert 'eval' in [finding['pattern'] for finding in result['findings']]
+
+
+def test_rule_change_invalidates_cache(tmp_path):
+    path = tmp_path / 'net.py'
+    path.write_text('import urllib.request\nurllib.request.urlopen("http://x")\n', encoding='utf-8')
+    cache = MemoryCache()
+
+    analyzer = TaigaAnalyzer(cache=cache)
+    assert analyzer.analyze_file(str(path))['findings'] == []
+
+    rules = RuleIndex(DangerousCallsDetector.default_rules())
+    rules.add(Rule('urllib.request.urlopen', 'HIGH', 'Сетевой запрос', 'TI-1'))
+    analyzer = TaigaAnalyzer(cache=cache, rules=rules)
+    result = analyzer.analyze_file(str(path))
+
+    assert analyzer.stats['cache_hits'] == 0
+    assert [finding['pattern'] for finding in result['findings']] == ['urllib.request.urlopen']
+
+
+def test_min_severity_changes_fingerprint():
+    assert TaigaAnalyzer().fingerprint() != TaigaAnalyzer(min_severity='HIGH').fingerprint()
@@ -0,0 +1,71 @@
+import socket
+
+import pytest
+
+from taiga.client import DaemonClient, DaemonError, config_fingerprint
+
+
+@pytest.fixture
+def client_with_response():
+    # Клиент на одном конце socketpair, на другом - "демон" с заранее записанным ответом.
+    # Конец демона открыт до конца теста, чтобы запрос клиента не падал с EPIPE
+    peers = []
+
+    def create(response: bytes) -> DaemonClient:
+        ours, theirs = socket.socketpair()
+        theirs.sendall(response)
+        theirs.shutdown(socket.SHUT_WR)
+        peers.append(theirs)
+        client = DaemonClient()
+        client._sock = ours
+        client._reader = ours.makefile('rb')
+        return client
+
+    yield create
+    for peer in peers:
+        peer.close()
+
+
+@pytest.mark.parametrize('response', [
+    b'',
+    b'{"results": []',
+    b'not json\n',
+    b'[1, 2]\n',
+    b'{"error": "boom"}\n',
+])
+def test_malformed_response_raises_daemon_error(client_with_response, response):
+    with client_with_response(response) as client:
+        with pytest.raises(DaemonError):
+            client.ping()
+
+
+@pytest.mark.parametrize('response', [
+    b'{}\n',
+    b'{"results": [{}]}\n',
+    b'{"results": [1, 2]}\n',
+])
+def test_analyze_checks_result_count(client_with_response, response):
+    with client_with_response(response) as client:
+        with pytest.raises(DaemonError):
+            client.analyze(['a.py', 'b.py'])
+
+
+def test_analyze_restores_filenames(client_with_response):
+    with client_with_response(b'{"results": [{"findings": []}], "stats": {"files": 1}}\n') as client:
+        results, stats = client.analyze(['pkg/a.py'])
+    assert results == [{'findings': [], 'filename': 'pkg/a.py'}]
+    assert stats == {'files': 1}
+
+
+def test_config_fingerprint(tmp_path):
+    pack = tmp_path / 'pack.json'
+    pack.write_text('{"rules": []}', encoding='utf-8')
+    base = config_fingerprint([str(pack)])
+
+    assert config_fingerprint([str(pack)]) == base
+    assert config_fingerprint() != base
+    assert config_fingerprint([str(pack)], min_severity='HIGH') != base
+    assert config_fingerprint([str(pack)], prefilter=True) != base
+
+    pack.write_text('{"rules": [{"name": "x.y"}]}', encoding='utf-8')
+    assert config_fingerprint([str(pack)]) != base
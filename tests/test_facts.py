@@ -0,0 +1,77 @@
+import ast
+
+import pytest
+
+from taiga.core import TaigaAnalyzer
+from taiga.facts import FileFacts
+
+
+def facts_for(source):
+    tree = ast.parse(source)
+    parents = {child: node for node in ast.walk(tree) for child in ast.iter_child_nodes(node)}
+    return tree, FileFacts(tree, parents)
+
+
+def call_names(source):
+    tree, facts = facts_for(source)
+    return [facts.qualified_name(node.func) for node in ast.walk(tree) if isinstance(node, ast.Call)]
+
+
+@pytest.mark.parametrize('source, expected', [
+    ('import subprocess as sp\nsp.run()\n', 'subprocess.run'),
+    ('import os.path\nos.path.join()\n', 'os.path.join'),
+    ('from os import system\nsystem()\n', 'os.system'),
+    ('from os import system as s\ns()\n', 'os.system'),
+    ('from subprocess import Popen as P\nP()\n', 'subprocess.Popen'),
+    ('from . import util\nutil.run()\n', '.util.run'),
+    ('from ..pkg import run as r\nr()\n', '..pkg.run'),
+    ('eval()\n', 'eval'),
+])
+def test_qualified_name(source, expected):
+    assert call_names(source) == [expected]
+
+
+def test_local_bindings_shadow_imports():
+    source = (
+        'from os import system as s\n'
+        'def f(s):\n'
+        '    s()\n'
+        'def g():\n'
+        '    s()\n'
+        'class C:\n'
+        '    s = staticmethod(print)\n'
+        '    def m(self):\n'
+        '        s()\n'
+    )
+    # Параметр скрывает импорт, имена тела класса не видны из методов
+    assert call_names(source) == [None, 'os.system', 'staticmethod', 'os.system']
+
+
+def test_definitions_before_use():
+    tree, facts = facts_for('def f():\n    x = "a"\n    y = x\n    x = "b"\n')
+    use = next(node for node in ast.walk(tree) if isinstance(node, ast.Name) and node.id == 'x'
+               and isinstance(node.ctx, ast.Load))
+    assert [value.value for value in facts.definitions(use)] == ['a']
+
+
+@pytest.mark.parametrize('source, pattern', [
+    ('from os import system as s\ns("id")\n', 'os.system'),
+    ('from subprocess import Popen as P\nP(["id"])\n', 'subprocess.Popen'),
+    ('import subprocess as sp\nsp.Popen(["id"])\n', 'subprocess.Popen'),
+    # Импорт ниже функции, которая его вызывает
+    ('def run():\n    s("id")\n\nfrom os import system as s\n', 'os.system'),
+])
+def test_aliased_dangerous_calls(source, pattern):
+    findings = TaigaAnalyzer().analyze_source(source)['findings']
+    assert [f['pattern'] for f in findings if f['detector'] == 'DangerousCallsDetector'] == [pattern]
+
+
+@pytest.mark.parametrize('source', [
+    'from .os import system\nsystem("x")\n',
+    'from .os import system as s\ns("x")\n',
+    'from os import system as s\ndef f(s):\n    s("x")\n',
+])
+def test_no_finding_for_relative_or_shadowed_names(source):
+    result = TaigaAnalyzer().analyze_source(source)
+    assert result['status'] == 'success'
+    assert result['findings'] == []
@@ -0,0 +1,129 @@
+import ast
+import functools
+import time
+
+import pytest
+
+from taiga.core import TaigaAnalyzer
+from taiga.folding import ConstantFolder, may_fold
+
+
+def fold(expression, **limits):
+    return ConstantFolder(**limits).fold(ast.parse(expression, mode='eval').body)
+
+
+@pytest.mark.parametrize('expression, expected', [
+    ("'ev' + 'al'", 'eval'),
+    ("''.join(['ex', 'ec'])", 'exec'),
+    ("''.join(('s', 'y', 's'))", 'sys'),
+    ('chr(101) + chr(118) + chr(97) + chr(108)', 'eval'),
+    ("'lave'[::-1]", 'eval'),
+    ("'xevalx'[1:-1]", 'eval'),
+    ("'%s%s' % ('ev', 'al')", 'eval'),
+    ("f'{\"ev\"}al'", 'eval'),
+    ("'ab' * 3", 'ababab'),
+    ("b'ev' + b'al'", b'eval'),
+    ("b'eval'.decode()", 'eval'),
+    ("b'eval'.decode('ascii')", 'eval'),
+    ('100 - 1 + -1', 98),
+    ("('a', 'b') + ('c',)", ('a', 'b', 'c')),
+])
+def test_folds(expression, expected):
+    assert fold(expression) == expected
+
+
+@pytest.mark.parametrize('expression', [
+    "'ev' + x",
+    "x.join(['a', 'b'])",
+    "''.join(['a', x])",
+    "'%10s' % 'a'",
+    "f'{\"a\":>1000}'",
+    "f'{\"a\"!r}'",
+    "'a' + 1",
+    "''.join(['a', 1])",
+    "'abc'[10]",
+    'chr(-1)',
+    "b'\\xff'.decode('utf-8')",
+    "'a'.upper()",
+    'True + 1',
+    '2 ** 10',
+])
+def test_does_not_fold(expression):
+    assert fold(expression) is None
+
+
+def test_length_and_operation_caps():
+    assert fold("'a' * 200", max_length=100) is None
+    assert fold("'a' * 100", max_length=100) == 'a' * 100
+    assert fold("'ab' + 'cd' + 'ef'", max_operations=1) is None
+    assert fold("'a' * 60 + 'b' * 60", max_output=100) is None
+    assert fold('99999999999 * 99999999999 * 99999999999') is None
+
+
+def test_memoized_subtrees():
+    folder = ConstantFolder()
+    tree = ast.parse("('ev' + 'al') + ('ua' + 'te')", mode='eval').body
+    assert folder.fold(tree) == 'evaluate'
+    # Значения частей переданы родителю и повторно не возвращаются
+    assert folder.fold(tree.left) is None
+    assert folder.fold(tree) == 'evaluate'
+
+
+def test_partial_chain_keeps_constant_prefix():
+    folder = ConstantFolder()
+    tree = ast.parse("'ev' + 'al' + x", mode='eval').body
+    assert folder.fold(tree) is None
+    assert folder.fold(tree.left) == 'eval'
+
+
+def test_long_chain_is_linear():
+    # Цепочка из тысяч слагаемых склеивается одним проходом, а не попарно
+    # (дерево собирается вручную: ast.parse упирается в лимит рекурсии)
+    tree = functools.reduce(lambda left, i: ast.BinOp(left, ast.Add(), ast.Constant(chr(97 + i % 26))),
+                            range(1, 5000), ast.Constant('a'))
+    started = time.perf_counter()
+    value = ConstantFolder().fold(tree)
+    assert len(value) == 5000
+    assert time.perf_counter() - started < 1.0
+
+
+def test_may_fold():
+    def check(expression):
+        return may_fold(ast.parse(expression, mode='eval').body)
+
+    assert check("'ev' + 'al'")
+    assert check("chr(101) + 'x'")
+    assert not check('x % 3')
+    assert not check('items[i]')
+    assert not check('sep.join(parts)')
+    assert not check("'a' + f(x)")
+
+
+@pytest.mark.parametrize('source, pattern', [
+    ("name = 'ev' + 'al'\n", "Свернуто: 'eval'"),
+    ("f = getattr(__builtins__, ''.join(['ex', 'ec']))\n", "Свернуто: 'exec'"),
+    ("cmd = 'metsys'[::-1]\n", "Свернуто: 'system'"),
+    ("code = '%s(%s)' % ('eval', 'x')\n", "Свернуто: 'eval(x)'"),
+])
+def test_obfuscation_detector_reports_folded_names(source, pattern):
+    findings = TaigaAnalyzer().analyze_source(source)['findings']
+    assert [f['pattern'] for f in findings if f['detector'] == 'ObfuscationDetector'] == [pattern]
+
+
+def test_folded_string_feeds_entropy_check():
+    parts = ' + '.join(repr(part) for part in ('abcdefghijklm', 'nopqrstuvwxyzAB', 'CDEFGHIJKLMNOPQRSTUVW'))
+    findings = TaigaAnalyzer().analyze_source(f'key = {parts}\n')['findings']
+    assert any(f['pattern'].startswith('Энтропия') for f in findings)
+
+
+def test_plain_strings_are_not_reported():
+    source = "greeting = 'hello' + ', ' + 'world'\nlabel = '%s: %d' % ('count', 3)\n"
+    assert TaigaAnalyzer().analyze_source(source)['findings'] == []
+
+
+@pytest.mark.parametrize('template', ['f"{}"', '"{}"[::-1]', '("{}")[:]'])
+def test_single_literal_fold_reports_entropy_once(template):
+    # Свертка одного литерала дает ту же строку в той же позиции: находка по энтропии одна
+    literal = ''.join(chr(0x4e00 + i) for i in range(150))
+    findings = TaigaAnalyzer().analyze_source(f'key = {template.format(literal)}\n')['findings']
+    assert [f['pattern'].startswith('Энтропия') for f in findings].count(True) == 1
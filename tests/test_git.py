@@ -0,0 +1,120 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from taiga.git import GitChanges, GitError, _split_z
+from conftest import write_tree
+
+pytestmark = pytest.mark.skipif(shutil.which('git') is None, reason='git не установлен')
+
+
+def git(root, *args):
+    subprocess.run(['git', *args], cwd=root, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def commit(root, message):
+    git(root, 'add', '-A')
+    git(root, 'commit', '-q', '-m', message)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    root = tmp_path / 'repo'
+    root.mkdir()
+    git(root, 'init', '-q')
+    git(root, 'config', 'user.name', 'Taiga')
+    git(root, 'config', 'user.email', 'taiga@example.com')
+    git(root, 'config', 'commit.gpgsign', 'false')
+    write_tree(root, {'keep.py': 'x = 1\n', 'gone.py': 'y = 2\n', 'pkg/mod.py': 'z = 3\n'})
+    commit(root, 'base')
+    return root
+
+
+def changes(root, **kwargs):
+    changed = GitChanges(str(root), **kwargs)
+    return dict(changed.sources(changed.changed_paths()))
+
+
+def test_split_z():
+    assert _split_z(b'a.py\0dir with space/b.py\0\0') == [b'a.py', b'dir with space/b.py']
+    assert _split_z(b'') == []
+
+
+def test_requires_range_or_staged(repo):
+    with pytest.raises(ValueError):
+        GitChanges(str(repo))
+    with pytest.raises(ValueError):
+        GitChanges(str(repo), git_range='HEAD', staged=True)
+
+
+def test_outside_repository(tmp_path):
+    write_tree(tmp_path / 'plain', {'a.py': 'x = 1\n'})
+    with pytest.raises(GitError):
+        GitChanges(str(tmp_path / 'plain'), staged=True).changed_paths()
+
+
+def test_staged_reads_index_not_worktree(repo):
+    write_tree(repo, {'keep.py': 'x = "staged"\n', 'new.py': 'n = 1\n', 'notes.txt': 'skip\n'})
+    git(repo, 'add', 'keep.py', 'new.py', 'notes.txt')
+    # После git add файл изменен еще раз: анализируется проиндексированная версия
+    write_tree(repo, {'keep.py': 'x = "worktree"\n', 'pkg/mod.py': 'z = "unstaged"\n'})
+
+    prefix = str(repo) + os.sep
+    assert changes(repo, staged=True) == {prefix + 'keep.py': b'x = "staged"\n', prefix + 'new.py': b'n = 1\n'}
+
+
+def test_git_range(repo):
+    write_tree(repo, {'pkg/mod.py': 'z = 4\n', 'added.py': 'a = 1\n'})
+    commit(repo, 'second')
+    write_tree(repo, {'keep.py': 'x = 5\n'})
+    commit(repo, 'third')
+    prefix = str(repo) + os.sep
+
+    assert changes(repo, git_range='HEAD~1') == {prefix + 'keep.py': b'x = 5\n'}
+    # Диапазон читается из его конечной ревизии, а не из рабочей копии
+    write_tree(repo, {'pkg/mod.py': 'z = "worktree"\n'})
+    assert changes(repo, git_range='HEAD~2..HEAD~1') == {prefix + 'added.py': b'a = 1\n',
+                                                          prefix + 'pkg/mod.py': b'z = 4\n'}
+    assert set(changes(repo, git_range='HEAD~2...HEAD')) == {prefix + 'added.py', prefix + 'keep.py',
+                                                              prefix + 'pkg/mod.py'}
+
+
+def test_unusual_names(repo):
+    files = {'dir with space/a b.py': 'x = 1\n', 'пакет/модуль.py': 'y = 2\n', 'line\nbreak.py': 'z = 3\n'}
+    write_tree(repo, files)
+    git(repo, 'add', '-A')
+
+    prefix = str(repo) + os.sep
+    # Путь с переводом строки не передать в cat-file --batch: он пропускается
+    assert changes(repo, staged=True) == {prefix + 'dir with space/a b.py': b'x = 1\n',
+                                          prefix + 'пакет/модуль.py': b'y = 2\n'}
+
+
+def test_deleted_and_renamed_files(repo):
+    git(repo, 'rm', '-q', 'gone.py')
+    git(repo, 'mv', 'pkg/mod.py', 'pkg/moved.py')
+    assert changes(repo, staged=True) == {str(repo) + os.sep + 'pkg/moved.py': b'z = 3\n'}
+
+
+def test_subdirectory_and_exclude(repo):
+    write_tree(repo, {'keep.py': 'x = 2\n', 'pkg/mod.py': 'z = 4\n', 'pkg/tests/test_mod.py': 't = 1\n'})
+    git(repo, 'add', '-A')
+
+    # --relative: только файлы внутри целевой директории, пути от нее
+    target = repo / 'pkg'
+    assert changes(target, staged=True) == {str(target) + os.sep + 'mod.py': b'z = 4\n',
+                                            str(target) + os.sep + 'tests/test_mod.py': b't = 1\n'}
+    assert list(changes(target, staged=True, exclude=['tests/'])) == [str(target) + os.sep + 'mod.py']
+
+
+def test_missing_object_is_skipped(repo):
+    changed = GitChanges(str(repo), git_range='HEAD')
+    assert dict(changed.sources([b'absent.py', b'keep.py'])) == {str(repo) + os.sep + 'keep.py': b'x = 1\n'}
+    assert changed.timings['git_read'] > 0
+
+
+def test_tracked_count(repo):
+    assert GitChanges(str(repo), staged=True).tracked_count() == 3
+    assert GitChanges(str(repo / 'pkg'), staged=True).tracked_count() == 1
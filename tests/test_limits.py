@@ -0,0 +1,94 @@
+import time
+
+from taiga import core
+from taiga.core import TaigaAnalyzer
+from taiga.limits import ResourceLimits
+from conftest import write_tree
+
+
+def statuses(results):
+    return {result['filename'].rsplit('/', 1)[-1]: result['status'] for result in results}
+
+
+def test_too_large_by_bytes(tmp_path):
+    # 30 символов, но 60 байт в UTF-8
+    source = 'x = "' + 'я' * 25 + '"\n'
+    analyzer = TaigaAnalyzer(limits=ResourceLimits(max_bytes=40))
+    assert analyzer.analyze_source(source)['status'] == 'too_large'
+    assert analyzer.analyze_source('x = 1\n')['status'] == 'success'
+
+    path = write_tree(tmp_path, {'big.py': source}) / 'big.py'
+    assert analyzer.analyze_file(str(path))['status'] == 'too_large'
+    assert analyzer.stats['limit_too_large'] == 2
+
+
+def test_too_large_by_nodes():
+    analyzer = TaigaAnalyzer(limits=ResourceLimits(max_nodes=50))
+    assert analyzer.analyze_source('x = 1\n')['status'] == 'success'
+    result = analyzer.analyze_source('x = [' + ', '.join(map(str, range(100))) + ']\n')
+    assert result['status'] == 'too_large'
+    assert result['findings'] == []
+
+
+def test_timeout_kills_only_hanging_file(tmp_path, monkeypatch):
+    # Воркеры получают подмену через fork: зависает только анализ slow.py
+    analyze_text = TaigaAnalyzer._analyze_text
+
+    def hanging(self, source_code, filename):
+        if filename.endswith('slow.py'):
+            time.sleep(60)
+        return analyze_text(self, source_code, filename)
+
+    monkeypatch.setattr(TaigaAnalyzer, '_analyze_text', hanging)
+    files = {f'ok{i}.py': 'x = 1\n' for i in range(4)}
+    files['slow.py'] = 'x = 2\n'
+    root = write_tree(tmp_path, files)
+
+    analyzer = TaigaAnalyzer(limits=ResourceLimits(timeout=1.0))
+    results = list(analyzer.iter_analyze(sorted(str(path) for path in root.iterdir()), jobs=2))
+
+    assert statuses(results) == {'ok0.py': 'success', 'ok1.py': 'success', 'ok2.py': 'success',
+                                 'ok3.py': 'success', 'slow.py': 'timeout'}
+    assert analyzer.stats['limit_timeout'] == 1
+    assert analyzer.stats['worker_restarts'] == 1
+
+
+def test_worker_startup_does_not_count_against_timeout(tmp_path, monkeypatch):
+    # Отсчет времени идет с сообщения ready, а не с запуска процесса
+    init_worker = core._init_worker
+
+    def slow_init(options):
+        time.sleep(1.5)
+        init_worker(options)
+
+    monkeypatch.setattr(core, '_init_worker', slow_init)
+    root = write_tree(tmp_path, {'a.py': 'x = 1\n', 'b.py': 'y = 2\n'})
+
+    analyzer = TaigaAnalyzer(limits=ResourceLimits(timeout=1.0))
+    results = list(analyzer.iter_analyze(sorted(str(path) for path in root.iterdir()), jobs=1))
+
+    assert statuses(results) == {'a.py': 'success', 'b.py': 'success'}
+    assert analyzer.stats['worker_restarts'] == 0
+
+
+def test_supervised_results_keep_input_order(tmp_path, monkeypatch):
+    # Первые пакеты работают дольше последних, а в середине зависший файл: порядок все равно входной
+    analyze_text = TaigaAnalyzer._analyze_text
+
+    def uneven(self, source_code, filename):
+        name = filename.rsplit('/', 1)[-1]
+        if name == 'f10.py':
+            time.sleep(60)
+        time.sleep(0.05 if name < 'f08' else 0)
+        return analyze_text(self, source_code, filename)
+
+    monkeypatch.setattr(TaigaAnalyzer, '_analyze_text', uneven)
+    root = write_tree(tmp_path, {f'f{i:02}.py': f'x = {i}\n' for i in range(20)})
+    paths = sorted(str(path) for path in root.iterdir())
+
+    analyzer = TaigaAnalyzer(limits=ResourceLimits(timeout=1.0))
+    results = list(analyzer.iter_analyze(paths, jobs=4))
+
+    assert [result['filename'] for result in results] == paths
+    assert [result['status'] for result in results].count('timeout') == 1
+    assert statuses(results)['f10.py'] == 'timeout'
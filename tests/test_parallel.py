@@ -0,0 +1,52 @@
+import multiprocessing
+import re
+
+import pytest
+
+from taiga.cli import main
+from taiga.core import TaigaAnalyzer
+from conftest import findings_by_file
+
+
+def test_parallel_matches_serial(sample_tree):
+    paths = sorted(sample_tree.rglob('*.py'))
+    assert len(paths) >= TaigaAnalyzer.PARALLEL_MIN_FILES
+
+    serial = TaigaAnalyzer().analyze_paths(paths, jobs=1)
+    parallel = TaigaAnalyzer().analyze_paths(paths, jobs=2)
+
+    assert len(serial) == len(parallel) == len(paths)
+    assert findings_by_file(serial) == findings_by_file(parallel)
+
+
+def test_parallel_reports_findings(sample_tree):
+    results = findings_by_file(TaigaAnalyzer().analyze_paths(sorted(sample_tree.rglob('*.py')), jobs=2))
+    shell = next(value for name, value in results.items() if name.endswith('pkg0/shell.py'))
+    assert shell[0] == 'success'
+    assert ('DangerousCallsDetector', 'MEDIUM', 2, 'os.system') in shell[1]
+
+
+def test_early_close_shuts_pool_down(sample_tree):
+    # --fail-fast закрывает генератор после первой находки: процессы пула не должны пережить его
+    results = TaigaAnalyzer().iter_analyze(sorted(sample_tree.rglob('*.py')), jobs=2)
+    next(results)
+    results.close()
+    assert multiprocessing.active_children() == []
+
+
+def test_fail_fast_stops_scan(sample_tree, capsys):
+    assert main([str(sample_tree), '--fail-fast', '--jobs', '2', '--no-cache', '--format', 'compact']) == 1
+    assert capsys.readouterr().out.count('Анализ:') < 30
+
+
+@pytest.mark.parametrize('options', [['--jobs', '2'], ['--jobs', '2', '--timeout', '30'], ['--jobs', '1']])
+def test_fail_fast_stops_after_first_high(sample_tree, capsys, options):
+    assert main([str(sample_tree), '--fail-fast', '--no-cache', '--format', 'compact', *options]) == 1
+    shown = re.findall(r'\[\d+\] Анализ: (.+)', capsys.readouterr().out)
+
+    # Результаты идут в порядке обхода: показано все до первого файла с HIGH включительно
+    severities = [{f['severity'] for f in result['findings']} for result in TaigaAnalyzer().analyze_paths(shown)]
+    assert 'HIGH' in severities[-1]
+    assert all('HIGH' not in found for found in severities[:-1])
+    assert len(shown) < 30
+    assert multiprocessing.active_children() == []
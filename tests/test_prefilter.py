@@ -0,0 +1,70 @@
+import codecs
+
+import pytest
+
+from taiga.core import TaigaAnalyzer, decode_source
+from taiga.prefilter import Prefilter, declared_encoding
+
+FLAGGED = {
+    'direct': b'eval(input())\n',
+    'attribute': b'import os\nos.system("id")\n',
+    'alias': b'import subprocess as sp\nsp.run(["id"])\n',
+    'from_import': b'from os import system as s\ns("id")\n',
+    'nfkc': 'ｅｖａｌ("1")\n'.encode('utf-8'),
+    'folded': b'f = getattr(__builtins__, "ev" + "al")\n',
+    'reversed': b'name = "metsys"[::-1]\n',
+    'entropy': b'key = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVW"\n',
+    'utf7': b'# coding: utf-7\n+AGU-val("1")\n',
+    'unicode_escape': b'# coding: unicode_escape\n\\x65val("1")\n',
+}
+
+
+@pytest.fixture(scope='module')
+def prefilter():
+    return Prefilter.from_detectors(TaigaAnalyzer().detectors)
+
+
+@pytest.mark.parametrize('name', sorted(FLAGGED))
+def test_prefilter_never_skips_flagged_file(prefilter, name):
+    data = FLAGGED[name]
+    result = TaigaAnalyzer().analyze_data(data, f'{name}.py')
+    assert result['status'] == 'success'
+    assert result['findings'], 'образец должен давать находку при полном анализе'
+    assert prefilter.needs_analysis(data)
+
+
+def test_prefiltered_analyzer_keeps_findings():
+    plain = TaigaAnalyzer()
+    filtered = TaigaAnalyzer(prefilter=True)
+    for name, data in FLAGGED.items():
+        assert filtered.analyze_data(data, name)['findings'] == plain.analyze_data(data, name)['findings']
+
+
+def test_clean_file_is_skipped(prefilter):
+    data = b'def add(a, b):\n    return a + b\n'
+    assert not prefilter.needs_analysis(data)
+    assert TaigaAnalyzer(prefilter=True).analyze_data(data, 'clean.py')['status'] == 'prefiltered'
+
+
+def test_declared_encoding():
+    assert declared_encoding(b'x = 1\n') is None
+    assert declared_encoding(b'# -*- coding: utf-8 -*-\nx = 1\n') is None
+    assert declared_encoding(b'# coding: latin-1\nx = 1\n') == 'iso8859-1'
+    assert declared_encoding(b'# coding: utf-7\nx = 1\n') == 'utf-7'
+    with pytest.raises(ValueError):
+        declared_encoding(b'# coding: no-such-codec\nx = 1\n')
+
+
+@pytest.mark.parametrize('prefix', [b'', b'x', codecs.BOM_UTF8])
+def test_long_first_line_is_not_cut_inside_character(prefix):
+    # Первая строка длиннее заголовка, граница заголовка приходится на середину или начало символа 'я'
+    data = prefix + ("s = 'coding' + '" + 'я' * 5000 + "'\ny = 1\n").encode('utf-8')
+    assert declared_encoding(data) is None
+    assert decode_source(data) == data.decode('utf-8-sig')
+    assert TaigaAnalyzer().analyze_data(data, 'long.py')['status'] == 'success'
+
+
+def test_cookie_before_long_line():
+    data = b'# coding: latin-1\ns = "' + b'\xe9' * 9000 + b'"\n'
+    assert declared_encoding(data) == 'iso8859-1'
+    assert decode_source(data) == data.decode('latin-1')
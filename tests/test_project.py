@@ -0,0 +1,87 @@
+from taiga.core import TaigaAnalyzer
+from taiga.project import STDLIB_MODULE_NAMES, ProjectIndex, module_name
+from taiga.rules import RuleIndex
+from taiga.stdlib import BUNDLED_STDLIB_MODULE_NAMES
+from taiga.detectors.dangerous_calls import DangerousCallsDetector
+from conftest import write_tree
+
+PROJECT = {
+    'app/__init__.py': 'from .runner import run_shell\n',
+    'app/runner.py': 'import os\n\n\ndef run_shell(cmd):\n    os.system(cmd)\n',
+    'app/service.py': 'from . import runner\n\n\ndef deploy(cmd):\n    runner.run_shell(cmd)\n',
+    # Относительный импорт с именем, похожим на правило: не опасный вызов и не падение
+    'app/compat.py': 'from .os import system\n\n\ndef call():\n    system("x")\n',
+    'main.py': ('from app import run_shell\nfrom app.service import deploy\n\n\n'
+                'def main():\n    deploy("ls")\n\n\nrun_shell("x")\nmain()\n'),
+}
+
+
+def scan(root, index_path):
+    analyzer = TaigaAnalyzer(project=True)
+    paths = sorted(str(path) for path in root.rglob('*.py'))
+    project = ProjectIndex(str(index_path), root=str(root))
+    project.load()
+    results = list(analyzer.link_project(analyzer.iter_analyze(paths), project, prune=True))
+    return {module_name(project.relative(result['filename'])): result for result in results}, analyzer
+
+
+def indirect(result):
+    return sorted((f['line'], f['pattern'], f['severity']) for f in result['findings'] if ' -> ' in f['pattern'])
+
+
+def test_module_name():
+    assert module_name('pkg/mod.py') == 'pkg.mod'
+    assert module_name('pkg/__init__.py') == 'pkg'
+    assert module_name('setup.py') == 'setup'
+
+
+def test_call_chains(tmp_path):
+    root = write_tree(tmp_path / 'project', PROJECT)
+    results, analyzer = scan(root, tmp_path / 'index.db')
+
+    assert all(result['status'] == 'success' for result in results.values())
+    assert indirect(results['main']) == [
+        (6, 'app.service.deploy -> os.system', 'LOW'),
+        (9, 'app.runner.run_shell -> os.system', 'LOW'),
+        (10, 'main.main -> os.system', 'LOW'),
+    ]
+    assert indirect(results['app.service']) == [(5, 'app.runner.run_shell -> os.system', 'LOW')]
+    assert indirect(results['app.compat']) == []
+    assert results['app.compat']['findings'] == []
+
+    chain = next(f['description'] for f in results['main']['findings'] if f['line'] == 10)
+    assert 'main.main -> app.service.deploy -> app.runner.run_shell -> os.system' in chain
+    assert analyzer.stats['project_reaching'] == 3
+
+
+def test_index_is_incremental(tmp_path):
+    root = write_tree(tmp_path / 'project', PROJECT)
+    index_path = tmp_path / 'index.db'
+    scan(root, index_path)
+
+    _, analyzer = scan(root, index_path)
+    assert analyzer.stats['project_updated'] == 0
+
+    # Опасный вызов убран: цепочки из других модулей пропадают без их повторной записи
+    write_tree(root, {'app/runner.py': 'def run_shell(cmd):\n    print(cmd)\n'})
+    results, analyzer = scan(root, index_path)
+    assert analyzer.stats['project_updated'] == 1
+    assert indirect(results['main']) == []
+
+
+def test_relative_import_does_not_match_rules():
+    index = RuleIndex(DangerousCallsDetector.default_rules())
+    assert index.match_name('os.system').call == 'os.system'
+    assert index.match_name('.os.system') is None
+    assert index.match_name('..system') is None
+    assert index.match_name('os..system') is None
+    assert index.match_name('') is None
+    assert TaigaAnalyzer().analyze_source('from .os import system\nsystem("x")\n')['findings'] == []
+
+
+def test_bundled_stdlib_names():
+    # Запасной список для Python до 3.10 совпадает с sys.stdlib_module_names по основным модулям
+    common = {'os', 'sys', 'json', 'subprocess', 'asyncio', 'collections', 'xml', 'importlib', '__future__'}
+    assert common <= BUNDLED_STDLIB_MODULE_NAMES
+    assert common <= STDLIB_MODULE_NAMES
+    assert 'taiga' not in BUNDLED_STDLIB_MODULE_NAMES
@@ -0,0 +1,101 @@
+import io
+import re
+
+import pytest
+
+from taiga.core import TaigaAnalyzer
+from taiga.renderers import (Console, CompactRenderer, OutputBuffer, Painter, Renderer, ReportRenderer,
+                             TextRenderer, color_supported)
+from taiga.report import NDJSONReportWriter
+from conftest import SAMPLES
+
+
+def console_for(stream, color=False):
+    return Console(OutputBuffer(stream, interactive=False), Painter(color))
+
+
+def render(renderer_class, results, color=False, **kwargs):
+    stream = io.StringIO()
+    renderer = renderer_class(console_for(stream, color), **kwargs)
+    for index, result in enumerate(results, 1):
+        renderer.result(index, result)
+    renderer.close()
+    return stream.getvalue()
+
+
+def test_renderer_is_abstract():
+    with pytest.raises(TypeError):
+        Renderer(console_for(io.StringIO()))
+
+    class Partial(Renderer):
+        pass
+
+    with pytest.raises(TypeError):
+        Partial(console_for(io.StringIO()))
+
+
+def test_text_renderer_without_color():
+    result = TaigaAnalyzer().analyze_source(SAMPLES['shell.py'], 'shell.py')
+    text = render(TextRenderer, [result])
+
+    assert '\033[' not in text
+    assert 'Анализ файла: shell.py' in text
+    assert f"Найдено паттернов: {len(result['findings'])}" in text
+    for finding in result['findings']:
+        assert f" {finding['severity']} " in text
+        assert finding['description'] in text
+
+
+def test_text_renderer_with_color():
+    result = TaigaAnalyzer().analyze_source(SAMPLES['shell.py'], 'shell.py')
+    colored = render(TextRenderer, [result], color=True)
+    assert '\033[1m\033[34m' in colored
+    # Цвет - только обертка вокруг тех же строк
+    assert re.sub(r'\033\[[0-9;]*m', '', colored) == render(TextRenderer, [result])
+
+
+def test_text_renderer_statuses():
+    analyzer = TaigaAnalyzer()
+    broken = analyzer.analyze_source(SAMPLES['broken.py'], 'broken.py')
+    clean = analyzer.analyze_source(SAMPLES['clean.py'], 'clean.py')
+    limited = {'filename': 'big.py', 'status': 'too_large', 'error': 'Файл слишком большой',
+               'findings': [], 'risk_score': 0}
+
+    assert 'Ошибка синтаксиса' in render(TextRenderer, [broken])
+
+    text = render(TextRenderer, [broken, clean, limited], multiple=True)
+    assert '[1] Анализ: broken.py' in text
+    # Чистый файл в режиме нескольких файлов - только заголовок
+    assert '[2] Анализ: clean.py' in text and 'Анализ файла: clean.py' not in text
+    assert 'Файл не проанализирован: Файл слишком большой' in text
+
+
+def test_compact_renderer():
+    analyzer = TaigaAnalyzer()
+    results = [analyzer.analyze_source(SAMPLES[name], name) for name in ('clean.py', 'shell.py')]
+    text = render(CompactRenderer, results, multiple=True)
+    lines = [line for line in text.splitlines() if line.strip()]
+    assert lines[0] == '[1] Анализ: clean.py'
+    assert lines[1].endswith('clean.py: 0 паттернов, риск: 0.0/10')
+    assert f"shell.py: {len(results[1]['findings'])} паттернов" in lines[3]
+
+
+def test_report_renderer_passes_results_to_writer():
+    stream = io.StringIO()
+    console = console_for(stream)
+    renderer = ReportRenderer(console, NDJSONReportWriter(console.out, line_buffered=False))
+    assert renderer.quiet
+    renderer.result(1, TaigaAnalyzer().analyze_source(SAMPLES['shell.py'], 'shell.py'))
+    renderer.close()
+    assert stream.getvalue().count('\n') == 1
+
+
+def test_color_supported(monkeypatch):
+    for name in ('NO_COLOR', 'FORCE_COLOR', 'TERM'):
+        monkeypatch.delenv(name, raising=False)
+    assert not color_supported(io.StringIO())
+    assert not color_supported(io.StringIO(), no_color=True)
+    monkeypatch.setenv('FORCE_COLOR', '1')
+    assert color_supported(io.StringIO())
+    monkeypatch.setenv('NO_COLOR', '')
+    assert not color_supported(io.StringIO())
@@ -0,0 +1,96 @@
+import io
+import json
+
+import pytest
+
+from taiga.core import TaigaAnalyzer
+from taiga.report import (JSONReportWriter, NDJSONReportWriter, ReportWriter, SARIFReportWriter, iter_report,
+                          open_report_writer, report_format)
+from conftest import SAMPLES
+
+
+@pytest.fixture
+def results():
+    analyzer = TaigaAnalyzer()
+    results = [analyzer.analyze_source(source, name) for name, source in SAMPLES.items()]
+    results.append({'filename': 'big.py', 'status': 'timeout', 'error': 'Превышено время анализа файла (1 с)',
+                    'findings': [], 'risk_score': 0})
+    return results
+
+
+def write_all(writer_class, results, **kwargs):
+    stream = io.StringIO()
+    with writer_class(stream, **kwargs) as writer:
+        for result in results:
+            writer.write(result)
+    return stream.getvalue()
+
+
+def test_report_writer_is_abstract():
+    with pytest.raises(TypeError):
+        ReportWriter(io.StringIO())
+
+    class Partial(ReportWriter):
+        pass
+
+    with pytest.raises(TypeError):
+        Partial(io.StringIO())
+
+
+def test_json_matches_dump(results):
+    assert write_all(JSONReportWriter, results) == json.dumps(results, ensure_ascii=False, indent=2)
+    assert write_all(JSONReportWriter, []) == '[]'
+
+
+def test_ndjson_one_object_per_line(results):
+    text = write_all(NDJSONReportWriter, results, line_buffered=False)
+    lines = text.split('\n')
+    assert lines[-1] == ''
+    assert [json.loads(line) for line in lines[:-1]] == results
+
+
+def test_sarif_shape(results):
+    sarif = json.loads(write_all(SARIFReportWriter, results))
+    assert sarif['version'] == '2.1.0'
+    assert sarif['$schema'] == SARIFReportWriter.SCHEMA
+    [run] = sarif['runs']
+
+    findings = [(result['filename'], finding) for result in results for finding in result['findings']]
+    assert len(run['results']) == len(findings) > 0
+    rules = run['tool']['driver']['rules']
+    assert run['tool']['driver']['name'] == 'Taiga'
+    assert len({rule['id'] for rule in rules}) == len(rules)
+
+    for entry, (filename, finding) in zip(run['results'], findings):
+        assert rules[entry['ruleIndex']]['id'] == entry['ruleId'] == finding['detector']
+        assert entry['level'] in ('note', 'warning', 'error')
+        [location] = entry['locations']
+        assert location['physicalLocation']['artifactLocation']['uri'] == filename
+        region = location['physicalLocation']['region']
+        assert region['startLine'] >= 1 and region['startColumn'] >= 1
+
+    # Ошибки разбора и лимиты - уведомления запуска, а не результаты
+    [invocation] = run['invocations']
+    notified = [n['locations'][0]['physicalLocation']['artifactLocation']['uri']
+                for n in invocation['toolExecutionNotifications']]
+    assert notified == ['broken.py', 'big.py']
+
+
+def test_sarif_empty():
+    run = json.loads(write_all(SARIFReportWriter, []))['runs'][0]
+    assert run['results'] == [] and run['tool']['driver']['rules'] == []
+
+
+@pytest.mark.parametrize('name, fmt', [('out.json', 'json'), ('out.ndjson', 'ndjson'), ('out.jsonl', 'ndjson'),
+                                       ('out.sarif', 'sarif'), ('out.sarif.json', 'sarif')])
+def test_report_round_trip(tmp_path, results, name, fmt):
+    path = str(tmp_path / name)
+    assert report_format(path) == fmt
+    with open_report_writer(path) as writer:
+        for result in results:
+            writer.write(result)
+
+    if fmt == 'sarif':
+        json.loads((tmp_path / name).read_text(encoding='utf-8'))
+    else:
+        assert list(iter_report(path, chunk_size=64)) == results
@@ -0,0 +1,87 @@
+import ast
+import json
+
+import pytest
+
+from taiga.core import TaigaAnalyzer
+from taiga.detectors.dangerous_calls import DangerousCallsDetector
+from taiga.rules import COMPILED_FORMAT, Rule, RuleIndex, load_rule_pack
+
+
+def write_pack(path, rules, name='intel'):
+    path.write_text(json.dumps({'name': name, 'rules': rules}), encoding='utf-8')
+    return str(path)
+
+
+def call_of(source):
+    return ast.parse(source, mode='eval').body.func
+
+
+def test_pack_parsing(tmp_path):
+    path = write_pack(tmp_path / 'pack.json', [
+        {'id': 'TI-1', 'call': 'urllib.request.urlopen', 'severity': 'high', 'description': 'Сетевой запрос'},
+        {'call': 'ctypes.CDLL'},
+    ])
+    assert load_rule_pack(path) == [
+        Rule('urllib.request.urlopen', 'HIGH', 'Сетевой запрос', 'TI-1'),
+        Rule('ctypes.CDLL', 'MEDIUM', 'Вызов опасной функции: ctypes.CDLL', 'intel:2'),
+    ]
+
+
+def test_toml_pack(tmp_path):
+    path = tmp_path / 'pack.toml'
+    path.write_text('name = "t"\n[[rules]]\ncall = "os.fork"\nseverity = "LOW"\n', encoding='utf-8')
+    assert load_rule_pack(str(path)) == [Rule('os.fork', 'LOW', 'Вызов опасной функции: os.fork', 't:1')]
+
+
+@pytest.mark.parametrize('entry', [{'call': 'os..system'}, {'call': ''}, {'call': 'os.system', 'severity': 'FATAL'}])
+def test_invalid_rules_rejected(tmp_path, entry):
+    with pytest.raises(ValueError):
+        load_rule_pack(write_pack(tmp_path / 'bad.json', [entry]))
+
+
+def test_pack_overrides_builtin_rule(tmp_path):
+    path = write_pack(tmp_path / 'pack.json', [{'call': 'os.system', 'severity': 'CRITICAL'}])
+    index = RuleIndex.load([path], DangerousCallsDetector.default_rules())
+
+    assert index.match(call_of('os.system("x")')).severity == 'CRITICAL'
+    assert index.count == len(DangerousCallsDetector.default_rules())
+
+    result = TaigaAnalyzer(rules=index).analyze_source('import os\nos.system("x")\n')
+    assert [finding['severity'] for finding in result['findings']] == ['CRITICAL']
+
+
+def test_match_walks_segments_from_the_end():
+    index = RuleIndex([Rule('os.path.join', 'LOW', 'd')])
+    assert index.match(call_of('os.path.join(a)')) is not None
+    assert index.match(call_of('path.join(a)')) is None
+    assert index.match(call_of('x.os.path.join(a)')) is None
+    assert index.match_name('os.path.join').call == 'os.path.join'
+
+
+def test_compiled_pack_is_cached_as_json(tmp_path):
+    path = write_pack(tmp_path / 'pack.json', [{'call': 'os.fork'}])
+    cache_dir = tmp_path / 'cache'
+    first = RuleIndex.load([path], DangerousCallsDetector.default_rules(), cache_dir=cache_dir)
+
+    [cached] = (cache_dir / 'rules').iterdir()
+    assert cached.suffix == '.json'
+    data = json.loads(cached.read_text(encoding='utf-8'))
+    assert data['format'] == COMPILED_FORMAT
+
+    second = RuleIndex.load([path], DangerousCallsDetector.default_rules(), cache_dir=cache_dir)
+    assert second.digest() == first.digest()
+    assert second.count == first.count
+    assert second.match(call_of('os.fork()')) == first.match(call_of('os.fork()'))
+
+
+@pytest.mark.parametrize('payload', ['not json', '{"format": 1, "trie": {}}', '{"format": 2, "trie": {"x": 1}}'])
+def test_damaged_cache_is_rebuilt(tmp_path, payload):
+    path = write_pack(tmp_path / 'pack.json', [{'call': 'os.fork'}])
+    cache_dir = tmp_path / 'cache'
+    RuleIndex.load([path], cache_dir=cache_dir)
+    [cached] = (cache_dir / 'rules').iterdir()
+    cached.write_text(payload, encoding='utf-8')
+
+    index = RuleIndex.load([path], cache_dir=cache_dir)
+    assert [rule.call for rule in index.rules()] == ['os.fork']
@@ -0,0 +1,61 @@
+import ast
+
+import pytest
+
+from taiga.core import TaigaAnalyzer
+from taiga.detectors.base_detector import BaseDetector
+from taiga.rules import SEVERITY_LEVELS
+from conftest import SAMPLES
+
+
+class LowOnlyDetector(BaseDetector):
+    MAX_SEVERITY = 'LOW'
+
+    def visit_Name(self, node):
+        pass
+
+
+def detector_names(analyzer):
+    return [detector.name for detector in analyzer.detectors]
+
+
+def test_select_detectors_drops_detectors_below_threshold():
+    analyzer = TaigaAnalyzer()
+    assert detector_names(analyzer) == ['DangerousCallsDetector', 'ObfuscationDetector']
+    assert analyzer._select_detectors([LowOnlyDetector()])[0].name == 'LowOnlyDetector'
+
+    analyzer = TaigaAnalyzer(min_severity='MEDIUM')
+    assert analyzer._select_detectors([LowOnlyDetector()]) == []
+
+    # Ни один детектор не сообщает CRITICAL: анализировать нечего
+    assert detector_names(TaigaAnalyzer(min_severity='CRITICAL')) == []
+
+
+def test_high_threshold_skips_entropy_pass():
+    obfuscation = TaigaAnalyzer(min_severity='HIGH').detectors[1]
+    assert not obfuscation.entropy
+    assert ast.Constant not in obfuscation.node_handlers()
+    assert ast.Constant in TaigaAnalyzer().detectors[1].node_handlers()
+
+
+def test_high_threshold_prunes_rules():
+    dangerous = TaigaAnalyzer(min_severity='HIGH').detectors[0]
+    levels = {SEVERITY_LEVELS[rule.severity] for rule in dangerous.rules.rules()}
+    assert levels and min(levels) >= SEVERITY_LEVELS['HIGH']
+
+
+def test_fingerprint_depends_on_threshold():
+    fingerprints = {level: TaigaAnalyzer(min_severity=level).fingerprint() for level in SEVERITY_LEVELS}
+    assert len(set(fingerprints.values())) == len(fingerprints)
+    # Без порога отпечаток прежний: существующие кэши остаются действительными
+    assert fingerprints['LOW'] == TaigaAnalyzer().fingerprint()
+
+
+@pytest.mark.parametrize('level', ['MEDIUM', 'HIGH'])
+def test_pruned_findings_match_filtered(level):
+    full = TaigaAnalyzer()
+    pruned = TaigaAnalyzer(min_severity=level)
+    for name, source in SAMPLES.items():
+        expected = [f for f in full.analyze_source(source, name)['findings']
+                    if SEVERITY_LEVELS[f['severity']] >= SEVERITY_LEVELS[level]]
+        assert pruned.analyze_source(source, name)['findings'] == expected
@@ -0,0 +1,79 @@
+import pytest
+
+from taiga.cli import main
+from taiga.report import iter_report
+from taiga.shard import ShardFilter, load_manifest, parse_shard, shard_of, write_manifest
+
+PATHS = [f'pkg{i}/module{j}.py' for i in range(10) for j in range(10)]
+
+
+def test_parse_shard():
+    assert parse_shard('2/4') == (2, 4)
+    for value in ('0/4', '5/4', '1/0', 'x/4', '1'):
+        with pytest.raises(ValueError):
+            parse_shard(value)
+
+
+@pytest.mark.parametrize('count', [1, 3, 7])
+def test_shards_partition_paths(count):
+    shards = [list(ShardFilter(index, count).filter(PATHS)) for index in range(1, count + 1)]
+    assert sorted(path for shard in shards for path in shard) == sorted(PATHS)
+    # Разбиение не зависит от процесса и порядка путей
+    assert [shard_of(path, count) for path in PATHS] == [shard_of(path, count) for path in PATHS]
+    assert list(ShardFilter(1, count).filter(reversed(PATHS))) == list(reversed(shards[0]))
+
+
+def test_skipped_counts_other_shards():
+    shard = ShardFilter(1, 3)
+    accepted = list(shard.filter(PATHS))
+    assert shard.skipped == len(PATHS) - len(accepted)
+
+
+def test_root_prefix_is_ignored(tmp_path):
+    root = str(tmp_path)
+    rooted = [f'{root}/{path}' for path in PATHS]
+    assert [path[len(root) + 1:] for path in ShardFilter(2, 3, root).filter(rooted)] \
+        == list(ShardFilter(2, 3).filter(PATHS))
+
+
+def test_manifest_balances_sizes(tmp_path):
+    files = {'big.py': 30000, 'a.py': 3000, 'b.py': 3000, 'c.py': 3000}
+    for name, size in files.items():
+        (tmp_path / name).write_bytes(b'#' * size)
+    manifest_path = tmp_path / 'manifest.json'
+    assert write_manifest([str(tmp_path / name) for name in files], str(tmp_path), str(manifest_path)) == 4
+
+    manifest = load_manifest(str(manifest_path))
+    assert manifest == files
+    first = ShardFilter(1, 2, manifest=manifest)
+    second = ShardFilter(2, 2, manifest=manifest)
+    assert list(first.filter(sorted(files))) == ['big.py']
+    assert list(second.filter(sorted(files))) == ['a.py', 'b.py', 'c.py']
+    # Файл не из манифеста раскладывается по хэшу
+    assert first.shard_for('new.py') == shard_of('new.py', 2)
+
+
+def test_invalid_manifest(tmp_path):
+    path = tmp_path / 'manifest.json'
+    path.write_text('{"a.py": "big"}', encoding='utf-8')
+    with pytest.raises(ValueError):
+        load_manifest(str(path))
+
+
+def test_merge_deduplicates_shard_reports(sample_tree, tmp_path):
+    reports = []
+    for index in (1, 2):
+        report = tmp_path / f'shard-{index}.ndjson'
+        main([str(sample_tree), '--shard', f'{index}/2', '--no-cache', '-o', str(report), '--format', 'compact'])
+        reports.append(str(report))
+
+    shard_files = [[result['filename'] for result in iter_report(report)] for report in reports]
+    assert not set(shard_files[0]) & set(shard_files[1])
+    assert len(shard_files[0]) + len(shard_files[1]) == 30
+
+    merged = tmp_path / 'merged.json'
+    # Повторно переданный отчет шарда не удваивает файлы
+    exit_code = main(['merge', reports[0], reports[1], reports[0], '-o', str(merged)])
+    filenames = [result['filename'] for result in iter_report(str(merged))]
+    assert sorted(filenames) == sorted(shard_files[0] + shard_files[1])
+    assert exit_code == 1
@@ -0,0 +1,115 @@
+import pytest
+
+from taiga.cli import main
+from taiga.store import ResultStore, StoreError, StoreReportWriter, open_store
+
+
+def finding(detector, severity, pattern, line=1):
+    return {'detector': detector, 'severity': severity, 'pattern': pattern,
+            'description': f'{pattern} call', 'line': line, 'col': 0}
+
+
+RESULTS = [
+    {'filename': 'src/app.py', 'status': 'success', 'risk_score': 4.0, 'findings': [
+        finding('DangerousCallsDetector', 'HIGH', 'eval', 3),
+        finding('DangerousCallsDetector', 'MEDIUM', 'os.system', 5),
+    ]},
+    {'filename': 'src/util/io.py', 'status': 'success', 'risk_score': 6.0, 'findings': [
+        finding('DangerousCallsDetector', 'CRITICAL', 'pickle.loads', 7),
+        finding('ObfuscationDetector', 'HIGH', 'base64_exec', 9),
+    ]},
+    {'filename': 'tests/test_app.py', 'status': 'success', 'risk_score': 0.0, 'findings': []},
+    {'filename': 'broken.py', 'status': 'syntax_error', 'risk_score': 0.0, 'findings': [], 'error': 'bad'},
+]
+
+
+def write_run(path, results, label=None):
+    with StoreReportWriter(str(path), label=label, command='taiga .') as writer:
+        for result in results:
+            writer.write(result)
+    return writer.run_id
+
+
+@pytest.fixture
+def store(tmp_path):
+    path = tmp_path / 'results.db'
+    write_run(path, RESULTS[:1], label='old')
+    write_run(path, RESULTS, label='new')
+    store = open_store(str(path))
+    yield store
+    store.close()
+
+
+def test_round_trip(store):
+    runs = store.runs()
+    assert [(run['label'], run['files'], run['findings']) for run in runs] == [('old', 1, 2), ('new', 4, 4)]
+    assert all(run['finished'] for run in runs)
+
+    findings = sorted(store.query(runs=[2]), key=lambda f: (f['filename'], f['line']))
+    assert findings[0] == {'run': 2, 'filename': 'src/app.py', 'line': 3, 'col': 0, 'severity': 'HIGH',
+                           'detector': 'DangerousCallsDetector', 'pattern': 'eval', 'description': 'eval call'}
+    assert len(findings) == 4
+
+
+def test_resolve_runs(store):
+    assert store.resolve_runs(None) == [2]
+    assert store.resolve_runs('all') is None
+    assert store.resolve_runs('1') == [1]
+    assert store.resolve_runs('old') == [1]
+    assert store.resolve_runs('missing') == []
+
+
+def patterns(findings):
+    return sorted(f['pattern'] for f in findings)
+
+
+def test_query_filters(store):
+    assert patterns(store.query(runs=[2], detectors=['ObfuscationDetector'])) == ['base64_exec']
+    assert patterns(store.query(runs=[2], severities=['HIGH'])) == ['base64_exec', 'eval']
+    assert patterns(store.query(runs=[2], min_severity='HIGH')) == ['base64_exec', 'eval', 'pickle.loads']
+    assert patterns(store.query(runs=[2], patterns=['pickle.*'])) == ['pickle.loads']
+    assert patterns(store.query(runs=[2], patterns=['os.system'])) == ['os.system']
+    # * в пути совпадает и с /
+    assert patterns(store.query(runs=[2], paths=['src/*'])) == ['base64_exec', 'eval', 'os.system', 'pickle.loads']
+    assert patterns(store.query(runs=[2], paths=['src/app.py'], min_severity='HIGH')) == ['eval']
+    assert patterns(store.query(runs=None, patterns=['eval'])) == ['eval', 'eval']
+    assert len(list(store.query(runs=[2], limit=1))) == 1
+
+
+def test_count(store):
+    assert store.count(runs=[2]) == [(None, 4)]
+    assert store.count('run', runs=None) == [(2, 4), (1, 2)]
+    assert dict(store.count('severity', runs=[2])) == {'CRITICAL': 1, 'HIGH': 2, 'MEDIUM': 1}
+    assert dict(store.count('file', runs=[2], detectors=['DangerousCallsDetector'])) \
+        == {'src/app.py': 2, 'src/util/io.py': 1}
+
+
+def test_flush_in_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(ResultStore, 'FLUSH_FILES', 2)
+    path = tmp_path / 'results.db'
+    write_run(path, RESULTS)
+    store = open_store(str(path))
+    try:
+        assert store.count(runs=[1]) == [(None, 4)]
+        assert store.runs()[0]['files'] == 4
+    finally:
+        store.close()
+
+
+def test_open_missing_store(tmp_path):
+    with pytest.raises(StoreError):
+        open_store(str(tmp_path / 'missing.db'))
+
+
+def test_scan_to_unwritable_store(sample_tree, tmp_path, capsys):
+    assert main([str(sample_tree), '--no-cache', '-o', str(tmp_path / 'missing' / 'results.db')]) == 1
+    assert 'Ошибка записи отчета' in capsys.readouterr().out
+
+
+def test_scan_and_query(sample_tree, tmp_path, capsys):
+    database = str(tmp_path / 'results.db')
+    main([str(sample_tree), '--no-cache', '-o', database, '--run-label', 'ci'])
+    capsys.readouterr()
+
+    assert main(['query', database, '--run', 'ci', '--pattern', 'os.system', '--count']) == 0
+    assert capsys.readouterr().out.strip().endswith('6')
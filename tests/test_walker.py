@@ -0,0 +1,64 @@
+import os
+
+from taiga.walker import FileWalker, is_ignored, parse_ignore_lines
+from conftest import write_tree
+
+
+def walk(root, **kwargs):
+    walker = FileWalker(str(root), **kwargs)
+    return sorted(os.path.relpath(path, root).replace(os.sep, '/') for path in walker), walker
+
+
+def test_gitignore_rules(tmp_path):
+    write_tree(tmp_path, {
+        '.gitignore': 'build/\n*_pb2.py\n!keep_pb2.py\n/top.py\n',
+        'app/main.py': '',
+        'app/api_pb2.py': '',
+        'app/keep_pb2.py': '',
+        'app/top.py': '',
+        'top.py': '',
+        'build/gen.py': '',
+        'notes.txt': '',
+    })
+    files, walker = walk(tmp_path)
+    assert files == ['app/keep_pb2.py', 'app/main.py', 'app/top.py']
+    assert walker.skipped['ignored'] == 3
+
+
+def test_nested_ignore_file_is_relative_to_its_directory(tmp_path):
+    write_tree(tmp_path, {
+        'pkg/.taigaignore': '/gen.py\n',
+        'pkg/gen.py': '',
+        'pkg/sub/gen.py': '',
+        'gen.py': '',
+    })
+    files, _ = walk(tmp_path)
+    assert files == ['gen.py', 'pkg/sub/gen.py']
+
+
+def test_pruned_dirs_venv_and_exclude(tmp_path):
+    write_tree(tmp_path, {
+        '.git/hook.py': '',
+        'node_modules/x.py': '',
+        'env/pyvenv.cfg': '',
+        'env/lib/site.py': '',
+        'tests/test_a.py': '',
+        'src/a.py': '',
+    })
+    files, _ = walk(tmp_path, exclude=['tests/'])
+    assert files == ['src/a.py']
+
+
+def test_ignore_files_can_be_disabled_and_size_limit(tmp_path):
+    write_tree(tmp_path, {'.gitignore': '*.py\n', 'small.py': 'x = 1\n', 'big.py': 'x = 1\n' * 1000})
+    files, walker = walk(tmp_path, use_ignore_files=False, max_file_size=100)
+    assert files == ['small.py']
+    assert walker.skipped['too_large'] == 1
+
+
+def test_last_matching_rule_wins():
+    rules = parse_ignore_lines(['*.py', '!keep.py', 'keep.py'])
+    assert is_ignored(rules, 'keep.py', False)
+    assert not is_ignored(parse_ignore_lines(['*.py', '!keep.py']), 'keep.py', False)
+    assert is_ignored(parse_ignore_lines(['docs/**/*.py']), 'docs/a/b/c.py', False)
+    assert not is_ignored(parse_ignore_lines(['logs/']), 'logs', False)
@@ -0,0 +1,121 @@
+import os
+
+from taiga.core import TaigaAnalyzer
+from taiga.walker import FileWalker
+from taiga.watch import Changes, FileIndex, WatchSession
+from conftest import SAMPLES, write_tree
+
+
+class CountingAnalyzer(TaigaAnalyzer):
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.analyzed = []
+
+    def iter_analyze(self, paths, jobs=None):
+        paths = list(paths)
+        self.analyzed.extend(os.path.basename(path) for path in paths)
+        return super().iter_analyze(paths, jobs)
+
+
+def session_for(root, index_path=None):
+    analyzer = CountingAnalyzer()
+    index = (FileIndex.load(str(index_path), analyzer.fingerprint()) if index_path is not None
+             else FileIndex(analyzer.fingerprint()))
+    return WatchSession(analyzer, FileWalker(str(root)), index), analyzer
+
+
+def changed(*paths, removed_dirs=()):
+    return Changes({str(path) for path in paths}, {str(path) + os.sep for path in removed_dirs}, False)
+
+
+def test_index_round_trip(tmp_path):
+    root = write_tree(tmp_path / 'tree', {'shell.py': SAMPLES['shell.py'], 'pkg/clean.py': SAMPLES['clean.py']})
+    index_path = tmp_path / 'state' / 'index.json'
+    session, analyzer = session_for(root)
+    session.rescan()
+    session.index.save(str(index_path))
+    assert sorted(analyzer.analyzed) == ['clean.py', 'shell.py']
+
+    # Перезапуск: индекс загружен, файлы не менялись - анализ не нужен, сводка восстановлена
+    restored, analyzer = session_for(root, index_path)
+    assert restored.index.entries == session.index.entries
+    assert restored.rescan() == []
+    assert analyzer.analyzed == []
+    assert (restored.summary.files, restored.summary.findings) == (session.summary.files, session.summary.findings)
+    assert not list(tmp_path.joinpath('state').glob('*.tmp'))
+
+
+def test_fingerprint_mismatch_invalidates_index(tmp_path):
+    root = write_tree(tmp_path / 'tree', {'shell.py': SAMPLES['shell.py']})
+    index_path = tmp_path / 'index.json'
+    session, _ = session_for(root)
+    session.rescan()
+    session.index.save(str(index_path))
+
+    assert len(FileIndex.load(str(index_path), session.index.fingerprint)) == 1
+    assert len(FileIndex.load(str(index_path), 'other-rules')) == 0
+
+    index_path.write_text('{broken', encoding='utf-8')
+    assert len(FileIndex.load(str(index_path), session.index.fingerprint)) == 0
+    assert len(FileIndex.load(str(tmp_path / 'missing.json'), session.index.fingerprint)) == 0
+
+
+def test_touch_with_same_digest_skips_analysis(tmp_path):
+    root = write_tree(tmp_path / 'tree', {'a.py': 'x = 1\n', 'b.py': 'y = 2\n'})
+    session, analyzer = session_for(root)
+    session.rescan()
+    analyzer.analyzed.clear()
+
+    path = root / 'a.py'
+    before = session.index.entries[str(path)]
+    os.utime(path, ns=(before.mtime_ns + 10**9, before.mtime_ns + 10**9))
+
+    assert session.apply(changed(path)) == []
+    assert analyzer.analyzed == []
+    # Новое время изменения запомнено: следующее событие не считает хэш заново
+    assert session.index.entries[str(path)].mtime_ns == before.mtime_ns + 10**9
+
+    path.write_text(SAMPLES['shell.py'], encoding='utf-8')
+    [change] = session.apply(changed(path))
+    assert analyzer.analyzed == ['a.py']
+    assert change.old['findings'] == [] and change.new['findings']
+    assert session.summary.files_with_findings == 1
+
+
+def test_removed_directory_drops_entries(tmp_path):
+    root = write_tree(tmp_path / 'tree', {'pkg/a.py': 'x = 1\n', 'pkg/sub/b.py': 'y = 2\n',
+                                          'pkg2/c.py': 'z = 3\n', 'd.py': SAMPLES['shell.py']})
+    session, analyzer = session_for(root)
+    session.rescan()
+    analyzer.analyzed.clear()
+
+    for name in ('pkg/sub/b.py', 'pkg/a.py'):
+        (root / name).unlink()
+    (root / 'pkg/sub').rmdir()
+    (root / 'pkg').rmdir()
+
+    changes = session.apply(changed(removed_dirs=[root / 'pkg']))
+    assert sorted(os.path.basename(change.filename) for change in changes) == ['a.py', 'b.py']
+    assert all(change.new is None for change in changes)
+    # Соседний каталог с тем же префиксом имени не затронут
+    assert sorted(os.path.relpath(name, root) for name in session.index.entries) == ['d.py', 'pkg2/c.py']
+    assert session.summary.files == 2
+    assert analyzer.analyzed == []
+
+
+def test_removed_file_and_rescan(tmp_path):
+    root = write_tree(tmp_path / 'tree', {'a.py': 'x = 1\n', 'b.py': 'y = 2\n'})
+    session, analyzer = session_for(root)
+    session.rescan()
+    analyzer.analyzed.clear()
+
+    (root / 'a.py').unlink()
+    write_tree(root, {'c.py': 'z = 3\n'})
+    [change] = session.apply(changed(root / 'a.py'))
+    assert change.new is None and change.old is not None
+
+    # Переполнение очереди событий: полный обход находит пропущенный файл
+    [change] = session.apply(Changes(set(), set(), True))
+    assert os.path.basename(change.filename) == 'c.py' and change.old is None
+    assert analyzer.analyzed == ['c.py']